@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark loading config directories with many config fragments.
+
+Generates config directories holding increasing numbers of fragments,
+one per site, each defining a number of backends, and reports how long
+ConfigManager takes to load, i.e. parse and merge, them when parsing
+the fragments serially, and in parallel.
+
+Usage:
+    python3 benchmarks/bench_config_load.py [--fragments N [N ...]]
+        [--backends N] [--workers N] [--repeat N]
+"""
+
+import argparse
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+from typing import (List, Optional, Sequence)
+
+from scc_hypervisor_collector import ConfigManager
+from scc_hypervisor_collector.api import LoadOptions
+
+
+def write_fragments(config_dir: Path, fragments: int,
+                    backends: int) -> None:
+    """Write the specified number of site config fragments."""
+    config_dir.mkdir(mode=0o700)
+    for site in range(fragments):
+        lines = ["---", "backends:"]
+        for host in range(backends):
+            lines.extend([
+                f"  - id: site{site}_vmware_{host}",
+                "    module: VMware",
+                f"    hostname: vcenter{host}.site{site}.example.com",
+                "    port: 443",
+                "    username: VMware_Account_Username",
+                "    password: VMware_Account_Password",
+            ])
+        fragment = config_dir / f"site{site:05d}.yaml"
+        fragment.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        fragment.chmod(0o600)
+
+
+def time_load(config_dir: Path, parse_workers: int, repeat: int) -> float:
+    """Return the best time taken to load the config directory."""
+    timings: List[float] = []
+    for _ in range(repeat):
+        config_manager = ConfigManager(
+            config_dir=str(config_dir),
+            options=LoadOptions(parse_workers=parse_workers)
+        )
+        start = time.perf_counter()
+        config_manager._load_config()  # pylint: disable=protected-access
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the config load benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument('--fragments', type=int, nargs='+',
+                        default=[10, 100, 250, 500, 1000],
+                        help="The numbers of config fragments to load.")
+    parser.add_argument('--backends', type=int, default=5,
+                        help="The number of backends per fragment.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="The number of parallel parse workers.")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="The number of times each load is timed.")
+    args = parser.parse_args(argv)
+
+    print(f"{'fragments':>10} {'serial (s)':>12} "
+          f"{f'parallel x{args.workers} (s)':>18} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for count, fragments in enumerate(args.fragments):
+            config_dir = Path(tmp_dir) / f"config{count}"
+            write_fragments(config_dir, fragments, args.backends)
+            serial = time_load(config_dir, 1, args.repeat)
+            parallel = time_load(config_dir, args.workers, args.repeat)
+            print(f"{fragments:>10} {serial:>12.3f} {parallel:>18.3f} "
+                  f"{serial / parallel:>7.2f}x")
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark saving and loading collection results in each results format.
+
+Generates synthetic collection results, similar to those collected from
+large vCenters, holding increasing numbers of VMs, and reports how long
+CollectionResults takes to save them to, and load them from, a results
+file in the YAML and JSON lines formats, uncompressed or compressed, as
+well as the peak memory allocated while doing so, and the size of the
+results file.
+
+Usage:
+    python3 benchmarks/bench_results.py [--vms N [N ...]] [--backends N]
+        [--vms-per-host N] [--repeat N]
+        [--compressions COMPRESSION [COMPRESSION ...]]
+"""
+
+import argparse
+import itertools
+import json
+from pathlib import Path
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import (Any, Callable, Optional, Sequence, Tuple)
+import uuid
+
+from scc_hypervisor_collector import CollectionResults
+
+
+def write_synthetic_results(file_path: Path, vms: int, backends: int,
+                            vms_per_host: int) -> None:
+    """Write synthetic collection results, holding the specified number
+    of VMs, as JSON lines, one backend at a time."""
+    hosts = max(vms // (backends * vms_per_host), 1)
+    with file_path.open("w", encoding="utf-8") as fp:
+        for backend in range(backends):
+            virtualization_hosts = []
+            for host in range(hosts):
+                systems = [
+                    dict(uuid=str(uuid.uuid4()),
+                         properties=dict(vm_name=f"vm{vm}-host{host}",
+                                         vmState='running'))
+                    for vm in range(vms_per_host)
+                ]
+                virtualization_hosts.append(dict(
+                    identifier=str(uuid.uuid4()),
+                    group_name=f"vcenter{backend}",
+                    properties=dict(
+                        name=f"esx{host}.vcenter{backend}.example.com",
+                        arch='x86_64', cores=32, sockets=2, threads=64,
+                        ram_mb=1048576, type='vmware'),
+                    systems=systems,
+                ))
+            fp.write(json.dumps(dict(
+                backend=f"vcenter{backend}",
+                details=dict(virtualization_hosts=virtualization_hosts),
+                valid=True,
+            )))
+            fp.write("\n")
+    file_path.chmod(0o600)
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """Return the best time taken to call func."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """Return the peak memory, in bytes, allocated while calling func."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Tuple[float, int]:
+    """Return the best time taken to call func, and the peak memory
+    allocated while doing so, measured separately."""
+    return best_time(func, repeat), peak_memory(func)
+
+
+def load(file_path: Path) -> CollectionResults:
+    """Return the results loaded from the file."""
+    results = CollectionResults()
+    results.load(file_path)
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the results formats benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument('--vms', type=int, nargs='+',
+                        default=[10000, 100000, 1000000],
+                        help="The total numbers of VMs in the results.")
+    parser.add_argument('--backends', type=int, default=10,
+                        help="The number of backends in the results.")
+    parser.add_argument('--vms-per-host', type=int, default=50,
+                        help="The number of VMs per host.")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="The number of times each operation is timed.")
+    parser.add_argument('--compressions', nargs='+',
+                        choices=CollectionResults.COMPRESSIONS,
+                        default=['none', 'gzip'],
+                        help="The results file compressions to measure.")
+    args = parser.parse_args(argv)
+
+    print(f"{'VMs':>9} {'format':>6} {'compression':>11} "
+          f"{'size (MiB)':>11} {'save (s)':>9} "
+          f"{'save peak (MiB)':>16} {'load (s)':>9} "
+          f"{'load peak (MiB)':>16}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for vms in args.vms:
+            source = Path(tmp_dir) / f"source{vms}.jsonl"
+            write_synthetic_results(source, vms, args.backends,
+                                    args.vms_per_host)
+            results = load(source)
+            for results_format, compression in itertools.product(
+                    CollectionResults.FORMATS, args.compressions):
+                file_path = (Path(tmp_dir) /
+                             f"results{vms}.{results_format}.{compression}")
+                save_time, save_peak = measure(
+                    lambda f=file_path, r=results_format, c=compression:
+                    results.save(f, results_format=r, compression=c),
+                    args.repeat
+                )
+                load_time, load_peak = measure(
+                    lambda f=file_path: load(f), args.repeat
+                )
+                size = file_path.stat().st_size
+                print(f"{vms:>9} {results_format:>6} {compression:>11} "
+                      f"{size / 2**20:>11.1f} "
+                      f"{save_time:>9.3f} {save_peak / 2**20:>16.1f} "
+                      f"{load_time:>9.3f} {load_peak / 2**20:>16.1f}")
+                sys.stdout.flush()
+                file_path.unlink()
+            source.unlink()
+
+
+if __name__ == '__main__':
+    main()
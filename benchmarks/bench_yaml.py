@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark the YAML loaders and dumpers on large collection results.
+
+Generates synthetic collection results, similar to those collected from
+large vCenters, and reports how long it takes to dump them to, and load
+them from, YAML using the pure Python safe loader and dumper, and the
+libyaml based ones, if PyYAML was built with libyaml support.
+
+Usage:
+    python3 benchmarks/bench_yaml.py [--backends N] [--hosts N] [--vms N]
+        [--repeat N]
+"""
+
+import argparse
+import time
+from typing import (Any, Callable, Dict, List, Optional, Sequence)
+import uuid
+
+import yaml
+
+
+def synthetic_results(backends: int, hosts: int,
+                      vms: int) -> List[Dict[str, Any]]:
+    """Return synthetic collection results."""
+    results: List[Dict[str, Any]] = []
+    for backend in range(backends):
+        virtualization_hosts = []
+        for host in range(hosts):
+            systems = [
+                dict(uuid=str(uuid.uuid4()),
+                     properties=dict(vm_name=f"vm{vm}-host{host}",
+                                     vmState='running'))
+                for vm in range(vms)
+            ]
+            virtualization_hosts.append(dict(
+                group_name=f"vcenter{backend}",
+                identifier=str(uuid.uuid4()),
+                properties=dict(arch='x86_64', cores=32,
+                                name=f"esx{host}.vcenter{backend}.example.com",
+                                os='VMware ESXi', os_version='7.0.3',
+                                ram_mb=1048576, sockets=2, threads=64,
+                                type='vmware'),
+                systems=systems,
+            ))
+        results.append(dict(backend=f"vcenter{backend}",
+                            details=dict(
+                                virtualization_hosts=virtualization_hosts
+                            ),
+                            valid=True))
+    return results
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """Return the best time taken to call func."""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the YAML benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument('--backends', type=int, default=2,
+                        help="The number of backends in the results.")
+    parser.add_argument('--hosts', type=int, default=100,
+                        help="The number of hosts per backend.")
+    parser.add_argument('--vms', type=int, default=50,
+                        help="The number of VMs per host.")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="The number of times each operation is timed.")
+    args = parser.parse_args(argv)
+
+    results = synthetic_results(args.backends, args.hosts, args.vms)
+    content = yaml.dump(results, Dumper=yaml.SafeDumper)
+    print(f"Results: {len(content) / 2**20:.1f} MiB of YAML")
+
+    implementations = [('python', yaml.SafeLoader, yaml.SafeDumper)]
+    if yaml.__with_libyaml__:
+        implementations.append(('libyaml', yaml.CSafeLoader,
+                                yaml.CSafeDumper))
+    else:
+        print("PyYAML was built without libyaml support")
+
+    print(f"{'implementation':>14} {'dump (s)':>10} {'load (s)':>10}")
+    for name, loader, dumper in implementations:
+        dump = best_time(lambda d=dumper: yaml.dump(results, Dumper=d),
+                         args.repeat)
+        load = best_time(lambda ld=loader: yaml.load(content, Loader=ld),
+                         args.repeat)
+        print(f"{name:>14} {dump:>10.3f} {load:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
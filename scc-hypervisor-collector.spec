@@ -61,6 +61,7 @@ Requires:       %{python_module importlib-metadata}
 Requires:       %{python_module PyYAML}
 Requires:       %{python_module requests}
 Requires:       openssh-clients
+Recommends:     %{python_module zstandard}
 Requires:       virtual-host-gatherer-Libvirt
 Requires:       virtual-host-gatherer-VMware
 
@@ -149,6 +150,8 @@ fi
 %{python_sitelib}/scc_hypervisor_collector/*.py*
 %dir %{python_sitelib}/scc_hypervisor_collector/api
 %{python_sitelib}/scc_hypervisor_collector/api/*.py*
+%dir %{python_sitelib}/scc_hypervisor_collector/api/configuration
+%{python_sitelib}/scc_hypervisor_collector/api/configuration/*.py*
 %dir %{python_sitelib}/scc_hypervisor_collector/cli
 %{python_sitelib}/scc_hypervisor_collector/cli/*.py*
 
@@ -156,6 +159,8 @@ fi
 %{python_sitelib}/scc_hypervisor_collector/__pycache__/*.py*
 %dir %{python_sitelib}/scc_hypervisor_collector/api/__pycache__
 %{python_sitelib}/scc_hypervisor_collector/api/__pycache__/*.py*
+%dir %{python_sitelib}/scc_hypervisor_collector/api/configuration/__pycache__
+%{python_sitelib}/scc_hypervisor_collector/api/configuration/__pycache__/*.py*
 %dir %{python_sitelib}/scc_hypervisor_collector/cli/__pycache__
 %{python_sitelib}/scc_hypervisor_collector/cli/__pycache__/*.py*
 %{python_sitelib}/scc_hypervisor_collector-*.egg-info
@@ -85,6 +85,11 @@ dev_requirements = [
     "tox",
 ]
 
+# Optional support for zstd compressed results files
+zstd_requirements = [
+    "zstandard",
+]
+
 # Tox requirements
 tox_requirements = [
     'tox',
@@ -131,7 +136,8 @@ setup(
     extras_require={
         'dev': dev_requirements,
         'test': test_requirements,
-        'tox': tox_requirements
+        'tox': tox_requirements,
+        'zstd': zstd_requirements
     },
     keywords='SUSE, SCC, ' + pkg_name + ', ' + pkg_imp_name,
     license='Apache-2.0',
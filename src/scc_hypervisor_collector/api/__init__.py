@@ -9,6 +9,7 @@ from .exceptions import (
     ConfigManagerError,
     ConfigManagerException,
     ConflictingBackendsError,
+    CollectionResultsFormatError,
     CollectionResultsInvalidData,
     CollectionSchedulerException,
     CollectorException,
@@ -18,26 +19,42 @@ from .exceptions import (
     EmptyConfigurationError,
     FilePermissionsError,
     HypervisorCollectorException,
+    HypervisorCollectorTimeout,
+    HypervisorDetailsReleased,
     GathererException,
+    HistoryFilePermissionsError,
     NoConfigFilesFoundError,
     ResultsFilePermissionsError,
     SCCUploaderException,
     SchedulerInvalidConfigError,
 )
-from .config_manager import ConfigManager
-from .configuration import (BackendConfig, CollectorConfig, CredentialsConfig,
-                            GeneralConfig, SccCredsConfig)
-from .gatherer import VHGatherer
-from .hypervisor_collector import HypervisorCollector, HypervisorDetails
+from .async_scheduler import AsyncCollectionScheduler
+from .config_cache import ConfigCache
+from .config_manager import ConfigManager, LoadOptions
+from .configuration import (BackendConfig, BackendGenerator, BackendTemplate,
+                            CollectorConfig, CredentialsConfig,
+                            GeneralConfig, SccCredsConfig, SchedulerConfig)
+from .gatherer import (ModuleRegistry, module_registry, reset_module_registry,
+                       VHGatherer)
+from .history import CollectionHistory
+from .hypervisor_collector import (HypervisorCollector, HypervisorDetails,
+                                   QueryOptions)
+from .hypervisor_hosts import HostSystem, HypervisorHost, HypervisorHosts
+from .limits import RateLimiter
+from .pipeline import CollectionPipeline
+from .planner import CollectionPlan
+from .retry import Backoff, RetryPolicy
 from .scheduler import CollectionResults, CollectionScheduler
 from .uploader import SCCUploader
-from .util import check_permissions
+from .util import check_permissions, dump_yaml, load_yaml, peak_rss_kb
+from .validation import ConfigValidator
 
 __all__ = [
     # exceptions
     'BackendConfigError',
     'ConfigManagerError',
     'ConflictingBackendsError',
+    'CollectionResultsFormatError',
     'CollectionResultsInvalidData',
     'CollectionSchedulerException',
     'CollectorException',
@@ -48,28 +65,66 @@ __all__ = [
     'EmptyConfigurationError',
     'FilePermissionsError',
     'HypervisorCollectorException',
+    'HypervisorCollectorTimeout',
+    'HypervisorDetailsReleased',
     'GathererException',
+    'HistoryFilePermissionsError',
     'NoConfigFilesFoundError',
     'ResultsFilePermissionsError',
     'SCCUploaderException',
     'SchedulerInvalidConfigError',
 
+    # async_scheduler
+    'AsyncCollectionScheduler',
+
+    # config_cache
+    'ConfigCache',
+
     # config_manager
     'ConfigManager',
+    'LoadOptions',
 
     # configuration
     'BackendConfig',
+    'BackendGenerator',
+    'BackendTemplate',
     'CollectorConfig',
     'CredentialsConfig',
     'GeneralConfig',
     'SccCredsConfig',
+    'SchedulerConfig',
 
     # gatherer
+    'ModuleRegistry',
+    'module_registry',
+    'reset_module_registry',
     "VHGatherer",
 
+    # history
+    'CollectionHistory',
+
     # hypervisor_collector
     'HypervisorCollector',
     'HypervisorDetails',
+    'QueryOptions',
+
+    # hypervisor_hosts
+    'HostSystem',
+    'HypervisorHost',
+    'HypervisorHosts',
+
+    # limits
+    'RateLimiter',
+
+    # pipeline
+    'CollectionPipeline',
+
+    # planner
+    'CollectionPlan',
+
+    # retry
+    'Backoff',
+    'RetryPolicy',
 
     # scheduler
     'CollectionResults',
@@ -80,4 +135,10 @@ __all__ = [
 
     # util
     'check_permissions',
+    'dump_yaml',
+    'load_yaml',
+    'peak_rss_kb',
+
+    # validation
+    'ConfigValidator',
 ]
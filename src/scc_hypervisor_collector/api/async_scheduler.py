@@ -0,0 +1,86 @@
+"""
+SCC Hypervisor Collector AsyncCollectionScheduler
+
+The AsyncCollectionScheduler provides an asyncio friendly interface
+to the CollectionScheduler, allowing the hypervisor details to be
+collected from within an event loop without blocking it.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from typing import (AsyncIterator, Generator, Optional)
+
+from .hypervisor_collector import (HypervisorCollector, HypervisorDetails)
+from .scheduler import CollectionScheduler
+
+
+class AsyncCollectionScheduler:
+    """Asyncio Collection Scheduler for scc-hypervisor-collector.
+
+    Drives the provided CollectionScheduler from an executor, so that
+    the event loop is not blocked while the blocking virtual-host-gatherer
+    worker queries collect the details.
+
+    The queries themselves are scheduled by the CollectionScheduler, so
+    its workers and executor settings are respected.
+
+    Arguments:
+        scheduler (CollectionScheduler): the scheduler used to query the
+            configured backends.
+
+    Special Methods:
+        run(): Coroutine that runs the backend queries on all of the
+            configured collectors.
+
+        as_completed(): Asynchronous iterator that runs the backend
+            queries, yielding the HypervisorDetails for each backend
+            as soon as its query completes, allowing early results to
+            be processed without waiting for the slowest backends.
+
+    Special Properties:
+        scheduler (CollectionScheduler): the scheduler provided to the
+            AsyncCollectionScheduler.
+    """
+
+    def __init__(self, scheduler: CollectionScheduler):
+        """Initialiser for AsyncCollectionScheduler"""
+        self._log = logging.getLogger(__name__)
+        self._scheduler: CollectionScheduler = scheduler
+
+    @property
+    def scheduler(self) -> CollectionScheduler:
+        """The scheduler used to query the configured backends."""
+        return self._scheduler
+
+    async def as_completed(self) -> AsyncIterator[HypervisorDetails]:
+        """Run the hypervisor queries, yielding the HypervisorDetails for
+        each backend as soon as its backend query has completed."""
+        loop = asyncio.get_event_loop()
+
+        # each step of the blocking scheduler generator waits for the next
+        # query to complete, so run the steps in a dedicated thread that
+        # ensures they, and the final close(), run strictly in sequence.
+        stepper = ThreadPoolExecutor(max_workers=1)
+        completed: Generator[HypervisorCollector, None, None] = \
+            self._scheduler.as_completed()
+        try:
+            while True:
+                hv_collector: Optional[HypervisorCollector] = \
+                    await loop.run_in_executor(stepper, next, completed, None)
+                if hv_collector is None:
+                    break
+
+                self._log.debug("Backend %s, module %s, query completed",
+                                repr(hv_collector.backend.id),
+                                repr(hv_collector.backend.module))
+                yield hv_collector.hypervisor_details
+        finally:
+            # closing the generator may wait for in-progress queries
+            await loop.run_in_executor(stepper, completed.close)
+            stepper.shutdown(wait=False)
+
+    async def run(self) -> None:
+        """Run the hypervisor queries without blocking the event loop."""
+        async for _ in self.as_completed():
+            pass
@@ -0,0 +1,327 @@
+"""
+SCC Hypervisor Collector ConfigCache
+
+The ConfigCache stores the merged content of the config files, keyed
+by the paths, modification times and content hashes of those files, so
+that an unchanged configuration can be loaded without parsing and
+merging each of the config files again. The config files are still
+read, and hashed, to determine whether they have changed, and the
+cached config data is still validated by the ConfigManager.
+
+The values of secret settings, such as passwords, are not cached;
+instead the location of each of them in the config files is cached,
+and they are read from the config files again when the cache is loaded.
+"""
+
+from functools import reduce
+import hashlib
+import json
+import logging
+from operator import getitem
+from pathlib import Path
+from typing import (Any, Dict, FrozenSet, Iterator, List, Optional, Sequence,
+                    Tuple)
+
+import yaml
+
+from .configuration import BackendConfig
+from .exceptions import CollectorException
+from .util import (YamlSafeLoader, check_permissions, create_private_file,
+                   load_yaml)
+
+# The settings whose values are secrets, i.e. the sensitive fields of
+# any backend, and the SCC credentials' password.
+SECRET_FIELDS: FrozenSet[str] = frozenset(
+    BackendConfig.SENSITIVE_FIELDS | {'password'}
+)
+
+# The path to a secret setting within the config data, and its location
+SecretLocation = Tuple[List[Any], Tuple[int, ...]]
+
+
+def _locate(data: Any, locations: Dict[int, Dict[str, Tuple[int, ...]]]
+            ) -> Optional[List[SecretLocation]]:
+    """Return the path to, and location of, each of the secret settings
+    in the data, given the locations of the secret settings held by each
+    mapping, by identity, or None if any of them can't be located."""
+    found: List[SecretLocation] = []
+    pending: List[Tuple[List[Any], Any]] = [([], data)]
+    while pending:
+        path, value = pending.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key not in SECRET_FIELDS:
+                    pending.append((path + [key], item))
+                    continue
+                location = locations.get(id(value), {}).get(key)
+                if location is None:
+                    return None
+                found.append((path + [key], location))
+        elif isinstance(value, list):
+            pending.extend((path + [i], item)
+                           for i, item in enumerate(value))
+    return found
+
+
+def _read_secret(text: str, start: int, end: int) -> Any:
+    """Return the value of the secret setting at the location in the
+    text of a config file."""
+    return load_yaml(text[start:end])
+
+
+class _SecretsLoader(YamlSafeLoader):  # pylint: disable=too-many-ancestors
+    """YAML safe loader which records the location, in the text being
+    loaded, of the scalar value of each secret setting, by the identity
+    of the mapping holding it."""
+
+    def __init__(self, stream: Any):
+        """Initialiser for _SecretsLoader"""
+        super().__init__(stream)
+        self.locations: Dict[int, Dict[str, Tuple[int, ...]]] = {}
+
+    def construct_secrets_map(self, node: yaml.MappingNode) -> Any:
+        """Construct the mapping, recording where its secrets are."""
+        data: Dict[Any, Any] = {}
+        yield data
+        data.update(self.construct_mapping(node))
+
+        # merge keys have been flattened into the node by now
+        for key_node, value_node in node.value:
+            if isinstance(key_node, yaml.ScalarNode) and \
+                    isinstance(value_node, yaml.ScalarNode) and \
+                    key_node.value in SECRET_FIELDS:
+                self.locations.setdefault(id(data), {})[key_node.value] = (
+                    value_node.start_mark.index, value_node.end_mark.index
+                )
+
+
+_SecretsLoader.add_constructor('tag:yaml.org,2002:map',
+                               _SecretsLoader.construct_secrets_map)
+
+
+def load_config_text(text: str) -> Tuple[Any, Optional[List[SecretLocation]]]:
+    """Return the data loaded from the text of a config file, and the
+    path to, and location in the text of, each of its secret settings,
+    if they could all be located."""
+    loader = _SecretsLoader(text)
+    try:
+        data = loader.get_single_data()
+    finally:
+        loader.dispose()
+    return data, _locate(data, loader.locations)
+
+
+class SecretLocations:
+    """The locations, in the config files, of the secret settings of the
+    config data merged from those config files.
+
+    As config files are merged, the mappings from each file holding its
+    secret settings are themselves merged, so the secret settings are
+    tracked by the identity of those mappings, which are kept so that
+    their identities can't be reused.
+
+    Special Methods:
+        add(file_index, file_data, secrets): add the locations of the
+            secrets in the config file's data, as loaded by
+            load_config_text().
+
+        locate(config_data): the path to, and location of, each of the
+            secret settings in the merged config data, or None if any
+            of them can't be located.
+    """
+
+    def __init__(self) -> None:
+        """Initialiser for SecretLocations"""
+        self._locations: Dict[int, Dict[str, Tuple[int, ...]]] = {}
+        self._mappings: List[Any] = []
+
+    def add(self, file_index: int, file_data: Any,
+            secrets: Optional[List[SecretLocation]]) -> None:
+        """Add the locations of the secrets in the config file's data."""
+        for path, (start, end) in secrets or ():
+            mapping = reduce(getitem, path[:-1], file_data)
+            self._mappings.append(mapping)
+            self._locations.setdefault(id(mapping), {})[path[-1]] = (
+                file_index, start, end
+            )
+
+    def locate(self, config_data: Any) -> Optional[List[SecretLocation]]:
+        """The path to, and location of, each of the secret settings in
+        the merged config data, if they can all be located."""
+        return _locate(config_data, self._locations)
+
+
+class ConfigCache:
+    """Cache of the merged config data loaded from the config files.
+
+    The cached config data is only used if the config files are the
+    same, and in the same order, as when it was cached, with the same
+    modification times and content. The values of the secret settings,
+    such as the credentials' passwords, are not cached; rather their
+    locations in the config files are, and they are read from the config
+    files again when the cache is loaded. As the cached config data
+    still includes other settings, such as usernames, the cache is only
+    used if it, and the containing state directory, are accessible only
+    by the user. The cache is advisory; if it cannot be read, or
+    written, it is ignored.
+
+    Arguments:
+        file_path (Path): the file in which the config data is cached.
+
+    Special Methods:
+        fingerprint(config_files): the keys identifying the current
+            state of the specified config files.
+
+        load(fingerprint): the cached config data, with its secrets read
+            from the config files, and the config file from which each
+            backend was loaded, if cached for the specified fingerprint.
+
+        save(fingerprint, config_data, backend_sources, secrets): cache
+            the config data, without the values of its secrets, as
+            located by SecretLocations, and the config file from which
+            each backend was loaded, for the specified fingerprint,
+            creating the containing state directory if needed.
+
+    Special Properties:
+        file_path (Path): the file in which the config data is cached.
+    """
+
+    # bump if the cache file layout changes incompatibly
+    VERSION = 3
+
+    def __init__(self, file_path: Path):
+        """Initialiser for ConfigCache"""
+        self._log = logging.getLogger(__name__)
+        self._file_path: Path = file_path
+
+    @property
+    def file_path(self) -> Path:
+        """The file in which the config data is cached."""
+        return self._file_path
+
+    @staticmethod
+    def fingerprint(config_files: Sequence[Path]) -> List[Dict[str, Any]]:
+        """The keys identifying the current state of the config files."""
+        keys: List[Dict[str, Any]] = []
+        for config_file in config_files:
+            stats = config_file.stat()
+            keys.append(dict(
+                path=str(config_file.resolve()),
+                mtime_ns=stats.st_mtime_ns,
+                sha256=hashlib.sha256(config_file.read_bytes()).hexdigest(),
+            ))
+        return keys
+
+    def load(self, fingerprint: List[Dict[str, Any]]
+             ) -> Optional[Tuple[Dict, List[Optional[str]]]]:
+        """The cached config data, and backend sources, if cached for the
+        fingerprint."""
+        if not self._file_path.exists():
+            return None
+
+        try:
+            # validate the permissions before trusting the cached data
+            check_permissions(self._file_path.parent)
+            check_permissions(self._file_path)
+            with self._file_path.open("r", encoding="utf-8") as fp:
+                cache = json.load(fp)
+        except (CollectorException, OSError, ValueError) as e:
+            self._log.warning("Ignoring unusable config cache %s: %s",
+                              self._file_path, e)
+            return None
+
+        if not isinstance(cache, dict) or \
+                cache.get('version') != self.VERSION or \
+                not isinstance(cache.get('config'), dict) or \
+                not isinstance(cache.get('secrets'), list) or \
+                not isinstance(cache.get('sources'), list):
+            self._log.warning("Ignoring invalid config cache %s",
+                              self._file_path)
+            return None
+
+        if cache.get('files') != fingerprint:
+            self._log.debug("Config files have changed since they were "
+                            "cached in %s", self._file_path)
+            return None
+
+        config = cache['config']
+        try:
+            for path, value in self._read_secrets(fingerprint,
+                                                  cache['secrets']):
+                reduce(getitem, path[:-1], config)[path[-1]] = value
+        except (OSError, LookupError, TypeError, ValueError,
+                yaml.YAMLError) as e:
+            self._log.warning("Ignoring config cache %s whose secrets "
+                              "can't be read from the config files: %s",
+                              self._file_path, e)
+            return None
+
+        self._log.debug("Loaded config data for %d config files from %s",
+                        len(fingerprint), self._file_path)
+        return config, cache['sources']
+
+    @staticmethod
+    def _read_secrets(fingerprint: List[Dict[str, Any]],
+                      secrets: List[SecretLocation]) -> Iterator[
+                          Tuple[List[Any], Any]]:
+        """Yield the path to, and value read from the config files of,
+        each of the secret settings."""
+        texts: Dict[int, str] = {}
+        for path, (file_index, start, end) in secrets:
+            if file_index not in texts:
+                texts[file_index] = Path(
+                    fingerprint[file_index]['path']
+                ).read_text(encoding="utf-8")
+            yield path, _read_secret(texts[file_index], start, end)
+
+    def save(self, fingerprint: List[Dict[str, Any]],
+             config_data: Dict,
+             secrets: Optional[List[SecretLocation]],
+             backend_sources: Sequence[Optional[str]] = ()) -> None:
+        """Cache the config data, without its secrets, and backend
+        sources, for the fingerprint."""
+        # only cache config data whose secrets can all be read back from
+        # the config files as they are
+        try:
+            readable = secrets is not None and all(
+                reduce(getitem, path, config_data) == value
+                for path, value in self._read_secrets(fingerprint, secrets)
+            )
+        except (OSError, ValueError, yaml.YAMLError):
+            readable = False
+        if not readable or secrets is None:
+            self._log.debug("Not caching config data whose secrets can't "
+                            "be read from the config files")
+            return
+
+        # only cache config data that survives the round trip to JSON
+        # unchanged, e.g. YAML timestamps or non-string keys won't. Keys
+        # aren't sorted so that the order of the config settings is kept.
+        try:
+            cached = json.loads(json.dumps(config_data))
+            cacheable = cached == config_data
+        except (TypeError, ValueError):
+            cacheable = False
+        if not cacheable:
+            self._log.debug("Not caching config data that can't be "
+                            "represented as JSON")
+            return
+
+        for path, _ in secrets:
+            reduce(getitem, path[:-1], cached)[path[-1]] = None
+        content = json.dumps(dict(version=self.VERSION,
+                                  files=fingerprint,
+                                  config=cached,
+                                  secrets=secrets,
+                                  sources=list(backend_sources)),
+                             indent=2)
+
+        try:
+            # create the state directory, and the cache file, such that
+            # only the user has access.
+            create_private_file(self._file_path)
+
+            self._file_path.write_text(content, encoding="utf-8")
+        except OSError as e:
+            self._log.warning("Failed to save config cache %s: %s",
+                              self._file_path, e)
@@ -6,11 +6,19 @@ data and validate that it contains the settings required for correct
 operation of the SCC Hypervisor Collector.
 """
 
+import bisect
+from collections import Counter
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import logging
+import os
 from pathlib import Path
-from typing import (Any, Dict, List, Optional)
-import yaml
+from typing import (Any, Dict, Hashable, Iterable, List, Optional, Set,
+                    Tuple)
 
+from .config_cache import (ConfigCache, SecretLocation, SecretLocations,
+                           load_config_text)
 from .configuration import CollectorConfig
 from .exceptions import (
     ConfigFilePermissionsError,
@@ -19,16 +27,347 @@ from .exceptions import (
     EmptyConfigurationError,
     NoConfigFilesFoundError,
 )
-from .util import check_permissions
+from .util import check_permissions, load_yaml
+
+
+def _parse_config_file(cfg_file: Path, locate_secrets: bool = False
+                       ) -> Tuple[Any, Optional[List[SecretLocation]]]:
+    """Return the parsed content of the config file, and, if requested,
+    the locations of its secret settings, if they could all be located."""
+    text = cfg_file.read_text(encoding="utf-8")
+    if locate_secrets:
+        return load_config_text(text)
+    return load_yaml(text), None
+
+
+def _backend_key(value: Any) -> Hashable:
+    """Return a hashable key for value, such that the keys of values
+    are equal if, and only if, the values themselves are equal."""
+    if isinstance(value, Mapping):
+        return ('mapping', frozenset((k, _backend_key(v))
+                                     for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return ('set', frozenset(value))
+    if isinstance(value, list):
+        return ('list', tuple(_backend_key(v) for v in value))
+    return ('value', value)
+
+
+def _idless_key(backend: Dict[str, Any]) -> Hashable:
+    """Return the _backend_key() of the backend without its id."""
+    no_id_backend = backend.copy()
+    no_id_backend.pop('id')
+    return _backend_key(no_id_backend)
+
+
+class _BackendIndex:
+    """Index of a merged backends list, maintained as further backends
+    are merged into it, so that merging a config file only needs to key
+    the backends in that file.
+
+    Tracks the content keys of the backends, the ids of the backends
+    with ids, and those ids by the content key of the backend without
+    its id, i.e. the key of any id-less duplicate of the backend, as
+    well as the positions of the id-less backends in the list by their
+    content key.
+    """
+
+    def __init__(self, backends: List[Dict[str, Any]]):
+        self.keys: 'Counter[Hashable]' = Counter()
+        self.ids: 'Counter[Any]' = Counter()
+        self.ids_by_idless_key: Dict[Hashable, List[Any]] = {}
+        self.idless_positions: Dict[Hashable, List[int]] = {}
+        self.size: int = 0
+        self.add(backends)
+
+    def add(self, backends: List[Dict[str, Any]]) -> None:
+        """Add the backends to the index."""
+        for position, backend in enumerate(backends, start=self.size):
+            key = _backend_key(backend)
+            self.keys[key] += 1
+            if 'id' in backend:
+                self.ids[backend['id']] += 1
+                self.ids_by_idless_key.setdefault(
+                    _idless_key(backend), []
+                ).append(backend['id'])
+            else:
+                self.idless_positions.setdefault(key, []).append(position)
+        self.size += len(backends)
+
+    def remove_idless(self, key: Hashable) -> int:
+        """Remove the first remaining id-less backend with the specified
+        key, returning its position in the list."""
+        self.keys[key] -= 1
+        self.size -= 1
+        return self.idless_positions[key].pop(0)
+
+    def compact(self, removed: List[int]) -> None:
+        """Update the id-less backend positions once the backends at the
+        sorted removed positions have been removed from the list."""
+        for positions in self.idless_positions.values():
+            positions[:] = [p - bisect.bisect_left(removed, p)
+                            for p in positions]
+
+
+class _ConfigMerger:
+    """Merges the content of successive config files into the config.
+
+    Backend lists are merged appropriately; duplicates are dropped, and
+    conflicting entries fail. Backend templates are merged by name, and
+    backend generators are combined.
+
+    The backends are indexed by their content, and by their ids, with
+    the index being maintained across successive merges into the same
+    config, so that merging scales linearly with the number of backends
+    being merged.
+    """
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger("config_manager")
+
+        # The most recently merged backends list, and its index, which
+        # is reused when merging the next config file into that list.
+        self._merged: Optional[Tuple[List, _BackendIndex]] = None
+
+    def _backend_index(self, backends: Optional[List[Dict[str, Any]]]
+                       ) -> _BackendIndex:
+        """Return the index for the backends list, reusing the index
+        from the previous merge if it is the merged backends list."""
+        if self._merged is not None and self._merged[0] is backends and \
+                len(self._merged[0]) == self._merged[1].size:
+            return self._merged[1]
+
+        return _BackendIndex(backends or [])
+
+    @staticmethod
+    def _get_backends(cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """ Return the list of backends - an empty list if
+        backends section is empty
+        """
+        backends: List[Dict[str, Any]] = cfg.get('backends', [])
+        if backends is None:
+            backends = []
+        return backends.copy()
+
+    def _drop_duplicates(self, new_backends: List[Dict[str, Any]],
+                         old_index: _BackendIndex
+                         ) -> List[Dict[str, Any]]:
+        """Return the new backends that aren't exact duplicates of the
+        old backends."""
+        new_keys: List[Hashable] = [_backend_key(b) for b in new_backends]
+        duplicates = [b for b, k in zip(new_backends, new_keys)
+                      if old_index.keys[k] > 0]
+        if not duplicates:
+            return new_backends
+
+        self._log.debug(
+            "Found %d duplicates: %s", len(duplicates),
+            repr([{'id': b.get('id', 'NO_ID_SPECIFIED'),
+                   'module': b.get('module', 'NO_MODULE_SPECIFIED')}
+                  for b in duplicates])
+        )
+        return [b for b, k in zip(new_backends, new_keys)
+                if old_index.keys[k] <= 0]
+
+    def _drop_idless_duplicates(self, old_backends: List[Dict[str, Any]],
+                                new_backends: List[Dict[str, Any]],
+                                old_index: _BackendIndex
+                                ) -> Tuple[List[Dict[str, Any]],
+                                           List[Dict[str, Any]]]:
+        """Return the old and new backends without the id-less backends
+        that match a backend with an id in the other list, retaining
+        the one with an id.
+
+        Each backend with an id drops the first remaining id-less
+        match, so the first N id-less matches are dropped for the N
+        backends with ids that they match. Only id-less entries are
+        dropped, so neither check affects the other.
+        """
+        matched: Dict[Hashable, int] = {}
+        kept: List[Dict[str, Any]] = []
+        for backend in new_backends:
+            if 'id' in backend:
+                kept.append(backend)
+                continue
+            key = _backend_key(backend)
+            old_ids = old_index.ids_by_idless_key.get(key, [])
+            count = matched.get(key, 0)
+            if count < len(old_ids):
+                self._log.debug('Dropping duplicated id-less backend for '
+                                'matching backend with id %s',
+                                repr(old_ids[count]))
+                matched[key] = count + 1
+            else:
+                kept.append(backend)
+
+        # The dropped old id-less backends are removed from the list in
+        # one pass, once they have all been found.
+        removed: Set[int] = set()
+        for backend in kept:
+            if 'id' not in backend:
+                continue
+            key = _idless_key(backend)
+            if old_index.keys[key] > 0:
+                self._log.debug('Dropping duplicated id-less backend for '
+                                'matching backend with id %s',
+                                repr(backend['id']))
+                removed.add(old_index.remove_idless(key))
+        if removed:
+            old_backends = [b for i, b in enumerate(old_backends)
+                            if i not in removed]
+            old_index.compact(sorted(removed))
+
+        return old_backends, kept
+
+    def _drop_conflicts(self, new_backends: List[Dict[str, Any]],
+                        old_index: _BackendIndex,
+                        conflicts: Optional[List[Any]]
+                        ) -> List[Dict[str, Any]]:
+        """Return the new backends whose ids don't conflict with those
+        of the old backends, adding the conflicting ids, each reported
+        once, to the conflicts list, or failing if there isn't one."""
+        conflicting_ids: List[Any] = list(dict.fromkeys(
+            b['id'] for b in new_backends
+            if 'id' in b and old_index.ids[b['id']] > 0
+        ))
+        if not conflicting_ids:
+            return new_backends
+
+        self._log.debug("Found %d conflicts for these backend ids %s",
+                        len(conflicting_ids), repr(conflicting_ids))
+        if conflicts is None:
+            raise ConflictingBackendsError("Conflicting Backend IDs",
+                                           conflicting_ids)
+        conflicts.extend(i for i in conflicting_ids if i not in conflicts)
+        return [b for b in new_backends
+                if 'id' not in b or old_index.ids[b['id']] <= 0]
+
+    def merge(self, old_cfg: Dict[str, Any], new_cfg: Dict[str, Any],
+              conflicts: Optional[List[Any]] = None) -> None:
+        """Merge the new_cfg into the old_cfg.
+
+        If a conflicts list is provided then, rather than failing, the
+        conflicting backend ids are added to it, and the conflicting
+        backends in new_cfg are dropped.
+        """
+        backends_in_old: bool = 'backends' in old_cfg
+        backends_in_new: bool = 'backends' in new_cfg
+
+        # Make lightweight copies of backends lists in old and new cfgs,
+        # retaining the old list, for indexing, as it's about to be updated.
+        merged_backends: Optional[List[Dict[str, Any]]] = \
+            old_cfg.get('backends')
+        old_backends: List[Dict[str, Any]] = self._get_backends(old_cfg)
+        new_backends: List[Dict[str, Any]] = self._get_backends(new_cfg)
+
+        # Backend templates are merged by name, with those in new_cfg
+        # superceding those in old_cfg, and backend generators combined.
+        merged_sections: Dict[str, Any] = {}
+        old_templates = old_cfg.get('backend_templates')
+        new_templates = new_cfg.get('backend_templates')
+        if isinstance(old_templates, dict) and \
+                isinstance(new_templates, dict):
+            merged_sections['backend_templates'] = {**old_templates,
+                                                    **new_templates}
+        old_generators = old_cfg.get('backend_generators')
+        new_generators = new_cfg.get('backend_generators')
+        if isinstance(old_generators, list) and \
+                isinstance(new_generators, list):
+            merged_sections['backend_generators'] = (old_generators +
+                                                     new_generators)
+
+        # Merge new config settings over existing config settings
+        old_cfg.update(new_cfg)
+        old_cfg.update(merged_sections)
+
+        # Unless both configs had a backends entry the result of the
+        # update() is the desired result.
+        if not all((backends_in_old, backends_in_new)):
+            return
+
+        old_index = self._backend_index(merged_backends)
+        new_backends = self._drop_duplicates(new_backends, old_index)
+        old_backends, new_backends = self._drop_idless_duplicates(
+            old_backends, new_backends, old_index
+        )
+        new_backends = self._drop_conflicts(new_backends, old_index,
+                                            conflicts)
+
+        # Combined lists should now contain unique entries.
+        old_index.add(new_backends)
+        old_cfg['backends'] = old_backends + new_backends
+        self._merged = (old_cfg['backends'], old_index)
+
+
+class LoadOptions:
+    """Options controlling how a ConfigManager loads the config data.
+
+    Arguments:
+        cache_file (str, optional): the path to a file in which the
+            merged config data is cached.
+
+        parse_workers (int, optional): the number of worker processes
+            used to parse the config files; defaults to a number based
+            on how many config files there are, and the available CPUs.
+
+        frozen (bool, default False): whether the loaded config data
+            should be frozen, i.e. made read-only, with validation only
+            being performed once.
+
+    Special Properties:
+        config_cache (Optional[ConfigCache]): the cache of the merged
+            config data, if a cache file was specified.
+
+        parse_workers (Optional[int]): the specified number of parse
+            worker processes, if any.
+
+        frozen (bool): whether the loaded config data is frozen.
+    """
+
+    def __init__(self, cache_file: Optional[str] = None,
+                 parse_workers: Optional[int] = None,
+                 frozen: bool = False):
+        """Initialiser for LoadOptions"""
+        self._config_cache: Optional[ConfigCache] = (
+            ConfigCache(Path(cache_file).expanduser()) if cache_file else None
+        )
+        self._parse_workers: Optional[int] = parse_workers
+        self._frozen: bool = frozen
+
+    def __repr__(self) -> str:
+        cache_file = None if self._config_cache is None \
+            else str(self._config_cache.file_path)
+        return (f"{self.__class__.__name__}(cache_file={cache_file!r}, "
+                f"parse_workers={self.parse_workers!r}, "
+                f"frozen={self.frozen!r})")
+
+    @property
+    def config_cache(self) -> Optional[ConfigCache]:
+        """The cache of the merged config data, if any."""
+        return self._config_cache
+
+    @property
+    def parse_workers(self) -> Optional[int]:
+        """The specified number of parse worker processes, if any."""
+        return self._parse_workers
+
+    @property
+    def frozen(self) -> bool:
+        """Whether the loaded config data is frozen."""
+        return self._frozen
 
 
-class ConfigManager:
+class ConfigManager:  # pylint: disable=too-many-instance-attributes
     """Configuration Management for the scc-hypervisor-collector.
 
     The ConfigManager takes the following arguments:
       * config_file (str): optional path to a YAML config file.
       * config_dir (str): optional path to a directory containing
             YAML config files
+      * options (LoadOptions): optional options controlling how the
+            config data is loaded, i.e. whether it is cached, how many
+            worker processes parse the config files, and whether it is
+            frozen; defaults to LoadOptions().
 
     If a config directory is specified then any YAML files, i.e.
     those with a '.yaml' or '.yml' extension, found directly under
@@ -41,13 +380,39 @@ class ConfigManager:
 
     When loading the configuration settings the list of config files
     is processed in order, with each file's content being merged over
-    the existing content, until all files are processed.
+    the existing content, until all files are processed. Backend
+    templates are merged by name, and backend generators are combined,
+    with the generated backends only being created when needed.
+    Backends with the same id in different config files are reported
+    as conflicts, with all of the conflicting ids being reported once
+    all of the config files have been processed.
+
+    When there are many config files, they are parsed in parallel by
+    multiple worker processes, with the parsed content still being
+    merged in the same order as when parsing them one at a time.
+
+    If a cache file is specified then the merged content is cached in
+    it, and reused, rather than parsing and merging the config files
+    again, as long as the config files are unchanged, as determined by
+    their modification times and content hashes. The permissions of the
+    config files are checked regardless, and the merged content is
+    still validated, when building the config data, on each load.
+
+    The merged content is available, before it is validated, via the
+    merged_data property, with the config file from which each of the
+    merged backends was loaded being available via the backend_sources
+    property, so that the settings can be validated in bulk, and any
+    errors reported against the files that they were found in.
     """
 
+    # the min number of config files per parse worker process
+    PARSE_FILES_PER_WORKER = 64
+
     def __init__(self, config_file: Optional[str] = None,
                  config_dir: Optional[str] = None,
                  check: bool = False,
-                 backends_required: bool = True):
+                 backends_required: bool = True,
+                 options: Optional[LoadOptions] = None):
         """Initialiser for ConfigManager"""
         self._log = logging.getLogger("config_manager")
 
@@ -69,9 +434,16 @@ class ConfigManager:
 
         self._check = check
         self._backends_required = backends_required
+        self._options: LoadOptions = (
+            LoadOptions() if options is None else options
+        )
 
         # Lazy loaded configuration data
         self._config_data: Optional[CollectorConfig] = None
+        self._merged_data: Optional[Dict[str, Any]] = None
+
+        # The config file from which each merged backend was loaded
+        self._backend_sources: List[Optional[Path]] = []
 
         # List of potential config sources
         self._config_files: List[Path] = []
@@ -125,82 +497,32 @@ class ConfigManager:
         """Check if path has the required permissions """
         check_permissions(path, ConfigFilePermissionsError)
 
-    def _remove_idless_duplicates(self, backend: Dict[str, Any],
-                                  backends: List[Dict[str, Any]]) -> None:
-        """Remove any id-less matches for backend from backends list."""
-
-        no_id_backend = backend.copy()
-        existing_id = no_id_backend.pop('id')
-        if no_id_backend in backends:
-            self._log.debug('Dropping duplicated id-less backend for matching '
-                            'backend with id %s', repr(existing_id))
-            backends.remove(no_id_backend)
-
-    @staticmethod
-    def _get_backends(cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """ Return the list of backends - an empty list if
-        backends section is empty
-        """
-        backends: List[Dict[str, Any]] = cfg.get('backends', [])
-        if backends is None:
-            backends = []
-        return backends.copy()
-
-    def _merge_config_data(self, old_cfg: Dict[str, Any],
-                           new_cfg: Dict[str, Any]) -> None:
-        """Merge the new_cfg into the old_cfg.
-
-        Handle merging backend lists appropriately; duplicates
-        should be dropped, and conflicting entries should fail.
-        """
-        backends_in_old: bool = 'backends' in old_cfg
-        backends_in_new: bool = 'backends' in new_cfg
-
-        # Make lightweight copies of backends lists in old and new cfgs
-        old_backends: List[Dict[str, Any]] = self._get_backends(old_cfg)
-        new_backends: List[Dict[str, Any]] = self._get_backends(new_cfg)
-
-        # Merge new config settings over existing config settings
-        old_cfg.update(new_cfg)
-
-        # Unless both configs had a backends entry the result of the
-        # update() is the desired result.
-        if not all((backends_in_old, backends_in_new)):
-            return
-
-        # Check for exact duplicates and remove any found
-        duplicates = [b for b in new_backends if b in old_backends]
-        if duplicates:
-            self._log.debug(
-                "Found %d duplicates: %s", len(duplicates),
-                repr([{'id': b.get('id', 'NO_ID_SPECIFIED'),
-                       'module': b.get('module', 'NO_MODULE_SPECIFIED')}
-                      for b in duplicates])
-            )
-            new_backends = [b for b in new_backends if b not in old_backends]
-
-        # Check for duplicated id-less backends entries, i.e. if there
-        # any entries in either list without an id that match an entry
-        # in the other list with an id. If so retain the one with an id.
-        for backend in old_backends:
-            if 'id' in backend:
-                self._remove_idless_duplicates(backend, new_backends)
-
-        for backend in new_backends:
-            if 'id' in backend:
-                self._remove_idless_duplicates(backend, old_backends)
-
-        # Check for conflicts and fail if any found
-        old_ids = [b['id'] for b in old_backends if 'id' in b]
-        conflicts = [b for b in new_backends if b['id'] in old_ids]
-        if conflicts:
-            self._log.debug("Found %d conflicts for these backend ids %s",
-                            len(conflicts), repr(old_ids))
-            raise ConflictingBackendsError("Conflicting Backend IDs",
-                                           old_ids)
-
-        # Combined lists should now contain unique entries.
-        old_cfg['backends'] = old_backends + new_backends
+    def _parse_config_files(self) -> Iterable[
+            Tuple[Any, Optional[List[SecretLocation]]]]:
+        """Parse the config files, returning their content, and the
+        locations of their secret settings if they are to be cached, in
+        the same order as the config files."""
+        locate_secrets = self._options.config_cache is not None
+        workers = self.parse_workers
+        if workers > 1:
+            # larger chunks reduce the overhead of passing the files to,
+            # and the parsed content back from, the worker processes,
+            # while still balancing the load across the workers.
+            chunksize = max(len(self.config_files) // (workers * 4), 1)
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    return list(executor.map(_parse_config_file,
+                                             self.config_files,
+                                             repeat(locate_secrets),
+                                             chunksize=chunksize))
+            except (NotImplementedError, OSError) as e:
+                # e.g. the platform doesn't support process pools
+                self._log.debug("Unable to parse config files in "
+                                "parallel, parsing them serially: %s", e)
+
+        # parse the config files one at a time, as they are merged
+        return map(_parse_config_file, self.config_files,
+                   repeat(locate_secrets))
 
     def _load_config(self) -> Dict:
         """Load the specified config files, if any, merging content
@@ -209,22 +531,69 @@ class ConfigManager:
             Dict: The (possibly empty) dictionary of config data.
         """
 
+        config_cache = self._options.config_cache
+        fingerprint: List[Dict[str, Any]] = []
+        if config_cache is not None:
+            fingerprint = config_cache.fingerprint(self.config_files)
+            cached = config_cache.load(fingerprint)
+            if cached and cached[0]:
+                self._backend_sources = [Path(s) if s else None
+                                         for s in cached[1]]
+                return cached[0]
+
         cfg_data: Dict[str, Any] = {}
-        for cfg_file in self.config_files:
-            file_data = yaml.safe_load(cfg_file.read_text(encoding="utf-8"))
+        conflicting_ids: List[Any] = []
+
+        # The merged backends are the parsed backend objects themselves,
+        # so the file from which each was loaded is tracked by identity;
+        # an id can only be reused by a later file's backend once the
+        # earlier backend has been dropped, and so can't be a source.
+        sources: Dict[int, Path] = {}
 
+        # likewise the secret settings, so they needn't be cached
+        secrets = SecretLocations()
+
+        # the merger's backends index is only needed while merging
+        merger = _ConfigMerger()
+        for index, (cfg_file, (file_data, file_secrets)) in enumerate(
+                zip(self.config_files, self._parse_config_files())):
             if file_data is None:
-                self._log.debug("Empty config file: %s", repr(str(cfg_file)))
+                self._log.debug("Empty config file: %s",
+                                repr(str(cfg_file)))
                 continue
 
-            # Merge new data over existing data, combining any new backends
-            # with existing backends, eliminating duplicates as needed.
-            self._merge_config_data(cfg_data, file_data)
+            if isinstance(file_data, dict) and \
+                    isinstance(file_data.get('backends'), list):
+                sources.update((id(b), cfg_file)
+                               for b in file_data['backends'])
+            secrets.add(index, file_data, file_secrets)
+
+            # Merge new data over existing data, combining any new
+            # backends with existing backends, eliminating duplicates
+            # as needed.
+            merger.merge(cfg_data, file_data, conflicting_ids)
+
+        # Report all of the conflicting backend ids together
+        if conflicting_ids:
+            raise ConflictingBackendsError("Conflicting Backend IDs",
+                                           conflicting_ids)
 
         if not cfg_data:
             raise EmptyConfigurationError("No config settings loaded!")
 
         self._log.debug("Config Files processed: %s", repr(self.config_files))
+
+        backends = cfg_data.get('backends')
+        self._backend_sources = [
+            sources.get(id(b)) for b in backends
+        ] if isinstance(backends, list) else []
+
+        if config_cache is not None:
+            config_cache.save(fingerprint, cfg_data,
+                              secrets.locate(cfg_data),
+                              [str(s) if s else None
+                               for s in self._backend_sources])
+
         return cfg_data
 
     @property
@@ -246,16 +615,59 @@ class ConfigManager:
            instantiated."""
         return self._config_dir
 
+    @property
+    def parse_workers(self) -> int:
+        """Return the number of worker processes used to parse the
+           config files."""
+        if self._options.parse_workers is not None:
+            return max(self._options.parse_workers, 1)
+
+        return max(min(os.cpu_count() or 1,
+                       len(self.config_files) //
+                       self.PARSE_FILES_PER_WORKER), 1)
+
+    @property
+    def cache_file(self) -> Optional[Path]:
+        """Return the file in which the merged config data is cached,
+           if any."""
+        if self._options.config_cache is None:
+            return None
+        return self._options.config_cache.file_path
+
+    @property
+    def merged_data(self) -> Dict[str, Any]:
+        """Return the merged content of the specified config sources,
+           before it is validated."""
+        if self._merged_data is None:
+            self._merged_data = self._load_config()
+        return self._merged_data
+
+    @property
+    def backend_sources(self) -> List[Optional[Path]]:
+        """Return the config file from which each of the merged backends
+           was loaded, if known, in the same order as the backends."""
+        if self._merged_data is None:
+            self._merged_data = self._load_config()
+        return list(self._backend_sources)
+
     @property
     def config_data(self) -> CollectorConfig:
         """Return the config_data loaded from the specifed config
            sources."""
         if self._config_data is None:
-            self._config_data = CollectorConfig(
-                self._load_config(),
+            # the backends are replaced by their BackendConfig objects, so
+            # validate a copy, leaving the merged data as it was loaded.
+            merged_data = dict(self.merged_data)
+            if isinstance(merged_data.get('backends'), list):
+                merged_data['backends'] = list(merged_data['backends'])
+            config_data = CollectorConfig(
+                merged_data,
                 _check=self._check,
                 _backends_required=self._backends_required
             )
+            if self._options.frozen:
+                config_data.freeze()
+            self._config_data = config_data
         return self._config_data
 
     @property
@@ -0,0 +1,48 @@
+"""
+SCC Hypervisor Collector Config Content.
+
+The configuration for the SCC Hypervisor Collector is managed
+as a hierarchy of dict-like mutable mapping objects which can
+be validated against a set of required fields.
+
+Additionally it is possible to specify a list of sensitive fields
+whose values should not be displayed when they are rendered as
+strings (using str()) or as a representation (using repr()).
+
+Once loaded, a config hierarchy can be frozen, making it read-only,
+with its validity being determined once, and with derived properties,
+such as the credentials, being returned as is, rather than being
+rebuilt, and re-validated, each time that they are accessed.
+
+The config classes are implemented by the following modules:
+  * general: the GeneralConfig base class
+  * backend: the BackendConfig for each backend
+  * templates: the BackendTemplate and BackendGenerator configs
+  * collector: the CollectorConfig, holding the whole configuration,
+    and the CredentialsConfig and SchedulerConfig sections
+"""
+
+from .general import GeneralConfig
+from .backend import BackendConfig
+from .templates import BackendGenerator, BackendTemplate, apply_template
+from .collector import (CollectorConfig, CredentialsConfig, SccCredsConfig,
+                        SchedulerConfig)
+
+__all__ = [
+    # general
+    'GeneralConfig',
+
+    # backend
+    'BackendConfig',
+
+    # templates
+    'BackendTemplate',
+    'BackendGenerator',
+    'apply_template',
+
+    # collector
+    'SccCredsConfig',
+    'CredentialsConfig',
+    'SchedulerConfig',
+    'CollectorConfig',
+]
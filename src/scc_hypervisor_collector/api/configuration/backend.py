@@ -0,0 +1,274 @@
+"""
+SCC Hypervisor Collector BackendConfig.
+
+The BackendConfig holds, and validates, the settings of a backend, with
+the required and sensitive settings being determined by its module.
+"""
+
+import logging
+from typing import (Any, ClassVar, Dict, List, Optional, Set, Tuple)
+
+from ..exceptions import BackendConfigError
+from ..gatherer import VHGatherer
+from .general import GeneralConfig, is_positive_number
+
+
+class BackendConfig(GeneralConfig):
+    """Hypervisor Backend specific configuration settings management.
+
+    In addition to the special properties provided by 'GeneralConfig',
+    this class also provides special 'module' and 'id' properties.
+
+    Backends can optionally specify a 'timeout' setting, the max number
+    of seconds that a query of the backend may take, which overrides
+    the scheduler's backend_timeout setting, and a 'rate_limit' setting,
+    the max number of query attempts per minute that may be made against
+    the backend, which overrides the scheduler's per-module rate_limit
+    setting.
+
+    In addition to the config_errors, the errors found in the backend
+    settings are recorded as (field, reason) pairs, available via the
+    'field_errors' property, so that they can be reported per setting.
+    If the backend can't be validated at all, e.g. because its id or
+    module isn't specified, the BackendConfigError raised identifies
+    the field, and the reason, too.
+
+    Backends can specify a 'template' setting, naming one of the backend
+    templates, whose settings are used as defaults for the backend; the
+    template is applied to the settings, by apply_template(), before the
+    backend is created.
+    """
+
+    # List known option fields for all possible backends
+    _MODULE_OPTIONAL_FIELDS: ClassVar[Dict[str, Set[str]]] = {
+        # AmazonEC2
+        "AmazonEC2": set(),
+
+        # Azure
+        "Azure": set(),
+
+        # File doesn't appear to have any sensitive fields
+        "File": set(),
+
+        # GoogleCE doesn't appear to have any sensitive fields
+        "GoogleCE": set(),
+
+        # Kubernetes doesn't appear to have any sensitive fields
+        "Kubernetes": set(),
+
+        # Libvirt
+        "Libvirt": set((
+            "sasl_username",
+            "sasl_password",
+        )),
+
+        # NutanixAHV
+        "NutanixAHV": set(),
+
+        # VMware
+        "VMware": set(),
+    }
+
+    # List known sensitive fields for all possible backends
+    _MODULE_SENSITIVE_FIELDS: ClassVar[Dict[str, Set[str]]] = {
+        # AmazonEC2
+        "AmazonEC2": set((
+            "secret_access_key",
+        )),
+
+        # Azure
+        "Azure": set((
+            "secret_key",
+        )),
+
+        # File doesn't appear to have any sensitive fields
+        "File": set(),
+
+        # GoogleCE doesn't appear to have any sensitive fields
+        "GoogleCE": set(),
+
+        # Kubernetes doesn't appear to have any sensitive fields
+        "Kubernetes": set(),
+
+        # Libvirt
+        "Libvirt": set((
+            "sasl_password",
+        )),
+
+        # NutanixAHV
+        "NutanixAHV": set((
+            "password",
+        )),
+
+        # VMware
+        "VMware": set((
+            "password",
+        )),
+    }
+
+    # the fields that may be sensitive in any backend's settings
+    SENSITIVE_FIELDS: ClassVar[Set[str]] = set().union(
+        *_MODULE_SENSITIVE_FIELDS.values()
+    )
+
+    __slots__ = ('_gatherer', '_worker_params', '_field_errors')
+
+    def __init__(self, *args: Any, **kwargs: Any):
+
+        # Each backend config gets it's own instance of VHGatherer, which
+        # share the process-wide registry of loaded gatherer modules.
+        self._gatherer: VHGatherer = VHGatherer()
+        self._check = kwargs.pop('_check', False)
+        self._config_errors = []
+        self._field_errors: List[Tuple[str, str]] = []
+        self._log = logging.getLogger(__name__ + '.BackendConfig')
+
+        # Create a dict from the provided arguments
+        combined_args = dict(*args, **kwargs)
+
+        required, sensitive = self._module_fields(combined_args)
+
+        super().__init__(_required_fields=required,
+                         _sensitive_fields=sensitive, _check=self._check,
+                         _config_errors=self._config_errors, **combined_args)
+
+        self._check_fields()
+
+    def _module_fields(self,
+                       settings: Dict[str, Any]) -> Tuple[Set[str], Set[str]]:
+        """Check the backend's id and module, determining the module's
+        worker params, and returning its required and sensitive fields."""
+        # Make the 'id' attribute for the backend required
+        backend_id = settings.get('id', None)
+        if backend_id is None:
+            msg = "Invalid backend - missing required field: id"
+            self._log.error(msg)
+            raise BackendConfigError(msg, 'id', "missing required field")
+
+        # Retrieve the module specified in the arguments, if any
+        module = settings.get('module', None)
+        if module is None:
+            msg = f"Invalid backend {settings['id']!r} - " \
+                  f"missing required field: module"
+            self._log.error(msg)
+            raise BackendConfigError(msg, 'module', "missing required field")
+
+        # Check the module is one of the available gatherer modules,
+        # using the cached module params, if any, rather than loading
+        # all of the gatherer modules.
+        if not self._gatherer.has_module(module):
+            supported_modules = self._gatherer.module_names
+            msg = f"Invalid backend {settings['id']!r} - " \
+                  f"module {module!r} is not one of the supported modules: " \
+                  f"{supported_modules!r}"
+            self._log.error(msg)
+            raise BackendConfigError(msg, 'module',
+                                     f"{module!r} is not one of the "
+                                     f"supported modules: "
+                                     f"{supported_modules!r}")
+
+        self._worker_params: Dict = self._gatherer.get_module_params(module)
+
+        # use params specified for gatherer module as required fields,
+        # excluding any optional fields.
+        required: Set[str] = set(self._worker_params.keys()).difference(
+            self._MODULE_OPTIONAL_FIELDS[module]
+        )
+
+        # use known sensitive fields associated with module name
+        sensitive: Set[str] = self._MODULE_SENSITIVE_FIELDS[module]
+
+        return required, sensitive
+
+    def _check_fields(self) -> None:
+        """Check the backend's settings, recording any errors found."""
+        # avoid building the debug messages when validating in bulk
+        if self._log.isEnabledFor(logging.DEBUG):
+            self._log.debug("Required fields: %s",
+                            repr(self.required_fields))
+            self._log.debug("Sensitive fields: %s",
+                            repr(self.sensitive_fields))
+            self._log.debug("Missing fields: %s", repr(self.missing_fields))
+
+        if not self.valid:
+            msg = f"Invalid backend {self.id!r} " \
+                  f"- missing required field: {self.missing_fields!r}"
+            self._config_errors.append(msg)
+            self._field_errors.extend(
+                (field, "missing required field")
+                for field in sorted(self.missing_fields)
+            )
+            self._log.error(msg)
+            if not self._check:
+                raise BackendConfigError(msg)
+
+        for field in ('timeout', 'rate_limit'):
+            value = self.get(field)
+            if value is not None and not is_positive_number(value):
+                msg = f"Invalid backend {self.id!r} " \
+                      f"- {field} must be a positive number, not {value!r}"
+                self._config_errors.append(msg)
+                self._field_errors.append(
+                    (field, f"must be a positive number, not {value!r}")
+                )
+                self._log.error(msg)
+                if not self._check:
+                    raise BackendConfigError(msg)
+
+    @property
+    def field_errors(self) -> List[Tuple[str, str]]:
+        """The (field, reason) pairs for the errors found in the backend
+        settings."""
+
+        return self._field_errors.copy()
+
+    @property
+    def gatherer(self) -> Optional[VHGatherer]:
+        """Read-only gatherer instance associated with backend."""
+
+        return self._gatherer
+
+    @property
+    def module(self) -> str:
+        """The backend module name."""
+
+        return self['module']
+
+    @property
+    def id(self) -> str:
+        """Read-only id of the hypervisor backend config."""
+
+        return self['id']
+
+    @property
+    def timeout(self) -> Optional[float]:
+        """The backend specific query timeout in seconds, if any."""
+
+        return self.get('timeout')
+
+    @property
+    def rate_limit(self) -> Optional[float]:
+        """The backend specific max query attempts per minute, if any."""
+
+        return self.get('rate_limit')
+
+    @property
+    def worker(self) -> Any:
+        """The virtual-host-gatherer worker associated with the
+        module specified in the config settings."""
+
+        return self._gatherer.get_worker(self.module)
+
+    def create_worker(self) -> Any:
+        """Create a new, isolated, instance of the virtual-host-gatherer
+        worker associated with the module specified in the config
+        settings."""
+
+        return self._gatherer.create_worker(self.module)
+
+    @property
+    def worker_params(self) -> Dict:
+        """The parameters supported by the worker associated with
+        the module specified in the config settings."""
+
+        return self._worker_params
@@ -0,0 +1,838 @@
+"""
+SCC Hypervisor Collector main config settings.
+
+The CollectorConfig holds the whole configuration, managing each of its
+sections using the appropriate config class, with the credentials, and
+the scheduler settings, being managed by the CredentialsConfig, and the
+SchedulerConfig, respectively.
+"""
+
+from collections.abc import Mapping
+import logging
+from typing import (Any, ClassVar, Dict, List, Optional, Sequence, Set,
+                    TypeVar)
+
+from ..exceptions import (BackendConfigError, CollectorConfigContentError,
+                          ConflictingBackendsError)
+from ..retry import Backoff, RetryPolicy
+from .backend import BackendConfig
+from .general import GeneralConfig, is_positive_number
+from .templates import BackendGenerator, BackendTemplate, apply_template
+
+
+# the type of the configs returned by freeze()
+_CollectorConfigT = TypeVar('_CollectorConfigT', bound='CollectorConfig')
+
+
+class SccCredsConfig(GeneralConfig):
+    """Hypervisor Collector SCC credentials settings.
+
+    The SCC credentials configuration settings must provide the following
+    entries:
+      * username
+      * password
+
+    Additionally the SCC credentials settings can provide a url entry that
+    specifies an alternate SCC server to be used for uploading collected
+    details.
+
+    Read-only properties are defined for each setting.
+
+    Special properties:
+        username: The SCC Account username
+        password: The SCC Account password
+
+    Optional properties:
+        url: The SCC server url to use, defaults to 'https://scc.suse.com'
+    """
+
+    __slots__ = ('_module',)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._module: Optional[Any] = None
+        self._check = kwargs.pop('_check', False)
+        self._config_errors = []
+        self._log = logging.getLogger(__name__ + '.SccCredsConfig')
+
+        required: Set[str] = set((
+            "username",
+            "password",
+        ))
+        sensitive: Set[str] = set((
+            "password",
+        ))
+
+        super().__init__(_required_fields=required,
+                         _sensitive_fields=sensitive,
+                         _check=self._check,
+                         _config_errors=self._config_errors,
+                         _children=[],
+                         *args, **kwargs)
+
+        if not self.valid:
+            msg = "Invalid scc section"
+            if self.missing_fields:
+                msg = msg + \
+                      f" - missing required fields: {self.missing_fields!r}"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+            if not self._check:
+                raise CollectorConfigContentError(msg)
+
+    @property
+    def username(self) -> str:
+        """The SCC Account Username."""
+
+        return self['username']
+
+    @property
+    def password(self) -> str:
+        """The SCC Account password."""
+
+        return self['password']
+
+    @property
+    def url(self) -> str:
+        """The SCC server url."""
+
+        return self.get('url', 'https://scc.suse.com')
+
+
+class CredentialsConfig(GeneralConfig):
+    """Hypervisor Collector credentials configuration settings.
+
+    The credentials configuration consists of the following
+    credential sections:
+      * scc
+
+    Read-only properties are defined for each credential section.
+
+    Special properties:
+        scc: The SCC credentials to use.
+    """
+
+    __slots__ = ('_module',)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+
+        self._module: Optional[Any] = None
+        self._check = kwargs.pop('_check', False)
+        self._config_errors = []
+        self._children = []
+        self._log = logging.getLogger(__name__ + '.CredentialsConfig')
+
+        required: Set[str] = set((
+            "scc",
+        ))
+        sensitive: Set[str] = set((
+            # No sensitive fields in the credentials config itself
+        ))
+
+        combined_args = {}
+        try:
+            combined_args = dict(*args, **kwargs)
+        except TypeError:
+            msg = "Missing scc section in credentials"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+            combined_args["scc"] = {}
+
+        # Ensure the SCC credentials are managed by a SCCCredsConfig object
+        scc_creds_config = SccCredsConfig(
+            combined_args["scc"], _check=self._check)
+        combined_args["scc"] = scc_creds_config
+        self._config_errors.extend(scc_creds_config.config_errors)
+        self._children.append(scc_creds_config)
+
+        super().__init__(_required_fields=required,
+                         _sensitive_fields=sensitive,
+                         _check=self._check,
+                         _config_errors=self._config_errors,
+                         _children=self._children,
+                         **combined_args)
+
+        if not self.valid:
+            msg = "Missing scc section"
+            if self.missing_fields:
+                msg = msg + \
+                      f" - missing required fields: {self.missing_fields!r}"
+            if not self._check:
+                raise CollectorConfigContentError(msg)
+
+    @property
+    def scc(self) -> SccCredsConfig:
+        """The SCC Credentials."""
+        # frozen SCC creds can't change, and have already been validated
+        if self.frozen:
+            return self['scc']
+
+        # return a lightweight copy of the SCC creds
+        return SccCredsConfig(self['scc'])
+
+
+class SchedulerConfig(GeneralConfig):
+    """Hypervisor Collector scheduler configuration settings.
+
+    The scheduler configuration settings are optional, and control how
+    the queries against the configured backends are scheduled.
+
+    Read-only properties are defined for each setting.
+
+    Optional properties:
+        workers: The maximum number of backends that will be queried
+            concurrently, defaults to 1, i.e. backends are queried
+            one at a time.
+        executor: How backend queries will be run, either 'thread'
+            (the default) to run them within the collector process,
+            or 'process' to run each query in a dedicated worker
+            process, isolating the collector from crashing queries.
+        backend_timeout: The max number of seconds that a backend query
+            may take, unless overridden by a backend's timeout setting,
+            defaults to no timeout.
+        run_timeout: The max number of seconds that querying all of the
+            backends may take, defaults to no timeout.
+        module_limits: A mapping of module names to the maximum number
+            of backends of that module type that will be queried
+            concurrently, defaults to no per-module limits, i.e. only
+            the workers setting applies.
+        rate_limit: The max number of query attempts per minute that
+            may be made against the backends of each module, shared by
+            all of the backends of that module, except for those with
+            their own rate_limit setting, defaults to no limit.
+        run_budget: The number of seconds available for querying all of
+            the backends, with those not expected to complete within it
+            being deferred to a later run, defaults to no budget.
+        retries: The max number of attempts made when querying a backend,
+            defaults to 3.
+        retry_backoff: The number of seconds to wait before the first
+            retry of a failed query, defaults to retrying immediately.
+        retry_multiplier: The factor by which the delay is increased for
+            each subsequent retry, defaults to 2.
+        retry_max_delay: The max number of seconds to wait before any
+            retry, defaults to no limit.
+        retry_jitter: The max fraction, between 0 and 1, by which each
+            retry delay is randomly varied, defaults to 0.
+        retry_max_elapsed: The max number of seconds after the first
+            attempt that a retry may be started, defaults to no limit.
+        circuit_breaker: The number of consecutive runs in which a
+            backend's query must have failed for the backend to be
+            skipped by subsequent runs, until the cooldown has passed,
+            after which a single probe attempt is made, with the backend
+            being queried normally again once a probe succeeds, defaults
+            to no circuit breaker.
+        circuit_breaker_cooldown: The number of runs that skip a backend
+            whose circuit breaker has tripped before it is probed again,
+            defaults to 1.
+        lean: Whether the raw results of each backend query are released
+            once the hypervisor details have been derived from them, with
+            the details being spilled to disk, or handed off for upload,
+            to limit memory usage, defaults to False.
+        retry_policy: The RetryPolicy determined by the retry settings.
+
+    Special Methods:
+        override(**settings): a copy of the scheduler settings with the
+            specified settings, unless None, overriding them.
+
+        default(): the default scheduler settings, frozen, and shared by
+            the frozen configs that don't specify any.
+    """
+
+    EXECUTORS: ClassVar[Sequence[str]] = ('thread', 'process')
+
+    # the frozen default settings, once created
+    _DEFAULT: ClassVar[Optional['SchedulerConfig']] = None
+
+    __slots__ = ('_module',)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._module: Optional[Any] = None
+        self._check = kwargs.pop('_check', False)
+        self._config_errors = []
+        self._log = logging.getLogger(__name__ + '.SchedulerConfig')
+
+        required: Set[str] = set((
+            # No required fields in the scheduler config
+        ))
+        sensitive: Set[str] = set((
+            # No sensitive fields in the scheduler config
+        ))
+
+        combined_args = {}
+        try:
+            combined_args = dict(*args, **kwargs)
+        except (TypeError, ValueError) as error:
+            msg = "Invalid scheduler section"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+            if not self._check:
+                raise CollectorConfigContentError(msg) from error
+
+        super().__init__(_required_fields=required,
+                         _sensitive_fields=sensitive,
+                         _check=self._check,
+                         _config_errors=self._config_errors,
+                         _children=[],
+                         **combined_args)
+
+        self._check_positive_int('workers')
+        self._check_choice('executor', self.EXECUTORS)
+        self._check_positive_number('backend_timeout')
+        self._check_positive_number('run_timeout')
+        self._check_module_limits('module_limits')
+        self._check_positive_number('rate_limit')
+        self._check_positive_number('run_budget')
+        self._check_positive_int('retries')
+        self._check_positive_number('retry_backoff')
+        self._check_positive_number('retry_multiplier')
+        self._check_positive_number('retry_max_delay')
+        self._check_fraction('retry_jitter')
+        self._check_positive_number('retry_max_elapsed')
+        self._check_positive_int('circuit_breaker')
+        self._check_positive_int('circuit_breaker_cooldown')
+        self._check_bool('lean')
+
+        if not self.valid and not self._check:
+            raise CollectorConfigContentError(self._config_errors[0])
+
+    def _check_positive_int(self, field: str) -> None:
+        """Record a config error if field is specified but isn't a
+        positive integer."""
+        value = self.get(field)
+        if value is None:
+            return
+
+        # bool is a subclass of int, but isn't a meaningful count
+        if isinstance(value, bool) or not isinstance(value, int) or \
+                value < 1:
+            msg = f"Invalid scheduler setting {field!r} - must be a " \
+                  f"positive integer, not {value!r}"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+
+    def _check_positive_number(self, field: str) -> None:
+        """Record a config error if field is specified but isn't a
+        positive number."""
+        value = self.get(field)
+        if value is None:
+            return
+
+        if not is_positive_number(value):
+            msg = f"Invalid scheduler setting {field!r} - must be a " \
+                  f"positive number, not {value!r}"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+
+    def _check_bool(self, field: str) -> None:
+        """Record a config error if field is specified but isn't a
+        boolean."""
+        value = self.get(field)
+        if value is None:
+            return
+
+        if not isinstance(value, bool):
+            msg = f"Invalid scheduler setting {field!r} - must be a " \
+                  f"boolean, not {value!r}"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+
+    def _check_fraction(self, field: str) -> None:
+        """Record a config error if field is specified but isn't a
+        number between 0 and 1."""
+        value = self.get(field)
+        if value is None:
+            return
+
+        if isinstance(value, bool) or \
+                not isinstance(value, (int, float)) or \
+                not 0 <= value <= 1:
+            msg = f"Invalid scheduler setting {field!r} - must be a " \
+                  f"number between 0 and 1, not {value!r}"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+
+    def _check_choice(self, field: str, choices: Sequence[str]) -> None:
+        """Record a config error if field is specified but isn't one of
+        the specified choices."""
+        value = self.get(field)
+        if value is None:
+            return
+
+        if value not in choices:
+            msg = f"Invalid scheduler setting {field!r} - must be one " \
+                  f"of {tuple(choices)!r}, not {value!r}"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+
+    def _check_module_limits(self, field: str) -> None:
+        """Record a config error if field is specified but isn't a
+        mapping of module names to positive integers."""
+        value = self.get(field)
+        if value is None:
+            return
+
+        if not isinstance(value, dict):
+            msg = f"Invalid scheduler setting {field!r} - must be a " \
+                  f"mapping of module names to positive integers, " \
+                  f"not {value!r}"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+            return
+
+        for module, limit in value.items():
+            if isinstance(limit, bool) or not isinstance(limit, int) or \
+                    limit < 1:
+                msg = f"Invalid scheduler setting {field!r} - limit for " \
+                      f"module {module!r} must be a positive integer, " \
+                      f"not {limit!r}"
+                self._config_errors.append(msg)
+                self._log.error(msg)
+
+    @classmethod
+    def default(cls) -> 'SchedulerConfig':
+        """Return the frozen default scheduler settings."""
+        if cls._DEFAULT is None:
+            cls._DEFAULT = cls().freeze()
+        return cls._DEFAULT
+
+    def override(self, **settings: Any) -> 'SchedulerConfig':
+        """Return a copy of the scheduler settings, with the specified
+        settings, other than those that are None, overriding them.
+
+        Raises CollectorConfigContentError if an overriding setting is
+        invalid.
+        """
+        overrides = {k: v for k, v in settings.items() if v is not None}
+        return SchedulerConfig(dict(self, **overrides))
+
+    @property
+    def workers(self) -> int:
+        """The maximum number of concurrent backend queries."""
+
+        return self.get('workers', 1)
+
+    @property
+    def executor(self) -> str:
+        """How backend queries will be run, 'thread' or 'process'."""
+
+        return self.get('executor', 'thread')
+
+    @property
+    def backend_timeout(self) -> Optional[float]:
+        """The default backend query timeout in seconds, if any."""
+
+        return self.get('backend_timeout')
+
+    @property
+    def run_timeout(self) -> Optional[float]:
+        """The timeout in seconds for querying all backends, if any."""
+
+        return self.get('run_timeout')
+
+    @property
+    def module_limits(self) -> Dict[str, int]:
+        """The maximum number of concurrent backend queries per module."""
+
+        return dict(self.get('module_limits') or {})
+
+    @property
+    def rate_limit(self) -> Optional[float]:
+        """The max query attempts per minute per module, if any."""
+
+        return self.get('rate_limit')
+
+    @property
+    def run_budget(self) -> Optional[float]:
+        """The number of seconds available for the run, if any."""
+
+        return self.get('run_budget')
+
+    @property
+    def retries(self) -> int:
+        """The max number of attempts made when querying a backend."""
+
+        return self.get('retries', 3)
+
+    @property
+    def circuit_breaker(self) -> Optional[int]:
+        """The number of consecutive failed runs after which a backend
+        is skipped, and then only probed, if any."""
+
+        return self.get('circuit_breaker')
+
+    @property
+    def circuit_breaker_cooldown(self) -> int:
+        """The number of runs that skip a backend before it is probed."""
+
+        return self.get('circuit_breaker_cooldown', 1)
+
+    @property
+    def lean(self) -> bool:
+        """Whether the raw results are released once the hypervisor
+        details have been derived from them."""
+
+        return self.get('lean', False)
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        """The policy for retrying failed backend query attempts."""
+
+        return RetryPolicy(retries=self.retries,
+                           backoff=Backoff(
+                               initial=self.get('retry_backoff', 0.0),
+                               multiplier=self.get('retry_multiplier', 2.0),
+                               max_delay=self.get('retry_max_delay'),
+                               jitter=self.get('retry_jitter', 0.0)),
+                           max_elapsed=self.get('retry_max_elapsed'))
+
+
+class _Generated:
+    """The backend generators of a CollectorConfig, and the backends that
+    they generate, once generated.
+
+    Arguments:
+        generators (List[BackendGenerator]): the backend generators.
+        backends (Optional[Sequence[BackendConfig]]): the generated
+            backends, once generated.
+        all_backends (Optional[Sequence[BackendConfig]]): the configured
+            backends, followed by the generated backends, once needed
+            by a frozen config.
+    """
+
+    __slots__ = ('generators', 'backends', 'all_backends')
+
+    def __init__(self) -> None:
+        """Initialiser for _Generated"""
+        self.generators: List[BackendGenerator] = []
+        self.backends: Optional[Sequence[BackendConfig]] = None
+        self.all_backends: Optional[Sequence[BackendConfig]] = None
+
+
+class CollectorConfig(GeneralConfig):
+    """Hypervisor Collector main confguration.
+
+    The main configuration consists of the following sections:
+      * credentials
+      * backends
+      * scheduler (optional)
+
+    Read-only properties have been defined for each configuration
+    section.
+
+    The credentials section holds the credentials needed by the
+    command, such as the SCC credentials used to upload any data
+    collected about the backends to the SCC.
+
+    The backends section holds a list of configured backends and
+    the associated backend specific settings required to run queries
+    against the specified backend.
+
+    The scheduler section holds optional settings that control how the
+    queries against the configured backends are scheduled.
+
+    The optional backend_templates section holds named sets of shared
+    backend settings, which backends and backend generators can use as
+    defaults, and the optional backend_generators section holds a list
+    of backend generators, each of which generates backends for a list
+    of hosts, or a range of numbers. The generated backends are only
+    created when the backends are first needed, unless checking the
+    config, with any whose ids conflict with those of other backends
+    being reported then.
+
+    Special properties:
+        credentials: A CredentialsConfig object holding the credentials
+            specified in the configuration.
+        backends: A list of BackendConfig objects holding the backend
+            specific settings, including any generated backends.
+        scheduler: A SchedulerConfig object holding the scheduler
+            settings, defaults being used if none were specified.
+
+    When frozen, the backends are returned as a read-only sequence, and
+    the credentials and scheduler settings are returned as is.
+    """
+
+    __slots__ = ('_module', '_backends_required', '_generated')
+
+    def __init__(self, *args: Any, **kwargs: Any):
+
+        self._module: Optional[Any] = None
+        self._check = kwargs.pop('_check', False)
+        self._backends_required = kwargs.pop('_backends_required', True)
+        self._generated: _Generated = _Generated()
+        self._config_errors = []
+        self._children = []
+        self._log = logging.getLogger(__name__ + '.CollectorConfig')
+
+        required: Set[str] = set((
+            "backends",
+            "credentials",
+        ))
+        sensitive: Set[str] = set((
+            # No sensitive fields in the top level config
+        ))
+
+        # Create a dict from the provided arguments
+        combined_args = dict(*args, **kwargs)
+
+        # Ensure the credentials are managed as a credentials object
+        self._process_credentials(combined_args)
+
+        # Ensure the backend templates, and generators, are managed as
+        # template and generator objects
+        templates = self._process_templates(combined_args)
+        self._process_generators(combined_args, templates)
+
+        # Ensure the backends are managed as backends objects
+        self._process_backends(combined_args, templates)
+
+        # Ensure the scheduler settings are managed as a scheduler object
+        self._process_scheduler(combined_args)
+
+        super().__init__(_required_fields=required,
+                         _sensitive_fields=sensitive,
+                         _check=self._check,
+                         _config_errors=self._config_errors,
+                         _children=self._children,
+                         **combined_args)
+
+        # check the generated backends now, rather than when needed
+        if self._check and self._generated.generators:
+            self._generate_backends()
+
+    def _process_credentials(self, combined_args: Dict) -> None:
+        """Process the credentials entry in the combined_args."""
+        # Ensure the credentials are managed by a credentials object
+        try:
+            creds_config = CredentialsConfig(
+                combined_args["credentials"], _check=self._check
+            )
+            combined_args["credentials"] = creds_config
+            self._config_errors.extend(creds_config.config_errors)
+            self._children.append(creds_config)
+        except (KeyError, TypeError, CollectorConfigContentError) as error:
+            if isinstance(error, KeyError):
+                msg = f"Missing {error} section"
+            else:
+                msg = f"{error}"
+            self._log.error(msg)
+            self._config_errors.append(msg)
+            if not self._check:
+                raise error
+
+    def _process_scheduler(self, combined_args: Dict) -> None:
+        """Process the optional scheduler entry in the combined_args."""
+        if "scheduler" not in combined_args:
+            return
+
+        # treat an empty scheduler section as if no settings were specified
+        scheduler_config = SchedulerConfig(
+            combined_args["scheduler"] or {}, _check=self._check
+        )
+        combined_args["scheduler"] = scheduler_config
+        self._config_errors.extend(scheduler_config.config_errors)
+        self._children.append(scheduler_config)
+
+    def _section_error(self, msg: str) -> None:
+        """Record an error in a config section, failing if not checking."""
+        self._log.error(msg)
+        self._config_errors.append(msg)
+        if not self._check:
+            raise BackendConfigError(msg)
+
+    def _process_templates(self,
+                           combined_args: Dict) -> Dict[Any, BackendTemplate]:
+        """Process the optional backend_templates entry in the
+        combined_args, returning the valid templates, by name."""
+        templates: Dict[Any, BackendTemplate] = {}
+        settings_by_name = combined_args.get("backend_templates")
+        if settings_by_name is None:
+            return templates
+
+        if not isinstance(settings_by_name, Mapping):
+            self._section_error("The backend_templates entry should be a "
+                                "mapping!")
+            return templates
+
+        for name, settings in settings_by_name.items():
+            if not isinstance(settings, Mapping):
+                self._section_error(f"Invalid backend template {name!r} - "
+                                    f"should be a mapping")
+                continue
+            template = BackendTemplate(settings, _name=name,
+                                       _check=self._check)
+            templates[name] = template
+            self._config_errors.extend(template.config_errors)
+            self._children.append(template)
+        combined_args["backend_templates"] = dict(templates)
+        return templates
+
+    def _process_generators(self, combined_args: Dict,
+                            templates: Dict[Any, BackendTemplate]) -> None:
+        """Process the optional backend_generators entry in the
+        combined_args."""
+        generators = combined_args.get("backend_generators")
+        if generators is None:
+            return
+
+        if not isinstance(generators, list):
+            self._section_error("The backend_generators entry should be a "
+                                "list!")
+            return
+
+        for i, settings in enumerate(generators):
+            if not isinstance(settings, Mapping):
+                self._section_error(f"Invalid backend generator {i} - "
+                                    f"should be a mapping")
+                continue
+            generator = BackendGenerator(settings, _templates=templates,
+                                         _check=self._check)
+            self._generated.generators.append(generator)
+            self._config_errors.extend(generator.config_errors)
+            self._children.append(generator)
+        combined_args["backend_generators"] = list(
+            self._generated.generators
+        )
+
+        # generated backends are sufficient, without any others
+        combined_args.setdefault("backends", [])
+
+    def _generate_backends(self) -> Sequence[BackendConfig]:
+        """Return the generated backends, generating them the first
+        time that they are needed."""
+        if self._generated.backends is not None:
+            return self._generated.backends
+
+        backend_ids: Set[Any] = {b['id'] for b in self.get('backends', ())
+                                 if isinstance(b, BackendConfig)}
+        generated: List[BackendConfig] = []
+        conflicting_ids: List[Any] = []
+        for generator in self._generated.generators:
+            for backend in generator.backends():
+                if backend.id in backend_ids:
+                    conflicting_ids.append(backend.id)
+                    continue
+                backend_ids.add(backend.id)
+                if self.frozen:
+                    backend.freeze()
+                generated.append(backend)
+
+        if conflicting_ids:
+            msg = f"Conflicting generated backend ids: {conflicting_ids!r}"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+            if not self._check:
+                raise ConflictingBackendsError(msg, conflicting_ids)
+
+        self._log.debug("Generated %d backends", len(generated))
+        self._generated.backends = tuple(generated)
+        return self._generated.backends
+
+    def _check_for_backends(self, combined_args: Dict) -> None:
+        """Check that configuration has a backends list"""
+        if self._backends_required:
+            backends = combined_args.get("backends")
+            if backends is None:
+                msg = "No backends specified in config!"
+                self._log.error(msg)
+                self._config_errors.append(msg)
+                if not self._check:
+                    raise BackendConfigError(msg)
+
+            if not isinstance(backends, list):
+                msg = "The backends entry should a list!"
+                self._log.error(msg)
+                self._config_errors.append(msg)
+                if not self._check:
+                    raise BackendConfigError(msg)
+
+    def _process_backends(self, combined_args: Dict,
+                          templates: Dict[Any, BackendTemplate]) -> None:
+        """Process the backends list in the combined_args."""
+
+        self._check_for_backends(combined_args)
+        try:
+            for i, b in enumerate(combined_args["backends"]):
+                try:
+                    errors = []
+                    backend_config = BackendConfig(
+                        apply_template(dict(b), templates),
+                        _check=self._check
+                    )
+                    combined_args["backends"][i] = backend_config
+                    errors.extend(backend_config.config_errors)
+                    self._children.append(backend_config)
+                except BackendConfigError as e:
+                    self._config_errors.append(str(e))
+                    if not self._check:
+                        raise e
+                self._config_errors.extend(errors)
+        except KeyError as error:
+            msg = f"Missing {error} section"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+            if not self._check:
+                raise error
+        except TypeError as error:
+            msg = "Invalid backends section"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+            if not self._check:
+                raise TypeError(msg) from error
+
+    def freeze(self: _CollectorConfigT) -> _CollectorConfigT:
+        """Freeze the config, and its children, returning the config."""
+        if not self.frozen:
+            # make the backends list read-only too
+            if isinstance(self._config.get('backends'), list):
+                self._config['backends'] = tuple(self._config['backends'])
+            super().freeze()
+        return self
+
+    @property
+    def backends(self) -> Sequence[BackendConfig]:
+        """The list of backends specified in the config.
+
+        Returns:
+            Sequence (BackendConfig): A sequence of BackendConfig objects
+        """
+        # frozen backends are already held in a read-only tuple
+        if self.frozen:
+            if not self._generated.generators:
+                return self['backends']
+            if self._generated.all_backends is None:
+                self._generated.all_backends = (
+                    self['backends'] + tuple(self._generate_backends())
+                )
+            return self._generated.all_backends
+
+        # return a lightweight copy of the backends config
+        backends: List[BackendConfig] = list(self['backends'])
+        if self._generated.generators:
+            backends.extend(self._generate_backends())
+        return backends
+
+    @property
+    def credentials(self) -> CredentialsConfig:
+        """The configured credentials.
+
+        Returns:
+            CredentialsConfig: The configured credentials.
+        """
+        # frozen credentials can't change, and have already been validated
+        if self.frozen:
+            return self['credentials']
+
+        # return a lightweight copy of the credentials config
+        return CredentialsConfig(self['credentials'])
+
+    @property
+    def scheduler(self) -> SchedulerConfig:
+        """The configured scheduler settings.
+
+        Returns:
+            SchedulerConfig: The configured, or default, scheduler settings.
+        """
+        if "scheduler" not in self:
+            if self.frozen:
+                return SchedulerConfig.default()
+            return SchedulerConfig()
+        return self['scheduler']
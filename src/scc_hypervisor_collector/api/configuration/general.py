@@ -0,0 +1,231 @@
+"""
+SCC Hypervisor Collector GeneralConfig.
+
+The GeneralConfig is the base of the config classes, storing the config
+settings, and validating them against the required fields.
+"""
+
+from collections.abc import MutableMapping
+import logging
+from typing import (Any, Dict, Iterator, List, Optional, Set, TypeVar)
+
+from ..exceptions import CollectorConfigContentError
+
+
+# the type of the configs returned by freeze()
+_ConfigT = TypeVar('_ConfigT', bound='GeneralConfig')
+
+
+def is_positive_number(value: Any) -> bool:
+    """Return True if value is a positive int or float (but not a bool)."""
+    return (not isinstance(value, bool) and
+            isinstance(value, (int, float)) and value > 0)
+
+
+# Configuration Data Helper/Wrapper Classes
+class GeneralConfig(MutableMapping):
+    """A dictionary-like object used to store config settings.
+
+    Takes additional optional arguments specifying the lists of
+    required and sensitive config fields, and provides properties
+    that can be used to check for validity, and report any fields
+    that may be missing, as well as assign new values to the
+    required and sensitive fields lists.
+
+    Special keyword arguments:
+        _required_fields (Set or List):
+            A set or list of fields that must be provided for the
+            config to be considered valid.
+
+        _sensitive_fields (Set):
+            A set or list of fields whose values should not be
+            rendered via str() or repr().
+
+        _check (bool):
+            A mode to validate the configuration. Default is false
+
+        _config_errors (List)
+            A list of configuration errors. Default is empty
+
+        _children (List)
+            A list of child objects. Default is empty
+
+    Special properties:
+        required_fields (Set):
+            The list of required fields that must be provided for
+            the config to be considered valid.
+
+        valid (bool):
+            Indicates if the provided config data is valid.
+
+        missing_fields (Set):
+            The list of required fields that have not been specified;
+            will be empty if valid is True.
+
+        sensitive_fields (Set):
+            The list of sensitive fields whose values should not be
+            rendered via str() or repr().
+
+        config_errors (List):
+            The list of errors for the given configuration.
+
+        children (List):
+            The list of child objects.
+
+        frozen (bool):
+            Indicates if the config has been frozen.
+
+    Special methods:
+        freeze():
+            Freeze the config, and its children, such that it can no
+            longer be modified, caching its validity.
+    """
+
+    __slots__ = ('_config', '_required', '_sensitive', '_check',
+                 '_config_errors', '_children', '_log', '_frozen_valid')
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        # Initialise our internal config storage as an empty dict
+        self._config: Dict = {}
+
+        # the validity of the config, determined when it was frozen, if
+        # it has been.
+        self._frozen_valid: Optional[bool] = None
+
+        # Check for a required fields specification
+        self._required: Set[str] = set(kwargs.pop('_required_fields', set()))
+
+        # Check for a sensitive fields specification
+        self._sensitive: Set[str] = set(kwargs.pop('_sensitive_fields', set()))
+
+        # the check mode is only needed here, with subclasses retaining
+        # it, in the _check slot, if they need it.
+        check: bool = kwargs.pop('_check', False)
+
+        self._config_errors: List = kwargs.pop('_config_errors', [])
+
+        self._children: List = kwargs.pop('_children', [])
+
+        self._log = logging.getLogger(__name__ + '.GeneralConfig')
+
+        try:
+            # Update the internal config storage with remaining kwargs fields
+            self.update(dict(*args, **kwargs))
+        except TypeError as type_error:
+            if not check:
+                raise type_error
+
+        # Validate content
+        if not self.valid:
+            msg = f"Invalid configuration data provided: {self!r}"
+            self._log.error(msg)
+            if not check:
+                raise CollectorConfigContentError(msg)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._config[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._check_not_frozen()
+        self._config[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        self._check_not_frozen()
+        del self._config[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._config)
+
+    def __len__(self) -> int:
+        return len(self._config)
+
+    def _check_not_frozen(self) -> None:
+        """Fail if the config has been frozen."""
+        if self.frozen:
+            raise TypeError(f"{type(self).__name__} is frozen")
+
+    def freeze(self: _ConfigT) -> _ConfigT:
+        """Freeze the config, and its children, returning the config."""
+        if not self.frozen:
+            for child in self._children:
+                child.freeze()
+            self._frozen_valid = self.valid
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        """Indicates if the config has been frozen."""
+        return self._frozen_valid is not None
+
+    @property
+    def required_fields(self) -> Set[str]:
+        """Returns a copy of the list of required fields if any.
+
+        Returns:
+            Set (str): Required fields
+        """
+        return set(self._required)
+
+    @property
+    def valid(self) -> bool:
+        """Indicates whether the provided config is valid, i.e
+        contains all the required fields.
+
+        Returns:
+            bool: True if all the required fields have been provided
+        """
+        if self._frozen_valid is not None:
+            return self._frozen_valid
+
+        children_valid = all(c.valid for c in self._children)
+
+        req_fields_found = all(r in self._config for r in self.required_fields)
+
+        return all([req_fields_found, children_valid,
+                    len(self._config_errors) == 0])
+
+    @property
+    def missing_fields(self) -> Set[str]:
+        """The list of missing fields; will be empty if config is valid.
+
+        Returns:
+            Set (str): Set of fields that haven't been provided
+        """
+        return set({r for r in self._required if r not in self._config})
+
+    @property
+    def sensitive_fields(self) -> Set[str]:
+        """Returns a copy of the set of sensitive fields if any.
+
+        Returns:
+            Set (str): Sensitive fields
+        """
+        return set(self._sensitive)
+
+    @property
+    def config_errors(self) -> List[str]:
+        """Return the list of identified config errors"""
+        return self._config_errors.copy()
+
+    @property
+    def children(self) -> List[str]:
+        """Return the list of children"""
+        return self._children.copy()
+
+    @property
+    def logger(self) -> logging.Logger:
+        """Return the logger object"""
+        return self._log
+
+    def _sanitized_config(self) -> Dict:
+        cfg = dict(self._config)
+        for s in self._sensitive:
+            if s in cfg:
+                cfg[s] = "********"
+        return cfg
+
+    def __str__(self) -> str:
+        return str(self._sanitized_config())
+
+    def __repr__(self) -> str:
+        return repr(self._sanitized_config())
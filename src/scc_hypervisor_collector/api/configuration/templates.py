@@ -0,0 +1,276 @@
+"""
+SCC Hypervisor Collector backend templates and generators.
+
+Backend templates are named sets of shared backend settings, which
+backends, and backend generators, use as defaults for their settings,
+while backend generators generate backends with the same settings for
+each of a list of hosts, or a range of numbers.
+"""
+
+import functools
+import logging
+import re
+from collections.abc import Mapping
+from typing import (Any, ClassVar, Dict, Iterator, Optional, Set, Tuple)
+
+from ..exceptions import BackendConfigError
+from ..gatherer import VHGatherer
+from .backend import BackendConfig
+from .general import GeneralConfig
+
+
+# the placeholders that backend generators substitute in string settings
+_PLACEHOLDER = re.compile(r'\{(host|index)(?::([^{}]*))?\}')
+
+
+def _substitute(variables: Mapping[str, Any], match: Any) -> str:
+    """Return the formatted value of the matched placeholder."""
+    return format(variables[match.group(1)], match.group(2) or '')
+
+
+def apply_template(settings: Dict[str, Any],
+                   templates: Mapping) -> Dict[str, Any]:
+    """Return the backend settings with the settings of the template
+    that they name, if any, as defaults."""
+    if 'template' not in settings:
+        return settings
+
+    settings = dict(settings)
+    name = settings.pop('template')
+    if name not in templates:
+        msg = f"Invalid backend {settings.get('id')!r} - " \
+              f"template {name!r} is not one of the backend templates: " \
+              f"{sorted(templates)!r}"
+        logging.getLogger(__name__ + '.BackendTemplate').error(msg)
+        raise BackendConfigError(msg, 'template',
+                                 f"{name!r} is not one of the backend "
+                                 f"templates: {sorted(templates)!r}")
+
+    return {**templates[name], **settings}
+
+
+class BackendTemplate(GeneralConfig):
+    """Shared backend settings, referenced by name by backends, and by
+    backend generators, which use them as defaults for their settings.
+
+    A template can't specify a backend id, and if it specifies a module
+    that must be one of the gatherer modules; the template is validated
+    once, when loaded, rather than for each backend that uses it.
+
+    Special properties:
+        name: The name of the template.
+    """
+
+    __slots__ = ('_name',)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._name: str = kwargs.pop('_name')
+        self._check = kwargs.pop('_check', False)
+        self._config_errors = []
+        self._log = logging.getLogger(__name__ + '.BackendTemplate')
+
+        # Create a dict from the provided arguments
+        combined_args = dict(*args, **kwargs)
+
+        # the module isn't known until the template is used, so treat
+        # any field that is sensitive for any module as sensitive.
+        super().__init__(_required_fields=set(),
+                         _sensitive_fields=BackendConfig.SENSITIVE_FIELDS,
+                         _check=self._check,
+                         _config_errors=self._config_errors,
+                         _children=[],
+                         **combined_args)
+
+        msg: Optional[str] = None
+        if 'id' in self:
+            msg = f"Invalid backend template {self._name!r} - " \
+                  f"templates can't specify an id"
+        elif 'module' in self and \
+                not VHGatherer().has_module(self['module']):
+            msg = f"Invalid backend template {self._name!r} - " \
+                  f"module {self['module']!r} is not one of the supported " \
+                  f"modules: {VHGatherer().module_names!r}"
+        if msg is not None:
+            self._config_errors.append(msg)
+            self._log.error(msg)
+            if not self._check:
+                raise BackendConfigError(msg)
+
+    @property
+    def name(self) -> str:
+        """The name of the template."""
+
+        return self._name
+
+
+class GeneratedBackendConfig(BackendConfig):
+    """A backend generated by a backend generator, which reuses the
+    validation of a previously validated backend, the prototype, for the
+    same module, with the same settings fields, e.g. the first backend
+    generated by the same generator.
+
+    Special keyword arguments:
+        _prototype (BackendConfig):
+            The backend whose validation is reused, if it has the same
+            module, and settings fields, otherwise the generated backend
+            is validated as for any other backend.
+    """
+
+    __slots__ = ('_prototype',)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._prototype: Optional[BackendConfig] = kwargs.pop('_prototype')
+        super().__init__(*args, **kwargs)
+
+    def _module_fields(self,
+                       settings: Dict[str, Any]) -> Tuple[Set[str], Set[str]]:
+        prototype = self._prototype
+        if prototype is None or \
+                prototype.module != settings.get('module') or \
+                prototype.keys() != settings.keys():
+            self._prototype = None
+            return super()._module_fields(settings)
+
+        self._worker_params = prototype.worker_params
+        return prototype.required_fields, prototype.sensitive_fields
+
+    def _check_fields(self) -> None:
+        if self._prototype is None:
+            super()._check_fields()
+            return
+
+        self._config_errors.extend(self._prototype.config_errors)
+        self._field_errors.extend(self._prototype.field_errors)
+
+
+class BackendGenerator(GeneralConfig):
+    """Generates backends with the same settings for each of a list of
+    hosts, or a range of numbers.
+
+    A backend generator must specify either a 'hosts' list, or a 'range'
+    of numbers, with 'start' and 'stop' settings, and an optional 'step'
+    setting, interpreted as for Python's range(). It can optionally
+    specify a 'template', whose settings are used as defaults, and any
+    other backend settings, including an 'id', which defaults to
+    '{host}'.
+
+    In each generated backend, the '{host}' and '{index}' placeholders
+    in the string settings are replaced by the host, and its position
+    in the hosts list, or, for a range, by the number, optionally using
+    a format spec, e.g. '{index:03d}'.
+
+    The generated backends are only created when needed, and as they
+    all have the same settings fields, and module, only the first of
+    them is validated, with that validation being reused for the rest.
+
+    Special keyword arguments:
+        _templates (Mapping):
+            The backend templates, by name, that the generator may use.
+
+    Special methods:
+        backends():
+            Generate the backends, as BackendConfig objects.
+    """
+
+    # the settings that control how backends are generated
+    _GENERATOR_FIELDS: ClassVar[Set[str]] = set(("template", "hosts",
+                                                 "range"))
+
+    __slots__ = ('_templates', '_prototype')
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._templates: Mapping = kwargs.pop('_templates', {})
+        self._prototype: Optional[BackendConfig] = None
+        self._check = kwargs.pop('_check', False)
+        self._config_errors = []
+        self._log = logging.getLogger(__name__ + '.BackendGenerator')
+
+        # Create a dict from the provided arguments
+        combined_args = dict(*args, **kwargs)
+
+        super().__init__(_required_fields=set(),
+                         _sensitive_fields=BackendConfig.SENSITIVE_FIELDS,
+                         _check=self._check,
+                         _config_errors=self._config_errors,
+                         _children=[],
+                         **combined_args)
+
+        msg = self._check_generator()
+        if msg is None:
+            # validate the first generated backend only
+            try:
+                first = next(self._settings(), None)
+                if first is not None:
+                    self._prototype = BackendConfig(first, _check=True)
+                    if self._prototype.config_errors:
+                        msg = self._prototype.config_errors[0]
+            except (BackendConfigError, TypeError, ValueError) as error:
+                msg = str(error)
+
+        if msg is not None:
+            self._prototype = None
+            msg = f"Invalid backend generator " \
+                  f"{self.get('id', '{host}')!r} - {msg}"
+            self._config_errors.append(msg)
+            self._log.error(msg)
+            if not self._check:
+                raise BackendConfigError(msg)
+
+    def _check_generator(self) -> Optional[str]:
+        """Return why the generator settings are invalid, if they are."""
+        if ('hosts' in self) == ('range' in self):
+            return "exactly one of hosts or range must be specified"
+
+        if 'hosts' in self and not isinstance(self['hosts'], list):
+            return "hosts should be a list"
+
+        if 'range' in self:
+            bounds = self['range']
+            if not isinstance(bounds, Mapping) or \
+                    not {'start', 'stop'}.issubset(bounds) or \
+                    not all(isinstance(v, int) and not isinstance(v, bool)
+                            for v in bounds.values()) or \
+                    bounds.get('step', 1) == 0:
+                return "range should specify integer start and stop " \
+                       "settings, and optionally a non-zero step"
+
+        template = self.get('template')
+        if template is not None and template not in self._templates:
+            return f"template {template!r} is not one of the backend " \
+                   f"templates: {sorted(self._templates)!r}"
+
+        return None
+
+    def _variables(self) -> Iterator[Dict[str, Any]]:
+        """Generate the placeholder values for each generated backend."""
+        if 'hosts' in self:
+            for index, host in enumerate(self['hosts']):
+                yield dict(host=host, index=index)
+        else:
+            bounds = self['range']
+            for number in range(bounds['start'], bounds['stop'],
+                                bounds.get('step', 1)):
+                yield dict(host=number, index=number)
+
+    def _settings(self) -> Iterator[Dict[str, Any]]:
+        """Generate the settings for each generated backend."""
+        common: Dict[str, Any] = dict(id='{host}')
+        if 'template' in self:
+            common.update(self._templates[self['template']])
+        common.update((k, v) for k, v in self.items()
+                      if k not in self._GENERATOR_FIELDS)
+
+        for variables in self._variables():
+            substitute = functools.partial(_substitute, variables)
+            yield {k: _PLACEHOLDER.sub(substitute, v)
+                   if isinstance(v, str) else v
+                   for k, v in common.items()}
+
+    def backends(self) -> Iterator[BackendConfig]:
+        """Generate the backends, reusing the validation of the first."""
+        if self._prototype is None:
+            return
+
+        for settings in self._settings():
+            yield GeneratedBackendConfig(settings, _check=self._check,
+                                         _prototype=self._prototype)
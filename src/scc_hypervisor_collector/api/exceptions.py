@@ -40,7 +40,7 @@ class ConflictingBackendsError(ConfigManagerException):
     """Conflicting backends specified in config.
 
     Additional Arguments:
-        backend_ids (list): the config file (if any) specified
+        backend_ids (list): the conflicting backend ids
     """
 
     @property
@@ -90,7 +90,26 @@ class CollectorConfigContentError(CollectorConfigurationException):
 
 
 class BackendConfigError(CollectorConfigurationException):
-    """Backend config error."""
+    """Backend config error.
+
+    Additional Arguments:
+        field (str): the backend setting that is in error, if any
+        reason (str): why that setting is in error, if known
+    """
+
+    @property
+    def field(self) -> Any:
+        """Retrieves the field argument."""
+        return self._get_arg(1)
+
+    @property
+    def reason(self) -> Any:
+        """Retrieves the reason argument."""
+        return self._get_arg(2)
+
+    def __str__(self) -> str:
+        # the field and reason are already described by the message
+        return str(self._get_arg(0, ''))
 
 
 # gatherer errors
@@ -103,6 +122,14 @@ class HypervisorCollectorException(CollectorException):
     """Base exception class for hypervisor_collector exceptions."""
 
 
+class HypervisorCollectorTimeout(HypervisorCollectorException):
+    """Hypervisor backend query didn't complete in time."""
+
+
+class HypervisorDetailsReleased(HypervisorCollectorException):
+    """Hypervisor details were released once they were handed off."""
+
+
 # scheduler errors
 class CollectionResultsException(CollectorException):
     """Base exception class for results exceptions."""
@@ -112,6 +139,10 @@ class CollectionResultsInvalidData(CollectionResultsException):
     """Invalid results provided for upload."""
 
 
+class CollectionResultsFormatError(CollectionResultsException):
+    """Unsupported results file format specified."""
+
+
 class CollectionSchedulerException(CollectorException):
     """Base exception class for scheduler exceptions."""
 
@@ -140,3 +171,7 @@ class ConfigFilePermissionsError(FilePermissionsError):
 
 class ResultsFilePermissionsError(FilePermissionsError):
     """Invalid config file permissions."""
+
+
+class HistoryFilePermissionsError(FilePermissionsError):
+    """Invalid collection history file permissions."""
@@ -3,43 +3,484 @@ SCC Hypervisor Collector VHGatherer.
 
 The VHGather is a wrapper class for managing virtual-host-gatherer
 integration.
+
+The virtual-host-gatherer worker modules are loaded, at most once per
+process, into a shared ModuleRegistry, which is used by all VHGatherer
+instances. By default only the worker modules that are actually used
+are loaded, avoiding the cost of importing the SDKs needed by others.
+
+The module parameters can also be cached on disk, keyed by the installed
+virtual-host-gatherer version, so that configs can be validated without
+importing the worker modules that they don't use.
 """
 
-from typing import (Any, cast, Dict, Optional, Sequence)
+import importlib
+import json
+import logging
+from pathlib import Path
+import pkgutil
+import threading
+from typing import (Any, Dict, Optional, Sequence, Set, Tuple)
 
+from importlib_metadata import version as get_package_version
+import gatherer.modules
 from gatherer.gatherer import Gatherer
 
+from .exceptions import CollectorException
+from .util import check_permissions, create_private_file, plain_data
 
-class VHGatherer:
-    """Wrapper class for the Virtual Host Gatherer."""
 
-    def __init__(self) -> None:
+def gatherer_version() -> Optional[str]:
+    """Return the installed virtual-host-gatherer version, if known."""
+    try:
+        return str(get_package_version('virtual-host-gatherer'))
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+class _ModuleCache:
+    """The cached parameters of the available gatherer modules.
+
+    The cache is keyed by the installed virtual-host-gatherer version,
+    and only records the modules that are available, as a module that
+    isn't available may become so once its dependencies are installed,
+    without the virtual-host-gatherer version changing. The cache is
+    advisory; if it cannot be read, or written, it is ignored.
+
+    Arguments:
+        file_path (Path): the file in which the module parameters are
+            cached.
+    """
+
+    # bump if the cache file layout changes incompatibly
+    VERSION = 2
+
+    def __init__(self, file_path: Path) -> None:
+        self._log = logging.getLogger(__name__)
+        self._file_path: Path = file_path
+
+        # the cached params per module, loaded on demand
+        self._cache: Optional[Dict[str, Any]] = None
+
+    def _empty(self) -> Dict[str, Any]:
+        """Return an empty cache for the installed gatherer version."""
+        return dict(version=self.VERSION,
+                    gatherer_version=gatherer_version(), modules={})
+
+    def _read(self) -> Dict[str, Any]:
+        """Read the cache file, returning an empty cache if it doesn't
+        exist, can't be used, or is for a different gatherer version."""
+        cache = self._empty()
+        if cache['gatherer_version'] is None or \
+                not self._file_path.exists():
+            return cache
+
+        try:
+            # validate the file permissions before reading from it
+            check_permissions(self._file_path)
+            with self._file_path.open("r", encoding="utf-8") as fp:
+                cached = json.load(fp)
+        except (CollectorException, OSError, ValueError) as e:
+            self._log.warning("Ignoring unusable gatherer module cache %s: "
+                              "%s", self._file_path, e)
+            return cache
+
+        if not isinstance(cached, dict) or \
+                cached.get('version') != self.VERSION or \
+                not isinstance(cached.get('modules'), dict) or \
+                not all(isinstance(p, dict)
+                        for p in cached['modules'].values()):
+            self._log.warning("Ignoring invalid gatherer module cache %s",
+                              self._file_path)
+            return cache
+
+        if cached.get('gatherer_version') != cache['gatherer_version']:
+            self._log.debug("Ignoring gatherer module cache %s for "
+                            "virtual-host-gatherer %s", self._file_path,
+                            cached.get('gatherer_version'))
+            return cache
+
+        return cached
+
+    def _write(self) -> None:
+        """Write the cache file, ignoring any failures."""
+        try:
+            # create the containing directory, and the cache file, such
+            # that only the user has access.
+            create_private_file(self._file_path)
 
-        self._gatherer: Gatherer = Gatherer()
-        self._module_params: Optional[Dict[str, Dict]] = None
+            with self._file_path.open("w", encoding="utf-8") as fp:
+                json.dump(self._cache, fp, indent=2, sort_keys=True)
+        except OSError as e:
+            self._log.warning("Failed to save gatherer module cache %s: %s",
+                              self._file_path, e)
+
+    def _modules(self) -> Optional[Dict[str, Dict]]:
+        """The cached params per module, reading the cache if needed, or
+        None if the cache can't be keyed by version."""
+        if self._cache is None:
+            self._cache = self._read()
+
+        if self._cache['gatherer_version'] is None:
+            return None
+
+        return self._cache['modules']
+
+    def get(self, module_name: str) -> Optional[Dict]:
+        """The cached parameters for the named module, if any."""
+        modules = self._modules()
+        return None if modules is None else modules.get(module_name)
+
+    def update(self, module_params: Dict[str, Dict]) -> None:
+        """Cache the parameters of the specified available modules,
+        writing the cache file if they weren't already cached."""
+        modules = self._modules()
+        if modules is None:
+            return
+
+        params = {n: plain_data(p) for n, p in module_params.items()}
+        if all(modules.get(n) == p for n, p in params.items()):
+            return
+
+        modules.update(params)
+        self._write()
+
+    def discard(self, module_name: str) -> None:
+        """Remove the named module's params, if cached, writing the
+        cache file if they were."""
+        modules = self._modules()
+        if modules is None or module_name not in modules:
+            return
+
+        del modules[module_name]
+        self._write()
+
+    def reset(self) -> None:
+        """Discard the cached params, such that they will be read again
+        when next needed."""
+        self._cache = None
 
     @property
-    def gatherer(self) -> Gatherer:
-        """Read-only gatherer instance."""
-        return self._gatherer
+    def file_path(self) -> Path:
+        """The file in which the module parameters are cached."""
+        return self._file_path
+
+
+class ModuleRegistry:
+    """Thread-safe registry of the virtual-host-gatherer worker modules.
+
+    The worker modules are loaded, using Gatherer.list_modules(), the
+    first time that they are needed, with the module parameters and
+    workers being reused thereafter.
+
+    In lazy mode, the default, individual worker modules are imported
+    the first time that a worker of that module is requested, so that
+    only the modules actually used are imported. All of the modules are
+    still loaded, using Gatherer.list_modules(), if the full set of
+    modules is needed, e.g. to report the supported modules, or if a
+    module cannot be loaded on its own.
 
-    def _load_modules(self) -> None:
+    If a cache file is specified, the parameters of each available
+    module are recorded in it. The cached parameters are used in
+    preference to loading all of the modules, as long as the installed
+    virtual-host-gatherer version is unchanged, so that only the worker
+    modules that are actually used need to be imported. Each of those is
+    still imported once, to check that it remains available, as its
+    dependencies may have been uninstalled, in which case its cached
+    parameters are dropped. Modules that aren't available aren't cached,
+    as they may become available once their dependencies are installed,
+    so they are checked again by each run. The cache is advisory; if it
+    cannot be read, or written, it is ignored.
+
+    Arguments:
+        lazy (bool, default True): whether to import individual worker
+            modules on demand.
+
+        cache_file (Path, optional): the file in which the module
+            parameters are cached; if not specified no cache is used.
+
+    Special Methods:
+        get_worker(module_name): the worker for the named module, if
+            available.
+
+        get_module_params(module_name): the parameters for the named
+            module, or an empty dict if not available.
+
+        has_module(module_name): whether the named module is available.
+
+        use_cache(cache_file): use the specified cache file, or no cache
+            if None, from now on.
+
+        reset(): discard the loaded modules, such that they will be
+            loaded again when next needed; intended for use by tests.
+
+    Special Properties:
+        lazy (bool): whether individual worker modules are imported on
+            demand.
+
+        loaded_modules (Set[str]): the names of the worker modules that
+            have been loaded so far.
+
+        module_names (Sequence[str]): the names of the available modules.
+
+        cache_file (Optional[Path]): the file in which the module
+            parameters are cached, if any.
+
+        gatherer (Gatherer): the gatherer used to load the modules.
+
+        module_params (Dict[str, Dict]): the parameters for all of the
+            available modules.
+
+        workers (Dict[str, Any]): the workers for all of the available
+            modules.
+    """
+
+    def __init__(self, lazy: bool = True,
+                 cache_file: Optional[Path] = None) -> None:
+        self._log = logging.getLogger(__name__)
+
+        # re-entrant as lazy loading may fall back to loading all modules
+        self._lock = threading.RLock()
+        self._lazy: bool = lazy
+        # the gatherer, module params and workers, once all are loaded
+        self._loaded: Optional[Tuple[Gatherer, Dict[str, Dict],
+                                     Dict[str, Any]]] = None
+
+        # lazily loaded (worker, params) per module, None if unavailable
+        self._available: Optional[Set[str]] = None
+        self._lazy_workers: Dict[str, Optional[Tuple[Any, Dict]]] = {}
+
+        # the cached params of the available modules, if any
+        self._cache: Optional[_ModuleCache] = \
+            None if cache_file is None else _ModuleCache(cache_file)
+
+    def _load_modules(self) -> Tuple[Gatherer, Dict[str, Dict],
+                                     Dict[str, Any]]:
         """Call Gatherer.list_modules() to trigger loading worker
-        modules if not already done."""
-        if self._module_params is None:
-            self._module_params = self.gatherer.list_modules()
+        modules if not already done, returning the gatherer, and the
+        params and workers of all of the modules."""
+        if self._loaded is not None:
+            return self._loaded
+
+        with self._lock:
+            # another thread may have loaded them while we waited
+            if self._loaded is None:
+                vh_gatherer = Gatherer()
+                module_params = vh_gatherer.list_modules()
+
+                # only publish the gatherer once everything is loaded
+                self._loaded = (vh_gatherer, module_params,
+                                dict(vh_gatherer.modules))
+
+            return self._loaded
+
+    def _import_worker(self, module_name: str) -> Optional[Tuple[Any, Dict]]:
+        """Import the named worker module on its own, returning the worker
+        and its parameters, or None if no such valid module exists."""
+        if self._available is None:
+            self._available = {
+                m.name for m in pkgutil.iter_modules(gatherer.modules.__path__)
+            }
+
+        if module_name not in self._available:
+            return None
+
+        module = importlib.import_module(
+            f"{gatherer.modules.__name__}.{module_name}"
+        )
+
+        # the gatherer marks modules whose dependencies are missing invalid
+        if not getattr(module, 'IS_VALID', True):
+            self._log.warning("Gatherer module %s is not available",
+                              repr(module_name))
+            return None
+
+        worker = getattr(module, module_name)()
+        return (worker, worker.parameters())
+
+    def _lazy_load(self, module_name: str) -> Optional[Tuple[Any, Dict]]:
+        """Return the lazily loaded worker and parameters for the named
+        module, or None if not available."""
+        with self._lock:
+            if module_name not in self._lazy_workers:
+                try:
+                    self._lazy_workers[module_name] = \
+                        self._import_worker(module_name)
+                except Exception:  # pylint: disable=broad-except
+                    # the gatherer modules aren't laid out as expected, so
+                    # fall back to loading them all via the gatherer.
+                    self._log.debug("Unable to load gatherer module %s on "
+                                    "its own, loading all modules",
+                                    repr(module_name), exc_info=True)
+                    self._lazy = False
+                    return None
+
+                self._log.debug("Loaded gatherer module %s",
+                                repr(module_name))
+
+            return self._lazy_workers[module_name]
+
+    def get_worker(self, module_name: str) -> Optional[Any]:
+        """The worker for the named module, if available."""
+        if self._lazy and self._loaded is None:
+            loaded = self._lazy_load(module_name)
+            if self._lazy:
+                return None if loaded is None else loaded[0]
+
+        return self.workers.get(module_name, None)
+
+    def _load_params(self, module_name: str) -> Optional[Dict]:
+        """Load the parameters for the named module, returning None if
+        the module is not available."""
+        if self._lazy and self._loaded is None:
+            loaded = self._lazy_load(module_name)
+            if self._lazy:
+                return None if loaded is None else loaded[1]
+
+        return self.module_params.get(module_name, None)
+
+    def _module_entry(self, module_name: str) -> Optional[Dict]:
+        """The parameters for the named module, or None if not available,
+        preferring the cached parameters, if any."""
+        with self._lock:
+            if self._cache is not None:
+                cached = self._cache.get(module_name)
+                if cached is not None:
+                    # the module's dependencies may have been uninstalled
+                    # without the gatherer version changing
+                    if self.get_worker(module_name) is not None:
+                        return cached
+
+                    self._log.warning("Gatherer module %s is no longer "
+                                      "available, dropping its cached "
+                                      "parameters", repr(module_name))
+                    self._cache.discard(module_name)
+                    return None
+
+            # unavailable modules aren't cached, so are checked each run
+            params = self._load_params(module_name)
+            if params is not None and self._cache is not None:
+                self._cache.update({module_name: params})
+
+            return params
+
+    def get_module_params(self, module_name: str) -> Dict:
+        """The parameters for the named module, if available."""
+        params = self._module_entry(module_name)
+        return {} if params is None else params
+
+    def has_module(self, module_name: str) -> bool:
+        """Whether the named module is available."""
+        return self._module_entry(module_name) is not None
+
+    def use_cache(self, cache_file: Optional[Path]) -> None:
+        """Use the specified module parameters cache file, if any."""
+        with self._lock:
+            self._cache = \
+                None if cache_file is None else _ModuleCache(cache_file)
+
+    def reset(self) -> None:
+        """Discard the loaded modules."""
+        with self._lock:
+            self._loaded = None
+            self._available = None
+            self._lazy_workers = {}
+            if self._cache is not None:
+                self._cache.reset()
+
+    @property
+    def cache_file(self) -> Optional[Path]:
+        """The file in which module parameters are cached, if any."""
+        return None if self._cache is None else self._cache.file_path
+
+    @property
+    def module_names(self) -> Sequence[str]:
+        """The names of the available modules."""
+        with self._lock:
+            # which modules are available can only be determined by
+            # loading them all
+            module_params = self.module_params
+            if self._cache is not None:
+                self._cache.update(module_params)
+
+            return tuple(module_params.keys())
+
+    @property
+    def lazy(self) -> bool:
+        """Whether individual worker modules are imported on demand."""
+        return self._lazy
+
+    @property
+    def loaded_modules(self) -> Set[str]:
+        """The names of the worker modules loaded so far."""
+        if self._loaded is not None:
+            return set(self.workers)
+
+        return {n for n, w in self._lazy_workers.items() if w is not None}
+
+    @property
+    def gatherer(self) -> Gatherer:
+        """The gatherer used to load the modules."""
+        return self._load_modules()[0]
 
     @property
     def module_params(self) -> Dict[str, Dict]:
         """Paramaters for all available modules."""
-        self._load_modules()
+        return self._load_modules()[1]
+
+    @property
+    def workers(self) -> Dict[str, Any]:
+        """Workers for all available modules."""
+        return self._load_modules()[2]
+
+
+# The registry shared by all VHGatherer instances in this process
+_MODULE_REGISTRY = ModuleRegistry()
+
+
+def module_registry() -> ModuleRegistry:
+    """Return the process-wide module registry."""
+    return _MODULE_REGISTRY
 
-        return cast(Dict[str, Dict], self._module_params)
+
+def reset_module_registry() -> None:
+    """Reset the process-wide module registry."""
+    _MODULE_REGISTRY.reset()
+
+
+class VHGatherer:
+    """Wrapper class for the Virtual Host Gatherer.
+
+    Arguments:
+        registry (ModuleRegistry, optional): the module registry to use,
+            defaults to the process-wide module registry.
+    """
+
+    def __init__(self, registry: Optional[ModuleRegistry] = None) -> None:
+
+        if registry is None:
+            registry = module_registry()
+        self._registry: ModuleRegistry = registry
+
+    @property
+    def registry(self) -> ModuleRegistry:
+        """Read-only module registry instance."""
+        return self._registry
+
+    @property
+    def gatherer(self) -> Gatherer:
+        """Read-only gatherer instance."""
+        return self._registry.gatherer
+
+    @property
+    def module_params(self) -> Dict[str, Dict]:
+        """Paramaters for all available modules."""
+        return self._registry.module_params
 
     @property
     def module_names(self) -> Sequence[str]:
         """The names of the available modules."""
-        return tuple(self.module_params.keys())
+        return self._registry.module_names
 
     def get_module_params(self, module_name: str) -> Dict:
         """Retrieve paramaters for specified module.
@@ -51,7 +492,18 @@ class VHGatherer:
             Dict: A dictionary of parameters associated with the specified
                 module.
         """
-        return self.module_params.get(module_name, {})
+        return self._registry.get_module_params(module_name)
+
+    def has_module(self, module_name: str) -> bool:
+        """Check whether the specified module is available.
+
+        Args:
+            module_name (str): The name of the module to lookup.
+
+        Returns:
+            bool: True if the module is available, otherwise False.
+        """
+        return self._registry.has_module(module_name)
 
     def get_worker(self, module_name: str) -> Optional[Any]:
         """Retrieve worker associated with specified module name, if any.
@@ -62,6 +514,25 @@ class VHGatherer:
         Returns:
             Optional[Any]: The found module, or None if no match was found.
         """
-        self._load_modules()
+        return self._registry.get_worker(module_name)
+
+    def create_worker(self, module_name: str) -> Optional[Any]:
+        """Create a new worker instance for specified module name, if any.
+
+        Workers hold the settings of the node that they will query, so
+        a dedicated worker instance should be used for each backend if
+        multiple backends, possibly of the same module type, may be
+        queried concurrently.
+
+        Args:
+            module_name (str): The name of the module to lookup.
+
+        Returns:
+            Optional[Any]: A new instance of the worker class associated
+                with the specified module, or None if no match was found.
+        """
+        worker = self.get_worker(module_name)
+        if worker is None:
+            return None
 
-        return self.gatherer.modules.get(module_name, None)
+        return type(worker)()
@@ -0,0 +1,262 @@
+"""
+SCC Hypervisor Collector CollectionHistory
+
+The CollectionHistory records how long each backend query took, and
+whether it succeeded, across collection runs, so that the scheduler can
+use that history to plan subsequent runs, e.g. starting the queries
+that are expected to take the longest first.
+"""
+
+import json
+import logging
+import math
+from pathlib import Path
+import time
+from typing import (Any, Dict, Optional)
+
+from .exceptions import HistoryFilePermissionsError
+from .hypervisor_collector import HypervisorCollector
+from .util import check_permissions, create_private_file
+
+
+class CollectionHistory:
+    """Manage the history of backend queries across collection runs.
+
+    The history is maintained per backend id, tracking a smoothed
+    estimate of the query duration, along with the outcome of the most
+    recent query and the number of consecutive failed queries.
+
+    Arguments:
+        file_path (Path, optional): the file in which the history is
+            stored; if not specified the history is only maintained
+            in memory.
+
+    Special Methods:
+        load(): load the history from the file, if it exists. Invalid
+            history content, or backend entries, are ignored, as the
+            history is advisory.
+
+        save(): save the history to the file, creating the containing
+            state directory if needed.
+
+        record(hv_collector): update the history for the backend with
+            the outcome of the collector's query. Queries that were never
+            started, or were cut short by the run's deadline, aren't
+            counted as consecutive failed queries.
+
+        record_deferred(hv_collector): record that the collector's query
+            was deferred to a later run.
+
+        record_skipped(hv_collector): record that the collector's query
+            was skipped by the run as its circuit breaker has tripped.
+
+        expected_duration(backend_id, module=None): the expected query
+            duration, in seconds, for the specified backend, if known.
+
+        consecutive_failures(backend_id): the number of consecutive
+            failed queries for the specified backend.
+
+        was_deferred(backend_id): whether the most recent query of the
+            specified backend was deferred to a later run.
+
+        circuit_state(backend_id, threshold, cooldown): the state of the
+            circuit breaker for the specified backend, 'closed' if it
+            should be queried normally, 'open' if it should be skipped,
+            or 'half-open' if it should be probed with a single attempt.
+
+    Special Properties:
+        file_path (Optional[Path]): the file in which the history is
+            stored, if any.
+
+        entries (Dict[str, Dict]): a copy of the history entries, keyed
+            by backend id.
+    """
+
+    # bump if the history file layout changes incompatibly
+    VERSION = 1
+
+    # weight given to the latest duration when updating the estimate
+    SMOOTHING = 0.5
+
+    def __init__(self, file_path: Optional[Path] = None):
+        """Initialiser for CollectionHistory"""
+        self._log = logging.getLogger(__name__)
+        self._file_path: Optional[Path] = file_path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def file_path(self) -> Optional[Path]:
+        """The file in which the history is stored, if any."""
+        return self._file_path
+
+    @property
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """A copy of the history entries, keyed by backend id."""
+        return {k: dict(v) for k, v in self._entries.items()}
+
+    def load(self) -> None:
+        """Load the history from the file, if it exists."""
+        if self._file_path is None or not self._file_path.exists():
+            return
+
+        # validate the file permissions before reading from it
+        check_permissions(self._file_path,
+                          fail_exc=HistoryFilePermissionsError)
+
+        try:
+            with self._file_path.open("r", encoding="utf-8") as fp:
+                history = json.load(fp)
+        except (OSError, ValueError) as e:
+            self._log.warning("Ignoring unreadable collection history %s: "
+                              "%s", self._file_path, e)
+            return
+
+        # Perform some basic validity checking on the history content
+        if not isinstance(history, dict) or \
+                history.get('version') != self.VERSION or \
+                not isinstance(history.get('backends'), dict):
+            self._log.warning("Ignoring invalid collection history %s",
+                              self._file_path)
+            return
+
+        # Ignore any invalid backend entries, keeping the valid ones
+        self._entries = {}
+        for backend_id, entry in history['backends'].items():
+            if not self._valid_entry(entry):
+                self._log.warning("Ignoring invalid collection history "
+                                  "entry for backend %s in %s",
+                                  repr(backend_id), self._file_path)
+                continue
+            self._entries[backend_id] = entry
+        self._log.debug("Loaded history for %d backends from %s",
+                        len(self._entries), self._file_path)
+
+    def save(self) -> None:
+        """Save the history to the file, if one was specified."""
+        if self._file_path is None:
+            return
+
+        # create the state directory, and the history file, if they
+        # don't already exist, such that only the user has access.
+        create_private_file(self._file_path)
+
+        with self._file_path.open("w", encoding="utf-8") as fp:
+            json.dump(dict(version=self.VERSION, backends=self._entries),
+                      fp, indent=2, sort_keys=True)
+
+        # validate the file permissions after writing to it
+        check_permissions(self._file_path,
+                          fail_exc=HistoryFilePermissionsError)
+
+    @staticmethod
+    def _valid_entry(entry: Any) -> bool:
+        """Return True if the history entry is valid, i.e. a dict whose
+        duration, if any, is a non-negative number, and whose consecutive
+        failures and skipped runs, if any, are non-negative integers."""
+        if not isinstance(entry, dict):
+            return False
+
+        duration = entry.get('duration')
+        if duration is not None and \
+                (isinstance(duration, bool) or
+                 not isinstance(duration, (int, float)) or
+                 not math.isfinite(duration) or duration < 0):
+            return False
+
+        for field in ('consecutive_failures', 'skipped_runs'):
+            count = entry.get(field, 0)
+            if isinstance(count, bool) or not isinstance(count, int) or \
+                    count < 0:
+                return False
+
+        return True
+
+    def _entry(self, hv_collector: HypervisorCollector) -> Dict[str, Any]:
+        """The history entry for the collector's backend, replacing any
+        recorded for a different module."""
+        backend = hv_collector.backend
+        entry = self._entries.get(backend.id)
+        if entry is None or entry.get('module') != backend.module:
+            entry = dict(module=backend.module, consecutive_failures=0)
+            self._entries[backend.id] = entry
+        return entry
+
+    def record(self, hv_collector: HypervisorCollector) -> None:
+        """Update the history with the outcome of the collector's query."""
+        backend = hv_collector.backend
+        entry = self._entry(hv_collector)
+
+        # queries that were never started don't tell us anything about
+        # how long the backend takes to query.
+        duration = hv_collector.duration
+        if duration is not None:
+            estimate = entry.get('duration')
+            if estimate is None:
+                estimate = duration
+            else:
+                estimate += self.SMOOTHING * (duration - estimate)
+            entry['duration'] = estimate
+            entry['last_duration'] = duration
+
+        if hv_collector.succeeded:
+            entry['status'] = 'success'
+            entry['consecutive_failures'] = 0
+        else:
+            entry['status'] = 'failure'
+            # queries that were never started, or were cut short by the
+            # run's deadline, don't indicate that the backend is failing.
+            if duration is not None and not hv_collector.deadline_exceeded:
+                entry['consecutive_failures'] = \
+                    entry.get('consecutive_failures', 0) + 1
+        entry['last_run'] = time.time()
+        entry['deferred'] = False
+        entry['skipped_runs'] = 0
+
+        self._log.debug("Backend %s, module %s, history: %s",
+                        repr(backend.id), repr(backend.module), repr(entry))
+
+    def record_deferred(self, hv_collector: HypervisorCollector) -> None:
+        """Record that the collector's query was deferred."""
+        self._entry(hv_collector)['deferred'] = True
+
+    def record_skipped(self, hv_collector: HypervisorCollector) -> None:
+        """Record that the collector's query was skipped."""
+        entry = self._entry(hv_collector)
+        entry['skipped_runs'] = entry.get('skipped_runs', 0) + 1
+
+    def expected_duration(self, backend_id: str,
+                          module: Optional[str] = None) -> Optional[float]:
+        """The expected query duration for the backend, if known.
+
+        If module is specified then history recorded for a backend
+        with the same id but a different module is ignored.
+        """
+        entry = self._entries.get(backend_id)
+        if entry is None or (module is not None and
+                             entry.get('module') != module):
+            return None
+        return entry.get('duration')
+
+    def consecutive_failures(self, backend_id: str) -> int:
+        """The number of consecutive failed queries for the backend."""
+        entry = self._entries.get(backend_id, {})
+        return entry.get('consecutive_failures', 0)
+
+    def was_deferred(self, backend_id: str) -> bool:
+        """Whether the last query of the backend was deferred."""
+        entry = self._entries.get(backend_id, {})
+        return bool(entry.get('deferred', False))
+
+    def circuit_state(self, backend_id: str, threshold: Optional[int],
+                      cooldown: int) -> str:
+        """The state of the circuit breaker for the backend, which trips
+        once the threshold number of consecutive queries, if specified,
+        have failed, after which the backend is skipped by the cooldown
+        number of runs before being probed."""
+        entry = self._entries.get(backend_id, {})
+        if threshold is None or \
+                entry.get('consecutive_failures', 0) < threshold:
+            return 'closed'
+        if entry.get('skipped_runs', 0) < cooldown:
+            return 'open'
+        return 'half-open'
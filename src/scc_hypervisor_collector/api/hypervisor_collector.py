@@ -17,9 +17,25 @@ Other potential backends, at the time of writing this, are:
   * NutanixAHV
 """
 
+import json
 import logging
-from typing import (cast, Dict, Optional, Sequence, Union)
+import multiprocessing
+from multiprocessing.connection import Connection
+import os
+from pathlib import Path
+import resource
+import signal
+import threading
+import time
+from typing import (Any, cast, ClassVar, Dict, Iterator, Optional,
+                    Sequence, Union)
 from .configuration import BackendConfig
+from .exceptions import (HypervisorCollectorTimeout,
+                         HypervisorDetailsReleased)
+from .hypervisor_hosts import HypervisorHosts
+from .limits import RateLimiter
+from .retry import RetryPolicy
+from .util import plain_data
 
 
 class HypervisorDetails:
@@ -28,58 +44,269 @@ class HypervisorDetails:
     This class is used to hold the hypervisor details that have
     been collected by the hypervisor collector.
 
+    When created from a HypervisorCollector the details are derived
+    from the collector's results when first needed, and held using the
+    compact HypervisorHosts representation, from which the details of
+    each hypervisor host are generated, via hosts(), as they are needed,
+    so that the full details dict is only built if explicitly requested,
+    e.g. for vCenters with tens of thousands of VMs.
+
+    To limit memory usage the details can be spilled to a file, from
+    which they are read back, host by host, when needed, or released
+    once they have been handed off, e.g. uploaded.
+
+    Special Methods:
+        hosts(): Generate the details of each hypervisor host in turn.
+
+        spill(file_path): Write the details to the file, one host per
+            line, reading them back from it when they are needed.
+
+        release(): Release the details, which are no longer available.
+
     Special Properties:
         details: The hypervisor details.
         backend: The hypervisor backend.
+        valid: Whether the details were successfully collected.
+        hypervisor_hosts: The compact representation of the details, if
+            derived from a HypervisorCollector's results.
+        spill_file: The file to which the details were spilled, if any.
+        released: Whether the details have been released.
     """
     def __init__(self, hv_input: Union[Dict, 'HypervisorCollector']):
+        self._hv: Optional[HypervisorCollector] = None
+        self._details: Optional[Dict] = None
+        self._hosts: Optional[HypervisorHosts] = None
+        self._spill_file: Optional[Path] = None
+        self._released: bool = False
         if isinstance(hv_input, Dict):
-            backend = hv_input['backend']
-            details = hv_input['details']
+            self._backend: str = hv_input['backend']
+            self._details = hv_input['details']
+            self._valid: bool = hv_input.get('valid', True)
         elif isinstance(hv_input, HypervisorCollector):
-            backend = hv_input.backend.id
-            details = self._generate_hv_details(hv_input)
-        self._backend: str = backend
-        self._details: Dict = details
+            # run the query, if not already run, so that its outcome
+            # is known, deferring the derivation of the details.
+            hv_input.run()
+            self._hv = hv_input
+            self._backend = hv_input.backend.id
+            self._valid = hv_input.succeeded
 
     @staticmethod
-    def _generate_hv_details(hv: 'HypervisorCollector') -> Dict:
-        return {
-            "virtualization_hosts": [{
-                "identifier": i['hostIdentifier'],
-                "group_name": hv.backend.id,
-                "properties": {
-                    "name": i['name'],
-                    "arch": i['cpuArch'],
-                    # cast these values as integers with int()
-                    # to avoid issues seem when trying to
-                    # yaml.safe_dump() them for VMware backends.
-                    "cores": int(i['totalCpuCores']),
-                    "sockets": int(i['totalCpuSockets']),
-                    "threads": int(i['totalCpuThreads']),
-                    "ram_mb": i.get('ramMb'),
-                    "type": i['type']
-                },
-                "systems": [{
-                    "uuid": u,
-                    "properties": dict(
-                        [("vm_name", v)] +
-                        list(i['optionalVmData'][v].items())
-                    )
-                } for v, u in i['vms'].items()],
-            } for h, i in hv.results.items()]
-        }
+    def _read_hosts(file_path: Path) -> Iterator[Dict]:
+        """Generate the details of each of the hypervisor hosts spilled
+        to the file."""
+        with file_path.open("r", encoding="utf-8") as fp:
+            for line in fp:
+                yield json.loads(line)
+
+    def _check_released(self) -> None:
+        """Fail if the details have been released."""
+        if self._released:
+            raise HypervisorDetailsReleased(
+                f"Details for backend {self._backend!r} have been released"
+            )
+
+    def hosts(self) -> Iterator[Dict]:
+        """Generate the details of each hypervisor host in turn."""
+        self._check_released()
+        if self._spill_file is not None:
+            return self._read_hosts(self._spill_file)
+
+        hv_hosts = self.hypervisor_hosts
+        if hv_hosts is not None:
+            return iter(hv_hosts)
+
+        return iter(cast(Dict, self._details).get('virtualization_hosts', []))
+
+    def spill(self, file_path: Path) -> None:
+        """Write the details to the file, one host per line, reading
+        them back from it, rather than keeping them, when needed."""
+        # create the spill file, such that only the user has access
+        if not file_path.exists():
+            file_path.touch(mode=0o600)
+        else:
+            file_path.chmod(mode=0o600)
+
+        with file_path.open("w", encoding="utf-8") as fp:
+            for host in self.hosts():
+                fp.write(json.dumps(host))
+                fp.write("\n")
+
+        self._spill_file = file_path
+        self._hv = None
+        self._hosts = None
+        self._details = None
+
+    def release(self) -> None:
+        """Release the details, e.g. once they have been uploaded."""
+        self._released = True
+        self._hv = None
+        self._hosts = None
+        self._details = None
 
     @property
     def backend(self) -> str:
         """Return the associated backend name."""
         return self._backend
 
+    @property
+    def hypervisor_hosts(self) -> Optional[HypervisorHosts]:
+        """Return the compact representation of the details, if derived
+        from a HypervisorCollector's results."""
+        self._check_released()
+        if self._hosts is None and self._hv is not None:
+            self._hosts = HypervisorHosts.from_results(self._backend,
+                                                       self._hv.results)
+            # the collector's results are no longer needed
+            self._hv = None
+        return self._hosts
+
     @property
     def details(self) -> Dict:
         """Return details about the hypervisor and it's VMs."""
+        self._check_released()
+        if self._spill_file is not None or self._details is None:
+            return {"virtualization_hosts": list(self.hosts())}
         return self._details
 
+    @property
+    def valid(self) -> bool:
+        """Return True if the details were successfully collected."""
+        return self._valid
+
+    @property
+    def spill_file(self) -> Optional[Path]:
+        """Return the file to which the details were spilled, if any."""
+        return self._spill_file
+
+    @property
+    def released(self) -> bool:
+        """Return True if the details have been released."""
+        return self._released
+
+
+class QueryOptions:
+    """Options controlling how a HypervisorCollector queries its backend.
+
+    Arguments:
+        isolated (bool, default False): if True the backend query will
+            be run in a dedicated, freshly spawned, worker process, with
+            the results being returned as plain data, such that a
+            crashing backend query cannot take down the calling process.
+            A worker process that doesn't complete before the query's
+            deadline, or the default isolated query timeout if there is
+            none, is killed.
+
+        timeout (float, optional): the max number of seconds that the
+            backend query, including any retries, may take. A query that
+            hasn't completed by then is marked as failed and abandoned,
+            or if it is running in a dedicated worker process, killed.
+
+        rate_limiter (RateLimiter, optional): the limiter that each query
+            attempt must acquire before it is made, delaying the query,
+            or its retries, as needed to stay within the rate limit. The
+            limiter may be shared with other collectors, limiting their
+            combined query attempts, e.g. against a shared endpoint.
+            For an isolated query the shared limiter is acquired before
+            the worker process is started, with retries being spaced out
+            at the limiter's rate by the worker process.
+
+        retry_policy (RetryPolicy, optional): the policy determining how
+            failed query attempts are retried. Defaults to retrying
+            immediately, for up to 3 attempts.
+
+    Special Properties:
+        isolated (bool): indicates if the backend query will be run in a
+            dedicated worker process.
+
+        timeout (Optional[float]): the specified query timeout, if any.
+
+        rate_limiter (Optional[RateLimiter]): the specified rate limiter,
+            if any.
+
+        rate_limit (Optional[float]): the max query attempts per minute
+            permitted by the rate limiter, if any.
+
+        retry_policy (RetryPolicy): the policy for retrying failed query
+            attempts.
+    """
+
+    def __init__(self, isolated: bool = False,
+                 timeout: Optional[float] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
+        """Initialiser for QueryOptions"""
+        self._isolated: bool = isolated
+        self._timeout: Optional[float] = timeout
+        self._rate_limiter: Optional[RateLimiter] = rate_limiter
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self._retry_policy: RetryPolicy = retry_policy
+
+    def __repr__(self) -> str:
+        return (f"{self.__class__.__name__}(isolated={self.isolated!r}, "
+                f"timeout={self.timeout!r}, "
+                f"rate_limit={self.rate_limit!r}, "
+                f"retry_policy={self.retry_policy!r})")
+
+    @property
+    def isolated(self) -> bool:
+        """Return True if queries will be run in a worker process"""
+        return self._isolated
+
+    @property
+    def timeout(self) -> Optional[float]:
+        """Return the specified query timeout, if any"""
+        return self._timeout
+
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        """Return the specified rate limiter, if any"""
+        return self._rate_limiter
+
+    @property
+    def rate_limit(self) -> Optional[float]:
+        """Return the max query attempts per minute, if any"""
+        if self._rate_limiter is None:
+            return None
+        return self._rate_limiter.rate
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        """Return the policy for retrying failed query attempts"""
+        return self._retry_policy
+
+
+class _QueryState:
+    """The state of a HypervisorCollector's backend query.
+
+    Arguments:
+        status (str): the query status, 'pending', 'success' or
+            'failure'.
+        deadline (Optional[float]): the time.monotonic() value by which
+            the query must complete, if any.
+        external_deadline (bool): whether the deadline is the one that
+            the query was run with, rather than that of its own timeout.
+        timed_out (bool): whether the query failed by timing out.
+        duration (Optional[float]): the number of seconds the query took,
+            if it was run.
+        usage (Optional[Dict]): the worker process resource usage for an
+            isolated query, if available.
+        released (bool): whether the query results have been released.
+    """
+
+    __slots__ = ('status', 'deadline', 'external_deadline', 'timed_out',
+                 'duration', 'usage', 'released')
+
+    def __init__(self) -> None:
+        """Initialiser for _QueryState"""
+        self.status: str = 'pending'
+        self.deadline: Optional[float] = None
+        self.external_deadline: bool = False
+        self.timed_out: bool = False
+        self.duration: Optional[float] = None
+        self.usage: Optional[Dict] = None
+        self.released: bool = False
+
 
 class HypervisorCollector:
     """Hypervisor Collector for scc-hypervisor-collector
@@ -93,63 +320,181 @@ class HypervisorCollector:
 
         retries (int, default 3): the max number of retries to be
             attempted when querying the backend hypervisor before
-            raising a HypervisorCollectorRetriesExhausted exception.
+            raising a HypervisorCollectorRetriesExhausted exception,
+            unless query options are specified.
+
+        options (QueryOptions, optional): the options controlling how
+            the backend is queried, with their retry policy overriding
+            the specified retries. Defaults to querying the backend in
+            the calling process, without a timeout or rate limit,
+            retrying immediately up to the specified retries.
 
     Special Methods:
-        run(): runs the backend query if not already run, retrying
-            up to the specified max retries if needed.
+        run(deadline=None): runs the backend query if not already run,
+            retrying up to the specified max retries if needed. If a
+            deadline, as a time.monotonic() value, is specified then the
+            query must complete before then, as well as within the
+            specified timeout.
+
+        release_results(spill_file=None): derives the hypervisor details
+            from the results, spilling them to the specified file, if
+            any, and releases the results, which are no longer needed.
 
     Special Properties:
         backend (BackendConfig): the backend specified as argument
             when the HypervisorCollector was instantiated.
 
+        options (QueryOptions): the options controlling how the backend
+            is queried.
+
+        worker (Any): the virtual-host-gatherer worker instance that
+            is dedicated to querying the specified backend, ensuring
+            that concurrent queries of backends using the same module
+            cannot interfere with each other's node settings.
+
         results (Dict): the results from querying the specified
-            backend using the virtual-host-gatherer.
+            backend using the virtual-host-gatherer; empty once they
+            have been released.
+
+        released (bool): indicates if the results have been released.
 
         hosts (List): the list of hypervisor hosts for which entries
             can be found in the results.
 
         details (Dict): summary details extracted from the results.
 
+        hypervisor_details (HypervisorDetails): the summary details
+            extracted from the results, wrapped as a HypervisorDetails.
+
         pending (bool): indicates if the collection of results still pending
 
         succeeded (bool): indicates if the results have been successfully
             collected
 
         failed (bool): indicates if the results collection had a failure
+
+        usage (Optional[Dict]): the CPU time (cpu_time, in seconds) and
+            peak RSS (max_rss_kb, in KiB) of the worker process used to
+            run an isolated backend query, if available.
+
+        timed_out (bool): indicates if the results collection failed
+            because the query didn't complete in time.
+
+        deadline_exceeded (bool): indicates if the results collection
+            failed because the query didn't complete before the deadline
+            that it was run with, rather than within its own timeout.
+
+        duration (Optional[float]): the number of seconds that the backend
+            query took, if it was run.
     """
 
-    def __init__(self, backend: BackendConfig, retries: int = 3):
+    # isolated queries are run in spawned worker processes, rather than
+    # forked ones, as forking while other threads, e.g. those of the
+    # scheduler, hold locks, such as the logging locks, can deadlock
+    # the worker process.
+    PROCESS_START_METHOD: ClassVar[str] = 'spawn'
+
+    # the max seconds an isolated query may take if it has no deadline
+    ISOLATED_QUERY_TIMEOUT: ClassVar[float] = 3600.0
+
+    def __init__(self, backend: BackendConfig, retries: int = 3,
+                 options: Optional[QueryOptions] = None):
         """Initialiser for HypervisorCollector"""
         self._log = logging.getLogger(__name__)
 
-        self._log.debug("backend=%s, retries=%d", repr(backend), retries)
+        self._log.debug("backend=%s, retries=%d, options=%s", repr(backend),
+                        retries, repr(options))
 
         # save the parameters
         self._backend: BackendConfig = backend
 
         # ensure queries will be retried at least once, even if retries <= 0
-        self._retries: int = max(retries, 1)
+        if options is None:
+            options = QueryOptions(retry_policy=RetryPolicy(retries=retries))
+        self._options: QueryOptions = options
+
+        # the query status, deadline, duration and resource usage
+        self._state = _QueryState()
 
         # Lazy loaded attributes
+        self._worker: Optional[Any] = None
         self._results: Optional[Dict] = None
         self._details: Optional[HypervisorDetails] = None
 
-        self._status = 'pending'
-
     @property
     def backend(self) -> BackendConfig:
         """Return the associated backend config."""
         return self._backend
 
+    @property
+    def options(self) -> QueryOptions:
+        """Return the options controlling how the backend is queried."""
+        return self._options
+
     @property
     def retries(self) -> int:
         """Return the specified retry count."""
-        return self._retries
+        return self._options.retry_policy.retries
+
+    @property
+    def worker(self) -> Any:
+        """Return the worker dedicated to querying the backend."""
+        if self._worker is None:
+            self._worker = self.backend.create_worker()
+        return self._worker
 
     def _worker_run(self) -> Optional[Dict]:
         """Return results or running worker.run()"""
-        return self.backend.worker.run()
+        return self.worker.run()
+
+    def _remaining(self) -> Optional[float]:
+        """Return the seconds remaining until the deadline, if any."""
+        if self._state.deadline is None:
+            return None
+        return max(self._state.deadline - time.monotonic(), 0.0)
+
+    def _worker_run_until_deadline(self) -> Optional[Dict]:
+        """Return results of running _worker_run(), abandoning it if it
+        doesn't complete before the deadline, if any."""
+        remaining = self._remaining()
+        if remaining is None:
+            return self._worker_run()
+
+        if remaining <= 0:
+            raise HypervisorCollectorTimeout("Query deadline passed")
+
+        # run the worker in a daemon thread that can be abandoned, and
+        # won't block process exit, if it hangs.
+        outcome: Dict[str, Any] = {}
+
+        def worker_run() -> None:
+            try:
+                outcome['results'] = self._worker_run()
+            except Exception as e:  # pylint: disable=broad-except
+                outcome['error'] = e
+
+        thread = threading.Thread(target=worker_run, daemon=True,
+                                  name=f"{self.backend.module}-worker-"
+                                       f"{self.backend.id}")
+        thread.start()
+        thread.join(remaining)
+
+        if thread.is_alive():
+            raise HypervisorCollectorTimeout("Query deadline passed")
+
+        if 'error' in outcome:
+            raise outcome['error']
+
+        return outcome['results']
+
+    def _timed_out_failure(self, action: str) -> Dict:
+        """Record that the query failed due to it timing out."""
+        self._state.status = 'failure'
+        self._state.timed_out = True
+        self._log.error("Backend %s, module %s, query timed out, %s",
+                        repr(self.backend.id), repr(self.backend.module),
+                        action)
+        return {}
 
     def _query_backend(self) -> Dict:
         """Query the specified backend to obtained required data.
@@ -157,31 +502,81 @@ class HypervisorCollector:
         Returns:
             Dict: The dictionary of retrieved data.
         """
+        # the gatherer module may no longer be available, e.g. if its
+        # dependencies were uninstalled after the config was validated
+        if self.worker is None:
+            self._state.status = 'failure'
+            self._log.error("Backend %s, module %s, query not started as "
+                            "the gatherer module is not available",
+                            repr(self.backend.id), repr(self.backend.module))
+            return {}
+
         # specify the backend settings to use when running the query.
-        self.backend.worker.set_node(self.backend)
+        self.worker.set_node(self.backend)
 
         # retry for at most specified retry count, breaking out if
-        # non-empty results returned for specified backend.
+        # non-empty results returned for specified backend, or if the
+        # retry policy doesn't permit any further retries.
+        retry_policy = self._options.retry_policy
+        rate_limiter = self._options.rate_limiter
+        results: Optional[Dict] = None
+        started = time.monotonic()
         attempt = 0
-        while attempt < self.retries:
+        while attempt < retry_policy.retries:
+            if attempt:
+                delay = retry_policy.delay(attempt)
+                if not retry_policy.permits(
+                    time.monotonic() - started + delay
+                ):
+                    self._log.debug("Backend %s, module %s, retry time "
+                                    "limit reached", repr(self.backend.id),
+                                    repr(self.backend.module))
+                    break
+
+                remaining = self._remaining()
+                if remaining is not None and delay >= remaining:
+                    return self._timed_out_failure(
+                        f"next retry would start after the deadline, "
+                        f"after {attempt} attempts"
+                    )
+
+                if delay > 0:
+                    self._log.debug("Backend %s, module %s, retrying in "
+                                    "%.1fs", repr(self.backend.id),
+                                    repr(self.backend.module), delay)
+                    time.sleep(delay)
+
+            # wait until the rate limit permits another attempt
+            if rate_limiter is not None and \
+                    not rate_limiter.acquire(self._state.deadline):
+                return self._timed_out_failure(
+                    f"rate limit prevents another attempt before the "
+                    f"deadline after {attempt} attempts"
+                )
+
             attempt += 1
 
             # results are a dictionary on success or None if an error
             # occurred, such as a connection failure/network timeout
-            results: Optional[Dict] = self._worker_run()
+            try:
+                results = self._worker_run_until_deadline()
+            except HypervisorCollectorTimeout:
+                return self._timed_out_failure(
+                    f"abandoning it after {attempt} attempts"
+                )
 
             # If we got a valid result for the backend then break out
             # of the retry loop.
             if results is not None:
-                self._status = 'success'
+                self._state.status = 'success'
                 break
 
             self._log.debug("Backend %s, module %s, attempt %d failed",
                             repr(self.backend.id), repr(self.backend.module),
                             attempt)
 
-        else:
-            self._status = 'failure'
+        if results is None:
+            self._state.status = 'failure'
             results = {}
             self._log.error("Backend %s, module %s, query failed after "
                             "%d attempts", repr(self.backend.id),
@@ -193,11 +588,136 @@ class HypervisorCollector:
 
         return results
 
-    def run(self) -> None:
+    def _query_backend_isolated(self) -> Dict:
+        """Query the specified backend in a dedicated worker process.
+
+        Returns:
+            Dict: The dictionary of retrieved data.
+        """
+        # wait until the rate limit permits the query to be started, as
+        # the worker process can't share the limiter.
+        rate_limiter = self._options.rate_limiter
+        if rate_limiter is not None and \
+                not rate_limiter.acquire(self._state.deadline):
+            return self._timed_out_failure(
+                "rate limit prevents the query starting before the deadline"
+            )
+
+        ctx = multiprocessing.get_context(self.PROCESS_START_METHOD)
+        recv_conn, send_conn = ctx.Pipe(duplex=False)
+
+        # pass the backend settings as plain data so that a new backend
+        # config, and associated worker, will be setup in the process,
+        # loading the worker from the backend's gatherer module.
+        process = ctx.Process(target=_isolated_query,
+                              args=(send_conn, dict(self.backend),
+                                    self._options.retry_policy,
+                                    self._options.rate_limit),
+                              name=f"HypervisorCollector-{self.backend.id}",
+                              daemon=True)
+        process.start()
+
+        # close our copy of the sending end so that we will see EOF if
+        # the worker process exits without sending an outcome.
+        send_conn.close()
+
+        # a hung worker process must not block the calling thread forever
+        remaining = self._remaining()
+        if remaining is None:
+            remaining = self.ISOLATED_QUERY_TIMEOUT
+
+        ready = False
+        outcome: Optional[Dict] = None
+        try:
+            ready = recv_conn.poll(remaining)
+            if ready:
+                outcome = recv_conn.recv()
+        except EOFError:
+            pass
+        finally:
+            recv_conn.close()
+            # the worker process exits once it has sent its outcome, or
+            # crashed, so is only still running if it hung, or waiting
+            # for it was interrupted.
+            process.join(5 if ready else 0)
+            if process.is_alive():
+                self._kill_process(process)
+
+        if not ready:
+            return self._timed_out_failure("killed query process")
+
+        if outcome is None:
+            self._state.status = 'failure'
+            self._log.error("Backend %s, module %s, query process exited "
+                            "unexpectedly with exit code %s",
+                            repr(self.backend.id), repr(self.backend.module),
+                            process.exitcode)
+            return {}
+
+        self._state.status = outcome['status']
+        self._state.usage = usage = outcome['usage']
+        self._log.info("Backend %s, module %s, query process used "
+                       "%.2fs CPU time, peak RSS %d KiB",
+                       repr(self.backend.id), repr(self.backend.module),
+                       usage['cpu_time'], usage['max_rss_kb'])
+
+        return outcome['results']
+
+    def _kill_process(self, process: multiprocessing.process.BaseProcess
+                      ) -> None:
+        """Kill a hung query worker process."""
+        self._log.debug("Backend %s, module %s, killing query process %s",
+                        repr(self.backend.id), repr(self.backend.module),
+                        process.pid)
+        process.terminate()
+        process.join(1)
+        if process.is_alive() and process.pid is not None:
+            os.kill(process.pid, signal.SIGKILL)
+
+    def run(self, deadline: Optional[float] = None) -> None:
         """Run the backend query if not already run."""
         if self._results is None and self.pending:
+            # Determine the effective deadline for the query, if any
+            self._state.external_deadline = deadline is not None
+            timeout = self._options.timeout
+            if timeout is not None:
+                timeout_deadline = time.monotonic() + timeout
+                if deadline is None or timeout_deadline < deadline:
+                    deadline = timeout_deadline
+                    self._state.external_deadline = False
+            self._state.deadline = deadline
+
+            # Don't start a query if the deadline has already passed
+            if self._remaining() == 0:
+                self._state.status = 'failure'
+                self._state.timed_out = True
+                self._results = {}
+                self._log.error("Backend %s, module %s, query not started "
+                                "as the deadline has passed",
+                                repr(self.backend.id),
+                                repr(self.backend.module))
+                return
+
             # Run the backend query
-            self._results = self._query_backend()
+            start = time.monotonic()
+            if self._options.isolated:
+                self._results = self._query_backend_isolated()
+            else:
+                self._results = self._query_backend()
+            self._state.duration = time.monotonic() - start
+
+    def release_results(self, spill_file: Optional[Path] = None) -> None:
+        """Derive the hypervisor details, spilling them to the file if
+        specified, and release the raw results."""
+        hv_details = self.hypervisor_details
+        if spill_file is not None:
+            hv_details.spill(spill_file)
+        else:
+            # keep the details in their compact representation
+            hv_details.hypervisor_hosts  # pylint: disable=pointless-statement
+
+        self._results = {}
+        self._state.released = True
 
     @property
     def results(self) -> Dict:
@@ -213,24 +733,90 @@ class HypervisorCollector:
         return list(self.results.keys())
 
     @property
-    def details(self) -> Dict:
-        """Details about the hypervisor and it's VMs."""
+    def hypervisor_details(self) -> HypervisorDetails:
+        """HypervisorDetails for the hypervisor and it's VMs."""
         if self._details is None:
             self._details = HypervisorDetails(self)
 
-        return self._details.details
+        return self._details
+
+    @property
+    def details(self) -> Dict:
+        """Details about the hypervisor and it's VMs."""
+        return self.hypervisor_details.details
 
     @property
     def pending(self) -> bool:
         """Return True if the backend status is pending"""
-        return self._status == "pending"
+        return self._state.status == "pending"
 
     @property
     def succeeded(self) -> bool:
         """Return True if the backend status is success"""
-        return self._status == "success"
+        return self._state.status == "success"
 
     @property
     def failed(self) -> bool:
         """Return True if the backend status is failure"""
-        return self._status == "failure"
+        return self._state.status == "failure"
+
+    @property
+    def released(self) -> bool:
+        """Return True if the results have been released"""
+        return self._state.released
+
+    @property
+    def usage(self) -> Optional[Dict]:
+        """Return the worker process resource usage, if available"""
+        return self._state.usage
+
+    @property
+    def timed_out(self) -> bool:
+        """Return True if the query failed due to timing out"""
+        return self._state.timed_out
+
+    @property
+    def deadline_exceeded(self) -> bool:
+        """Return True if the query failed due to not completing before
+        the deadline that it was run with"""
+        return self._state.timed_out and self._state.external_deadline
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Return the number of seconds the query took, if it was run"""
+        return self._state.duration
+
+
+def _isolated_query(conn: Connection, backend_settings: Dict,
+                    retry_policy: RetryPolicy,
+                    rate_limit: Optional[float] = None) -> None:
+    """Run a backend query in a worker process, sending the outcome,
+    as plain data, back to the parent process via the connection."""
+    log = logging.getLogger(__name__)
+
+    status = 'failure'
+    results: Dict = {}
+    try:
+        rate_limiter: Optional[RateLimiter] = None
+        if rate_limit is not None:
+            rate_limiter = RateLimiter(rate_limit)
+        options = QueryOptions(rate_limiter=rate_limiter,
+                               retry_policy=retry_policy)
+        hv_collector = HypervisorCollector(BackendConfig(backend_settings),
+                                           options=options)
+        hv_collector.run()
+        if hv_collector.succeeded:
+            status = 'success'
+            results = plain_data(hv_collector.results)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Backend %s query process failed",
+                      repr(backend_settings.get('id')))
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    conn.send(dict(
+        status=status,
+        results=results,
+        usage=dict(cpu_time=usage.ru_utime + usage.ru_stime,
+                   max_rss_kb=usage.ru_maxrss),
+    ))
+    conn.close()
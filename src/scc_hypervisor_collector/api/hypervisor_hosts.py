@@ -0,0 +1,222 @@
+"""
+SCC Hypervisor Collector HypervisorHosts
+
+The HypervisorHosts provide a compact in-memory representation of the
+hypervisor hosts, and the VM systems running on them, found in the
+results of querying a backend, from which the entries of the SCC
+virtualization hosts payload are generated, one host at a time, as
+they are needed.
+"""
+
+from array import array
+import sys
+from typing import (Any, Dict, Iterator, List, Mapping, Tuple)
+
+
+def _intern(value: Any) -> Any:
+    """Return the interned value if it is a string, otherwise the value."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+class HostSystem:
+    """A VM system running on a hypervisor host.
+
+    The property names are held as a tuple that is shared by all of the
+    systems with the same property names, in the same order, with the
+    property values held in a matching tuple.
+
+    Arguments:
+        uuid (Any): the system's UUID.
+
+        keys (Tuple[str, ...]): the system's property names.
+
+        values (Tuple[Any, ...]): the system's property values.
+
+    Special Methods:
+        payload(): the SCC payload entry for the system.
+    """
+
+    __slots__ = ('uuid', 'keys', 'values')
+
+    def __init__(self, uuid: Any, keys: Tuple[str, ...],
+                 values: Tuple[Any, ...]):
+        """Initialiser for HostSystem"""
+        self.uuid: Any = uuid
+        self.keys: Tuple[str, ...] = keys
+        self.values: Tuple[Any, ...] = values
+
+    def payload(self) -> Dict:
+        """The SCC payload entry for the system."""
+        return {"uuid": self.uuid,
+                "properties": dict(zip(self.keys, self.values))}
+
+
+class HypervisorHost:
+    """A hypervisor host, and the VM systems running on it.
+
+    The CPU topology of the host is held by the containing
+    HypervisorHosts, rather than by the host itself.
+
+    Arguments:
+        identifier (Any): the host's identifier.
+
+        name (Any): the host's name.
+
+        arch (Any): the host's CPU architecture.
+
+        type (Any): the host's hypervisor type.
+
+        ram_mb (Any): the host's RAM in MiB, if known.
+
+        systems (Tuple[HostSystem, ...]): the VM systems running on the
+            host.
+    """
+
+    __slots__ = ('identifier', 'name', 'arch', 'type', 'ram_mb', 'systems')
+
+    # pylint: disable=too-many-arguments,redefined-builtin
+    def __init__(self, identifier: Any, name: Any, arch: Any, type: Any,
+                 ram_mb: Any, systems: Tuple[HostSystem, ...]):
+        """Initialiser for HypervisorHost"""
+        self.identifier: Any = identifier
+        self.name: Any = name
+        self.arch: Any = arch
+        self.type: Any = type
+        self.ram_mb: Any = ram_mb
+        self.systems: Tuple[HostSystem, ...] = systems
+    # pylint: enable=too-many-arguments,redefined-builtin
+
+
+class HypervisorHosts:
+    """Compact collection of the hypervisor hosts found in a backend.
+
+    The hosts, and their systems, are held as slotted records, with the
+    strings that are repeated across them, such as the architectures,
+    hypervisor types and property names, being interned, and the CPU
+    topology of the hosts, i.e. the numbers of cores, sockets and threads,
+    being held in an array of integers. The SCC payload entry for each
+    host is generated as needed, being the same as if it had been derived
+    directly from the backend's results.
+
+    Arguments:
+        group_name (str): the group name of the hosts, i.e. the id of the
+            backend in which they were found.
+
+    Special Methods:
+        from_results(group_name, results): create the HypervisorHosts
+            for the hosts found in a backend's query results.
+
+        add(entry): add the host described by an entry in a backend's
+            query results.
+
+        __iter__(): generate the SCC payload entry for each host in turn.
+
+        __len__(): the number of hosts.
+
+    Special Properties:
+        group_name (str): the group name of the hosts.
+
+        hosts (Tuple[HypervisorHost, ...]): the host records.
+    """
+
+    __slots__ = ('_group_name', '_hosts', '_topology', '_keys')
+
+    # the topology values held for each host, in order
+    TOPOLOGY_FIELDS = ('cores', 'sockets', 'threads')
+
+    def __init__(self, group_name: str):
+        """Initialiser for HypervisorHosts"""
+        self._group_name: str = sys.intern(group_name)
+        self._hosts: List[HypervisorHost] = []
+        self._topology: array = array('q')
+
+        # the shared property name tuples of the systems
+        self._keys: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    @classmethod
+    def from_results(cls, group_name: str,
+                     results: Mapping) -> 'HypervisorHosts':
+        """Create the HypervisorHosts for the hosts found in the results
+        of querying a backend."""
+        hosts = cls(group_name)
+        for entry in results.values():
+            hosts.add(entry)
+        return hosts
+
+    def _system(self, uuid: Any, vm_name: Any,
+                vm_data: Mapping) -> HostSystem:
+        """Create the record for a VM system, sharing its property names
+        with those of other systems that have the same names."""
+        properties = {"vm_name": vm_name}
+        properties.update(vm_data)
+
+        keys = tuple(properties)
+        shared_keys = self._keys.get(keys)
+        if shared_keys is None:
+            shared_keys = tuple(sys.intern(k) if isinstance(k, str) else k
+                                for k in keys)
+            self._keys[shared_keys] = shared_keys
+
+        return HostSystem(uuid, shared_keys,
+                          tuple(_intern(v) for v in properties.values()))
+
+    def add(self, entry: Mapping) -> None:
+        """Add the host described by an entry in a backend's results."""
+        systems = tuple(self._system(u, v, entry['optionalVmData'][v])
+                        for v, u in entry['vms'].items())
+
+        # cast these values as integers with int() to avoid issues seen
+        # when trying to yaml.safe_dump() them for VMware backends.
+        self._topology.extend((int(entry['totalCpuCores']),
+                               int(entry['totalCpuSockets']),
+                               int(entry['totalCpuThreads'])))
+        self._hosts.append(HypervisorHost(
+            identifier=entry['hostIdentifier'],
+            name=entry['name'],
+            arch=_intern(entry['cpuArch']),
+            type=_intern(entry['type']),
+            ram_mb=entry.get('ramMb'),
+            systems=systems,
+        ))
+
+    def _payload(self, index: int) -> Dict:
+        """The SCC payload entry for the host at the index."""
+        host = self._hosts[index]
+        size = len(self.TOPOLOGY_FIELDS)
+        cores, sockets, threads = \
+            self._topology[index * size:(index + 1) * size]
+        return {
+            "identifier": host.identifier,
+            "group_name": self._group_name,
+            "properties": {
+                "name": host.name,
+                "arch": host.arch,
+                "cores": cores,
+                "sockets": sockets,
+                "threads": threads,
+                "ram_mb": host.ram_mb,
+                "type": host.type
+            },
+            "systems": [s.payload() for s in host.systems],
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Generate the SCC payload entry for each host in turn."""
+        for index in range(len(self._hosts)):
+            yield self._payload(index)
+
+    def __len__(self) -> int:
+        """The number of hosts."""
+        return len(self._hosts)
+
+    @property
+    def group_name(self) -> str:
+        """The group name of the hosts."""
+        return self._group_name
+
+    @property
+    def hosts(self) -> Tuple[HypervisorHost, ...]:
+        """The host records."""
+        return tuple(self._hosts)
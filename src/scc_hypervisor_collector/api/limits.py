@@ -0,0 +1,79 @@
+"""
+SCC Hypervisor Collector Limits
+
+Helpers used to limit the load that the SCC Hypervisor Collector
+places on the configured hypervisor backends.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """Limit the rate at which requests are made.
+
+    Requests are spaced out evenly, such that at most the specified
+    number of requests will be permitted in any given minute.
+
+    Arguments:
+        rate (float): the max number of requests permitted per minute.
+
+    Special Methods:
+        acquire(deadline=None): waits until the next request is
+            permitted, returning True, or returns False immediately if
+            the next request would not be permitted before the deadline,
+            a time.monotonic() value, if specified.
+
+    Special Properties:
+        rate (float): the max number of requests permitted per minute.
+
+        interval (float): the min number of seconds between requests.
+    """
+
+    def __init__(self, rate: float):
+        """Initialiser for RateLimiter"""
+        self._rate: float = rate
+        self._interval: float = 60.0 / rate
+        self._lock = threading.Lock()
+
+        # the time.monotonic() value at which the next request is permitted
+        self._next_time: Optional[float] = None
+
+    @property
+    def rate(self) -> float:
+        """The max number of requests permitted per minute."""
+        return self._rate
+
+    @property
+    def interval(self) -> float:
+        """The min number of seconds between requests."""
+        return self._interval
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """Wait until the next request is permitted.
+
+        Args:
+            deadline (Optional[float]): the time.monotonic() value by which
+                the request must be permitted, if any.
+
+        Returns:
+            bool: True if the request is permitted, or False, without
+                waiting, if it would not be permitted before the deadline.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = now
+            if self._next_time is not None and self._next_time > now:
+                start = self._next_time
+
+            if deadline is not None and start > deadline:
+                return False
+
+            # reserve the slot, so concurrent callers are spaced out
+            self._next_time = start + self._interval
+
+        if start > now:
+            time.sleep(start - now)
+
+        return True
@@ -0,0 +1,159 @@
+"""
+SCC Hypervisor Collector CollectionPipeline
+
+The CollectionPipeline uploads the hypervisor details collected from
+each backend to the SCC as soon as that backend's query completes,
+overlapping the uploads with the collection from the other backends.
+"""
+
+import logging
+from queue import Queue
+import threading
+from typing import (Dict, List, Optional)
+
+from .hypervisor_collector import HypervisorDetails
+from .scheduler import CollectionScheduler
+from .uploader import SCCUploader
+
+
+class CollectionPipeline:
+    """Pipelined collection and upload for scc-hypervisor-collector.
+
+    The HypervisorDetails for each backend are passed, via a bounded
+    queue, to an upload stage that runs in a dedicated thread, as soon
+    as the backend's query completes. If the upload stage falls behind,
+    collection pauses, without starting further queries, until there is
+    space in the queue, bounding the number of collected details that
+    are waiting to be uploaded.
+
+    When the scheduler is lean the details are released once they have
+    been uploaded, as they are no longer needed.
+
+    If the upload stage fails, e.g. because the SCC rate limit was hit
+    and retrying wasn't requested, no further queries are started, and
+    the failure is re-raised once the in-progress queries complete.
+
+    Arguments:
+        scheduler (CollectionScheduler): the scheduler used to query the
+            configured backends.
+
+        uploader (SCCUploader): the uploader used to upload the details.
+
+        retry (bool, default False): whether uploads should be retried
+            if the SCC rate limit is hit.
+
+        queue_size (int, optional): the max number of collected details
+            waiting to be uploaded, defaults to the scheduler's workers.
+
+    Special Methods:
+        run(): run the backend queries, uploading the details collected
+            from each backend as soon as its query completes.
+
+    Special Properties:
+        queue_size (int): the max number of collected details waiting
+            to be uploaded.
+
+        uploaded (List[str]): the ids of the backends whose details have
+            been uploaded.
+
+        not_uploaded (List[str]): the ids of the backends whose details
+            were not uploaded because collection from them failed.
+    """
+
+    def __init__(self, scheduler: CollectionScheduler, uploader: SCCUploader,
+                 retry: bool = False, queue_size: Optional[int] = None):
+        """Initialiser for CollectionPipeline"""
+        self._log = logging.getLogger(__name__)
+
+        self._scheduler: CollectionScheduler = scheduler
+        self._uploader: SCCUploader = uploader
+        self._retry: bool = retry
+        if queue_size is None:
+            queue_size = scheduler.settings.workers
+        self._queue_size: int = max(queue_size, 1)
+
+        # whether each backend's details were uploaded, in the order
+        # that the backends' queries completed
+        self._upload_outcomes: Dict[str, bool] = {}
+
+        # the failure, if any, that stopped the upload stage
+        self._upload_error: Optional[BaseException] = None
+
+    @property
+    def queue_size(self) -> int:
+        """The max number of collected details waiting to be uploaded."""
+        return self._queue_size
+
+    @property
+    def uploaded(self) -> List[str]:
+        """The ids of the backends whose details have been uploaded."""
+        return [b for b, ok in self._upload_outcomes.items() if ok]
+
+    @property
+    def not_uploaded(self) -> List[str]:
+        """The ids of the backends whose collection failed."""
+        return [b for b, ok in self._upload_outcomes.items() if not ok]
+
+    def _upload(self, hv_details: HypervisorDetails) -> None:
+        """Upload the collected details if collection succeeded."""
+        if hv_details.valid:
+            self._log.info("Uploading details to SCC for %s",
+                           hv_details.backend)
+            self._uploader.upload_hosts(hosts=hv_details.hosts(),
+                                        backend=hv_details.backend,
+                                        retry=self._retry)
+            self._upload_outcomes[hv_details.backend] = True
+            if self._scheduler.settings.lean:
+                hv_details.release()
+        else:
+            self._log.error("Not Uploading details to SCC for %s "
+                            "as collection for this backend failed",
+                            hv_details.backend)
+            self._upload_outcomes[hv_details.backend] = False
+
+    def _upload_stage(self, queue: 'Queue[Optional[HypervisorDetails]]'
+                      ) -> None:
+        """Upload the queued details until the end of the queue."""
+        while True:
+            hv_details = queue.get()
+            if hv_details is None:
+                break
+
+            # keep draining the queue after a failure so that collection
+            # is never blocked waiting for space in it.
+            if self._upload_error is not None:
+                continue
+
+            try:
+                self._upload(hv_details)
+            except BaseException as e:  # pylint: disable=broad-except
+                # the uploader may call sys.exit(), which can only stop
+                # the collection run if it is re-raised by the caller.
+                self._upload_error = e
+
+    def run(self) -> None:
+        """Run the backend queries, uploading each backend's details as
+        soon as its query completes."""
+        queue: 'Queue[Optional[HypervisorDetails]]' = \
+            Queue(maxsize=self.queue_size)
+        upload_thread = threading.Thread(target=self._upload_stage,
+                                         args=(queue,),
+                                         name='SCCUploader', daemon=True)
+        upload_thread.start()
+
+        completed = self._scheduler.as_completed()
+        try:
+            for hv_collector in completed:
+                queue.put(hv_collector.hypervisor_details)
+                if self._upload_error is not None:
+                    self._log.error("Upload to SCC stopped, not starting "
+                                    "any further backend queries")
+                    break
+        finally:
+            # wait for in-progress queries, then the pending uploads
+            completed.close()
+            queue.put(None)
+            upload_thread.join()
+
+        if self._upload_error is not None:
+            raise self._upload_error
@@ -0,0 +1,296 @@
+"""
+SCC Hypervisor Collector CollectionPlan
+
+The CollectionPlan projects how the scheduled backend queries will be
+run, based upon their expected durations from previous runs, so that
+the backends whose queries cannot complete within the run budget can
+be deferred to a later run, rather than being cut off part way through.
+"""
+
+import heapq
+import logging
+from collections import deque
+from typing import (Any, Deque, Dict, List, Mapping, Optional, Sequence,
+                    Tuple)
+
+from .configuration import SchedulerConfig
+from .history import CollectionHistory
+from .hypervisor_collector import HypervisorCollector
+
+
+class CollectionPlan:
+    """Plan the backend queries for a collection run.
+
+    The queries are simulated as the scheduler runs them, starting them
+    in the order provided as workers become available, using up to the
+    specified number of workers, while respecting any per-module limits,
+    i.e. starting a later query of another module when a module has
+    reached its limit, with each query expected to take its estimated
+    duration. The query duration is estimated from the history of
+    previous runs, limited to the query's timeout, if any, which is also
+    used as the estimate when there is no history. If neither is
+    available the duration is unknown, and the query is planned as
+    though it takes no time, so that history can be gathered for it.
+
+    Queries that are not projected to complete within the budget, if
+    any, are deferred to a later run. So that no backend is starved of
+    queries, e.g. one that is expected to take longer than the whole
+    budget, the first query of a run is never deferred, and nor is the
+    query of a backend that was deferred by the previous run; the
+    scheduler starts such queries before the others, and those that are
+    projected to overrun the budget are only limited by the run timeout,
+    if any, rather than being cut off when the budget is exhausted.
+
+    Backends whose circuit breaker is open, according to the history,
+    are skipped by the run, so that backends which are down don't use up
+    the run time, until they have been skipped by the cooldown number of
+    runs, at which point they are probed.
+
+    Arguments:
+        hv_collectors (Sequence[HypervisorCollector]): the collectors
+            whose queries are to be planned, in the order that they
+            will be started.
+
+        settings (SchedulerConfig): the scheduler settings, providing
+            the maximum number of concurrent queries, overall and per
+            module, the run budget, if any, without which no queries are
+            deferred, and the circuit breaker settings.
+
+        history (CollectionHistory, optional): the history of previous
+            backend queries, used to estimate query durations, and to
+            determine the state of each backend's circuit breaker.
+
+    Special Methods:
+        expected_duration(hv_collector): the estimated duration of the
+            collector's query, if known.
+
+        next_dispatchable(pending, active, module_limits): remove and
+            return the earliest scheduled pending entry, from the
+            per-module queues, whose module has not reached its limit,
+            as used by both the plan and the scheduler.
+
+        report(): a summary of the plan, as plain data.
+
+    Special Properties:
+        budget (Optional[float]): the specified run budget, if any.
+
+        scheduled (Sequence[HypervisorCollector]): the collectors whose
+            queries are projected to complete within the budget, in
+            the order that they are projected to be started.
+
+        deferred (Sequence[HypervisorCollector]): the collectors whose
+            queries are deferred to a later run.
+
+        overrunning (Sequence[HypervisorCollector]): the scheduled
+            collectors whose queries must run, but are projected to
+            complete after the budget is exhausted.
+
+        skipped (Sequence[HypervisorCollector]): the collectors whose
+            queries are skipped as their circuit breaker is open.
+
+        projected_duration (float): the number of seconds that the
+            scheduled queries are projected to take.
+    """
+
+    def __init__(self, hv_collectors: Sequence[HypervisorCollector],
+                 settings: SchedulerConfig,
+                 history: Optional[CollectionHistory] = None):
+        """Initialiser for CollectionPlan"""
+        self._log = logging.getLogger(__name__)
+        self._budget: Optional[float] = settings.run_budget
+        self._history: Optional[CollectionHistory] = history
+
+        self._scheduled: List[HypervisorCollector] = []
+        self._deferred: List[HypervisorCollector] = []
+        self._skipped: List[HypervisorCollector] = []
+        self._entries: List[Dict[str, Any]] = []
+
+        # skip the backends whose circuit breaker is open
+        planned: List[HypervisorCollector] = []
+        for hv_collector in hv_collectors:
+            if history is not None and history.circuit_state(
+                hv_collector.backend.id, settings.circuit_breaker,
+                settings.circuit_breaker_cooldown
+            ) == 'open':
+                self._skipped.append(hv_collector)
+            else:
+                planned.append(hv_collector)
+
+        self._plan_queries(planned, settings.workers, settings.module_limits)
+
+    def _plan_queries(self, hv_collectors: Sequence[HypervisorCollector],
+                      workers: int, module_limits: Mapping[str, int]
+                      ) -> None:
+        """Simulate the queries, scheduling those that are projected to
+        complete within the budget, and deferring the others."""
+        # queue the collectors per module, remembering the provided order
+        pending: Dict[str, Deque[Tuple[int, HypervisorCollector]]] = {}
+        for index, hv_collector in enumerate(hv_collectors):
+            pending.setdefault(hv_collector.backend.module,
+                               deque()).append((index, hv_collector))
+        active: Dict[str, int] = {module: 0 for module in pending}
+
+        # the finish time, order, and module, of the running queries
+        running: List[Tuple[float, int, str]] = []
+        now = 0.0
+        while True:
+            # start as many queries as the worker and module limits permit
+            while len(running) < workers:
+                next_entry = self.next_dispatchable(pending, active,
+                                                    module_limits)
+                if next_entry is None:
+                    break
+                index, hv_collector = next_entry
+                finish = self._plan_query(hv_collector, now)
+                if finish is not None:
+                    module = hv_collector.backend.module
+                    active[module] += 1
+                    heapq.heappush(running, (finish, index, module))
+
+            if not running:
+                break
+
+            # advance to when the next query is projected to complete
+            now, _, module = heapq.heappop(running)
+            active[module] -= 1
+
+    def _plan_query(self, hv_collector: HypervisorCollector,
+                    start: float) -> Optional[float]:
+        """Plan the collector's query starting at the specified time,
+        returning its projected finish time if it's scheduled, or None
+        if it's deferred."""
+        module = hv_collector.backend.module
+        duration = self.expected_duration(hv_collector)
+        finish = start + (duration or 0.0)
+
+        entry: Dict[str, Any] = dict(backend=hv_collector.backend.id,
+                                     module=module,
+                                     expected_duration=duration)
+        self._entries.append(entry)
+
+        if self._budget is not None and finish > self._budget and \
+                not self._must_run(hv_collector):
+            self._deferred.append(hv_collector)
+            entry['deferred'] = True
+            self._log.debug("Backend %s, module %s, projected to finish "
+                            "at %.1fs, deferring it",
+                            repr(hv_collector.backend.id), repr(module),
+                            finish)
+            return None
+
+        self._scheduled.append(hv_collector)
+        entry.update(deferred=False, start=start, finish=finish)
+        return finish
+
+    @staticmethod
+    def next_dispatchable(
+        pending: Mapping[str, Deque[Tuple[int, HypervisorCollector]]],
+        active: Mapping[str, int], module_limits: Mapping[str, int]
+    ) -> Optional[Tuple[int, HypervisorCollector]]:
+        """Remove and return the earliest scheduled pending entry whose
+        module has not reached its concurrency limit, if any."""
+        candidate: Optional[str] = None
+        for module, queue in pending.items():
+            if not queue:
+                continue
+            limit = module_limits.get(module)
+            if limit is not None and active[module] >= limit:
+                continue
+            if candidate is None or queue[0][0] < pending[candidate][0][0]:
+                candidate = module
+
+        if candidate is None:
+            return None
+
+        return pending[candidate].popleft()
+
+    def _must_run(self, hv_collector: HypervisorCollector) -> bool:
+        """Whether the collector's query must be run, even if it isn't
+        projected to complete within the budget, because it is the first
+        query of the run, or it was deferred by the previous run."""
+        if not self._scheduled:
+            return True
+        return self._history is not None and \
+            self._history.was_deferred(hv_collector.backend.id)
+
+    def expected_duration(
+        self, hv_collector: HypervisorCollector
+    ) -> Optional[float]:
+        """The estimated duration of the collector's query, if known."""
+        duration: Optional[float] = None
+        if self._history is not None:
+            duration = self._history.expected_duration(
+                hv_collector.backend.id, hv_collector.backend.module
+            )
+
+        # a query can't take longer than its timeout
+        timeout = hv_collector.options.timeout
+        if timeout is not None and (duration is None or duration > timeout):
+            duration = timeout
+
+        return duration
+
+    @property
+    def budget(self) -> Optional[float]:
+        """The specified run budget, if any."""
+        return self._budget
+
+    @property
+    def scheduled(self) -> Sequence[HypervisorCollector]:
+        """The collectors whose queries fit within the budget."""
+        return tuple(self._scheduled)
+
+    @property
+    def deferred(self) -> Sequence[HypervisorCollector]:
+        """The collectors whose queries are deferred to a later run."""
+        return tuple(self._deferred)
+
+    @property
+    def overrunning(self) -> Sequence[HypervisorCollector]:
+        """The scheduled collectors projected to overrun the budget."""
+        budget = self._budget
+        if budget is None:
+            return ()
+        overrun = {e['backend'] for e in self._entries
+                   if not e['deferred'] and e['finish'] > budget}
+        return tuple(hv for hv in self._scheduled
+                     if hv.backend.id in overrun)
+
+    @property
+    def skipped(self) -> Sequence[HypervisorCollector]:
+        """The collectors whose queries are skipped by the run."""
+        return tuple(self._skipped)
+
+    @property
+    def projected_duration(self) -> float:
+        """The projected duration of the scheduled queries."""
+        return max(
+            (e['finish'] for e in self._entries if not e['deferred']),
+            default=0.0
+        )
+
+    def report(self) -> Dict[str, Any]:
+        """A summary of the plan, as plain data."""
+
+        def seconds(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value, 1)
+
+        return dict(
+            run_budget=self.budget,
+            projected_duration=seconds(self.projected_duration),
+            scheduled=[
+                dict(backend=e['backend'], module=e['module'],
+                     expected_duration=seconds(e['expected_duration']),
+                     start=seconds(e['start']), finish=seconds(e['finish']))
+                for e in self._entries if not e['deferred']
+            ],
+            deferred=[
+                dict(backend=e['backend'], module=e['module'],
+                     expected_duration=seconds(e['expected_duration']))
+                for e in self._entries if e['deferred']
+            ],
+            skipped=[
+                dict(backend=hv.backend.id, module=hv.backend.module)
+                for hv in self._skipped
+            ],
+        )
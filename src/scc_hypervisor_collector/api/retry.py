@@ -0,0 +1,161 @@
+"""
+SCC Hypervisor Collector RetryPolicy
+
+The RetryPolicy determines how failed backend queries are retried,
+spacing out the attempts with an exponential Backoff, optionally with
+some random jitter, so that a flapping backend isn't hammered with
+back-to-back connection attempts.
+"""
+
+import random
+from typing import Optional
+
+
+class Backoff:
+    """Exponential backoff between retries.
+
+    The delay before each retry starts at the initial delay, and is
+    multiplied by the multiplier for each subsequent retry, limited to
+    the max delay, if any. If jitter is specified each delay is randomly
+    varied by up to that fraction of the delay, so that retries of
+    backends that failed at the same time are spread out.
+
+    Arguments:
+        initial (float, default 0): the number of seconds to wait before
+            the first retry; 0 means retry immediately.
+
+        multiplier (float, default 2): the factor by which the delay is
+            increased for each subsequent retry.
+
+        max_delay (float, optional): the max number of seconds to wait
+            before any retry.
+
+        jitter (float, default 0): the max fraction, between 0 and 1, by
+            which each delay is randomly varied.
+
+    Special Methods:
+        delay(attempt): the number of seconds to wait before the retry
+            that follows the specified number of failed attempts.
+
+    Special Properties:
+        initial, multiplier, max_delay, jitter: the specified backoff
+            settings.
+    """
+
+    def __init__(self, initial: float = 0.0, multiplier: float = 2.0,
+                 max_delay: Optional[float] = None, jitter: float = 0.0):
+        """Initialiser for Backoff"""
+        self._initial: float = initial
+        self._multiplier: float = multiplier
+        self._max_delay: Optional[float] = max_delay
+        self._jitter: float = jitter
+
+    def __repr__(self) -> str:
+        return (f"Backoff(initial={self.initial!r}, "
+                f"multiplier={self.multiplier!r}, "
+                f"max_delay={self.max_delay!r}, jitter={self.jitter!r})")
+
+    @property
+    def initial(self) -> float:
+        """The number of seconds to wait before the first retry."""
+        return self._initial
+
+    @property
+    def multiplier(self) -> float:
+        """The factor by which the delay increases for each retry."""
+        return self._multiplier
+
+    @property
+    def max_delay(self) -> Optional[float]:
+        """The max number of seconds to wait before any retry, if any."""
+        return self._max_delay
+
+    @property
+    def jitter(self) -> float:
+        """The max fraction by which each delay is randomly varied."""
+        return self._jitter
+
+    def delay(self, attempt: int) -> float:
+        """The number of seconds to wait before the retry following the
+        specified number of failed attempts."""
+        if attempt < 1 or not self.initial:
+            return 0.0
+
+        delay = self.initial * self.multiplier ** (attempt - 1)
+        if self.jitter:
+            delay *= 1 + self.jitter * random.uniform(-1.0, 1.0)
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+
+        return delay
+
+
+class RetryPolicy:
+    """Policy for retrying failed backend queries.
+
+    Up to the specified number of attempts are made, with the delay
+    before each retry being determined by the backoff, as long as the
+    retry would start within the max elapsed time, if any.
+
+    The default policy retries immediately, up to 3 attempts in total.
+
+    Arguments:
+        retries (int, default 3): the max number of attempts to be made.
+
+        backoff (Backoff, optional): the backoff between retries,
+            defaults to retrying immediately.
+
+        max_elapsed (float, optional): the max number of seconds that
+            may elapse, since the first attempt started, before a retry
+            is started; no retry is attempted if it would start later.
+
+    Special Methods:
+        delay(attempt): the number of seconds to wait before the retry
+            that follows the specified number of failed attempts.
+
+        permits(elapsed): whether a retry may be started once the
+            specified number of seconds have elapsed since the first
+            attempt started.
+
+    Special Properties:
+        retries, backoff, max_elapsed: the specified policy settings.
+    """
+
+    def __init__(self, retries: int = 3, backoff: Optional[Backoff] = None,
+                 max_elapsed: Optional[float] = None):
+        """Initialiser for RetryPolicy"""
+        # ensure at least one attempt will be made, even if retries <= 0
+        self._retries: int = max(retries, 1)
+        if backoff is None:
+            backoff = Backoff()
+        self._backoff: Backoff = backoff
+        self._max_elapsed: Optional[float] = max_elapsed
+
+    def __repr__(self) -> str:
+        return (f"RetryPolicy(retries={self.retries!r}, "
+                f"backoff={self.backoff!r}, "
+                f"max_elapsed={self.max_elapsed!r})")
+
+    @property
+    def retries(self) -> int:
+        """The max number of attempts to be made."""
+        return self._retries
+
+    @property
+    def backoff(self) -> Backoff:
+        """The backoff between retries."""
+        return self._backoff
+
+    @property
+    def max_elapsed(self) -> Optional[float]:
+        """The max seconds after which a retry may start, if any."""
+        return self._max_elapsed
+
+    def delay(self, attempt: int) -> float:
+        """The number of seconds to wait before the retry following the
+        specified number of failed attempts."""
+        return self.backoff.delay(attempt)
+
+    def permits(self, elapsed: float) -> bool:
+        """Whether a retry may start after the elapsed number of seconds."""
+        return self.max_elapsed is None or elapsed <= self.max_elapsed
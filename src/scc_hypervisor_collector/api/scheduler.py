@@ -6,19 +6,47 @@ to retrieve the hypervisor details from the specified backends, using
 the provided backend settings.
 """
 
+from collections import deque
+import concurrent.futures
+from concurrent.futures import (Future, ThreadPoolExecutor)
+import gzip
 import logging
+import json
+import math
 from pathlib import Path
-from typing import (Dict, List, Optional, Sequence, Set)
-import yaml
-
-from .configuration import CollectorConfig
+import textwrap
+import time
+import urllib.parse
+from typing import (Any, Callable, ClassVar, Deque, Dict, Generator, List,
+                    Mapping, Optional, Sequence, Set, TextIO, Tuple, Type,
+                    cast)
+
+from .configuration import (BackendConfig, CollectorConfig, SchedulerConfig)
 from .exceptions import (
+    CollectionResultsFormatError,
     CollectionResultsInvalidData,
     ResultsFilePermissionsError,
     SchedulerInvalidConfigError,
 )
-from .hypervisor_collector import HypervisorCollector
-from .util import check_permissions
+from .history import CollectionHistory
+from .hypervisor_collector import (HypervisorCollector, HypervisorDetails,
+                                   QueryOptions)
+from .limits import RateLimiter
+from .planner import CollectionPlan
+from .retry import RetryPolicy
+from .util import check_permissions, dump_yaml, load_yaml
+
+# Support zstd compressed results files when the zstandard module is
+# available, with only gzip compression being supported otherwise.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore
+
+# The errors raised when reading corrupt or truncated compressed files
+DECOMPRESSION_ERRORS: Tuple[Type[Exception], ...] = (EOFError, OSError)
+if zstandard is not None:
+    DECOMPRESSION_ERRORS += (zstandard.ZstdError,)
 
 
 class CollectionResults:
@@ -26,30 +54,214 @@ class CollectionResults:
 
     Can be used to save out a copy of the results to be loaded later,
     or to load a set of results to be used as the data to be uploaded.
+
+    Results generated from a scheduler run are streamed, host by host,
+    from the collected backend results when saved, or uploaded via the
+    hypervisor_details, rather than holding the details for all of the
+    backends in memory together. Backends whose queries were never
+    started, e.g. because the run was stopped early, are reported as
+    invalid, without querying them.
+
+    Results can be saved either as a YAML document, or as JSON lines,
+    with one line per backend, which can be written and read as a
+    stream, and is much faster to save and load for large results.
+    The format of a results file is detected when it is loaded.
+
+    Results files can also be gzip, or zstd if the zstandard module is
+    available, compressed, with the results being compressed as they
+    are written, and decompressed as they are read, rather than all at
+    once. The compression of a results file is detected from its magic
+    bytes when it is loaded.
     """
 
+    # the supported results file formats
+    FORMATS: ClassVar[Sequence[str]] = ('yaml', 'jsonl')
+
+    # results files saved as JSON lines unless another format is specified
+    JSONL_SUFFIXES: ClassVar[Sequence[str]] = ('.jsonl', '.ndjson')
+
+    # the supported results file compressions
+    COMPRESSIONS: ClassVar[Sequence[str]] = ('none', 'gzip', 'zstd')
+
+    # results files compressed unless another compression is specified
+    COMPRESSION_SUFFIXES: ClassVar[Mapping[str, str]] = {
+        '.gz': 'gzip',
+        '.zst': 'zstd',
+    }
+
+    # the magic bytes with which compressed results files start
+    COMPRESSION_MAGIC: ClassVar[Mapping[str, bytes]] = {
+        'gzip': b'\x1f\x8b',
+        'zstd': b'\x28\xb5\x2f\xfd',
+    }
+
+    # the gzip compression level, trading some size for speed
+    GZIP_LEVEL: ClassVar[int] = 6
+
+    # the width at which YAML scalars are wrapped, PyYAML's default
+    YAML_WIDTH: ClassVar[int] = 80
+
     def __init__(self, scheduler: Optional['CollectionScheduler'] = None):
         self._results: List = []
+        self._hv_details: Optional[List[HypervisorDetails]] = None
         if scheduler:
             self._get_results_from_scheduler(scheduler)
 
     @property
     def results(self) -> List:
-        """Return a copy of the results"""
+        """Return a copy of the results, building the details for all of
+        the backends; use hypervisor_details to process them one backend
+        at a time."""
+        if self._hv_details is not None:
+            return [dict(backend=d.backend, details=d.details, valid=d.valid)
+                    for d in self._hv_details]
         return self._results.copy()
 
+    @property
+    def hypervisor_details(self) -> List[HypervisorDetails]:
+        """Return the HypervisorDetails for each of the results"""
+        if self._hv_details is not None:
+            return list(self._hv_details)
+        return [HypervisorDetails(dict(e, details=e.get('details') or {}))
+                for e in self._results]
+
     def _get_results_from_scheduler(self,
                                     scheduler: 'CollectionScheduler') -> None:
         """Generate results content using provided scheduler."""
 
-        self._results = [
-            dict(backend=hv.backend.id, details=hv.details,
-                 valid=hv.succeeded)
+        # backends whose queries were deferred, or skipped, have no results
+        not_run = {hv.backend.id
+                   for hv in (*scheduler.deferred, *scheduler.skipped)}
+        self._hv_details = [
+            self._unstarted_details(hv) if hv.pending
+            else hv.hypervisor_details
             for hv in scheduler.hypervisors
+            if hv.backend.id not in not_run
         ]
 
-    def save(self, file_path: Path) -> None:
-        """Save the results to the specified file."""
+    @staticmethod
+    def _unstarted_details(hv_collector: HypervisorCollector
+                           ) -> HypervisorDetails:
+        """The details for a collector whose query was never started,
+        e.g. because the run was stopped early, which are reported as
+        invalid, rather than running the query now, ignoring the run's
+        deadline."""
+        return HypervisorDetails(dict(backend=hv_collector.backend.id,
+                                      details=dict(virtualization_hosts=[]),
+                                      valid=False))
+
+    @classmethod
+    def _write_results(cls, hv_details: Sequence[HypervisorDetails],
+                       fp: TextIO) -> None:
+        """Write the results as YAML, one host at a time, producing the
+        same document as dumping the results as a whole would."""
+        if not hv_details:
+            fp.write("[]\n")
+            return
+
+        for d in hv_details:
+            # the keys are written in the sorted order used by dump_yaml()
+            fp.write(dump_yaml([dict(backend=d.backend)]))
+            hosts = d.hosts()
+            host = next(hosts, None)
+            if host is None:
+                fp.write("  details:\n    virtualization_hosts: []\n")
+            else:
+                fp.write("  details:\n    virtualization_hosts:\n")
+            while host is not None:
+                # the hosts are wrapped as if they were already indented
+                fp.write(textwrap.indent(
+                    dump_yaml([host], width=cls.YAML_WIDTH - 4), '    '
+                ))
+                host = next(hosts, None)
+            fp.write(textwrap.indent(dump_yaml(dict(valid=d.valid)), '  '))
+
+    @staticmethod
+    def _write_jsonl_results(hv_details: Sequence[HypervisorDetails],
+                             fp: TextIO) -> None:
+        """Write the results as JSON lines, one host at a time, producing
+        the same line for each backend as dumping its entry would."""
+        for d in hv_details:
+            fp.write(f'{{"backend": {json.dumps(d.backend)}, '
+                     f'"details": {{"virtualization_hosts": [')
+            for index, host in enumerate(d.hosts()):
+                if index:
+                    fp.write(', ')
+                fp.write(json.dumps(host))
+            fp.write(f']}}, "valid": {json.dumps(d.valid)}}}\n')
+
+    @classmethod
+    def results_format(cls, file_path: Path) -> str:
+        """The default format in which results are saved to the file,
+        ignoring any compression suffix."""
+        suffixes = [s.lower() for s in file_path.suffixes]
+        if suffixes and suffixes[-1] in cls.COMPRESSION_SUFFIXES:
+            suffixes.pop()
+        if suffixes and suffixes[-1] in cls.JSONL_SUFFIXES:
+            return 'jsonl'
+        return 'yaml'
+
+    @classmethod
+    def results_compression(cls, file_path: Path) -> str:
+        """The default compression with which results are saved to the
+        file."""
+        return cls.COMPRESSION_SUFFIXES.get(file_path.suffix.lower(), 'none')
+
+    @classmethod
+    def _check_compression(cls, compression: str) -> None:
+        """Raise CollectionResultsFormatError if the compression is not
+        supported."""
+        if compression not in cls.COMPRESSIONS:
+            raise CollectionResultsFormatError(
+                f"Unsupported results compression {compression!r}"
+            )
+        if compression == 'zstd' and zstandard is None:
+            raise CollectionResultsFormatError(
+                "The zstandard module is required for zstd compressed "
+                "results files"
+            )
+
+    @classmethod
+    def _detect_compression(cls, file_path: Path) -> str:
+        """Return the compression of the file based on its magic bytes."""
+        size = max(len(m) for m in cls.COMPRESSION_MAGIC.values())
+        with file_path.open("rb") as fp:
+            magic = fp.read(size)
+        for compression, prefix in cls.COMPRESSION_MAGIC.items():
+            if magic.startswith(prefix):
+                return compression
+        return 'none'
+
+    @classmethod
+    def _open_results(cls, file_path: Path, mode: str,
+                      compression: str) -> TextIO:
+        """Open the results file for reading ('r') or writing ('w') as
+        text, decompressing or compressing it as a stream if needed."""
+        if compression == 'gzip':
+            return cast(TextIO, gzip.open(file_path, mode + "t",
+                                          compresslevel=cls.GZIP_LEVEL,
+                                          encoding="utf-8"))
+        if compression == 'zstd':
+            return cast(TextIO, zstandard.open(file_path, mode + "t",
+                                               encoding="utf-8"))
+        return cast(TextIO, file_path.open(mode, encoding="utf-8"))
+
+    def save(self, file_path: Path,
+             results_format: Optional[str] = None,
+             compression: Optional[str] = None) -> None:
+        """Save the results to the specified file, in the specified
+        format and with the specified compression, defaulting to those
+        based on the file's suffixes."""
+        if results_format is None:
+            results_format = self.results_format(file_path)
+        if results_format not in self.FORMATS:
+            raise CollectionResultsFormatError(
+                f"Unsupported results format {results_format!r}"
+            )
+        if compression is None:
+            compression = self.results_compression(file_path)
+        self._check_compression(compression)
+
         # create the results file if it doesn't already exist, and ensure
         # that only user access is permitted.
         if not file_path.exists():
@@ -58,41 +270,119 @@ class CollectionResults:
             file_path.chmod(mode=0o600)
 
         # write the managed results to the specified file
-        with file_path.open("w", encoding="utf-8") as fp:
-            yaml.safe_dump(self._results, fp)
+        with self._open_results(file_path, "w", compression) as fp:
+            if results_format == 'jsonl':
+                if self._hv_details is not None:
+                    self._write_jsonl_results(self._hv_details, fp)
+                else:
+                    for entry in self._results:
+                        fp.write(json.dumps(entry))
+                        fp.write("\n")
+            elif self._hv_details is not None:
+                self._write_results(self._hv_details, fp)
+            else:
+                dump_yaml(self._results, fp)
 
         # validate the file permissions after writing to it
         check_permissions(file_path, fail_exc=ResultsFilePermissionsError)
 
+    @staticmethod
+    def _is_jsonl(fp: TextIO) -> bool:
+        """Return True if the results are JSON lines, rather than YAML,
+        based on the first non-blank line."""
+        for line in fp:
+            if line.strip():
+                return line.lstrip().startswith('{')
+        return False
+
+    @staticmethod
+    def _valid_entry(entry: Any) -> bool:
+        """Return True if the results entry is valid."""
+        return isinstance(entry, dict) and \
+            ('backend' in entry) and ('valid' in entry) and \
+            (not entry['valid'] or 'details' in entry)
+
+    @classmethod
+    def _load_jsonl_results(cls, fp: TextIO) -> List:
+        """Return the results loaded from the JSON lines, validating
+        each entry as it is read."""
+        results = []
+        for line in fp:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise CollectionResultsInvalidData(
+                    'Specified results file contents are invalid'
+                ) from e
+            if not cls._valid_entry(entry):
+                raise CollectionResultsInvalidData(
+                    'Specified results file contents are invalid'
+                )
+            results.append(entry)
+        return results
+
+    def _read_results(self, file_path: Path, compression: str) -> Any:
+        """Return the results read from the file, detecting whether it
+        contains YAML or JSON lines."""
+        # reopen the file, rather than rewinding it, once the format has
+        # been detected, as decompressed streams may not be seekable.
+        with self._open_results(file_path, "r", compression) as fp:
+            jsonl = self._is_jsonl(fp)
+        with self._open_results(file_path, "r", compression) as fp:
+            if jsonl:
+                return self._load_jsonl_results(fp)
+            return load_yaml(fp)
+
     def load(self, file_path: Path) -> None:
-        """Load the result from the specified file."""
+        """Load the result from the specified file, detecting whether
+        it is compressed, and whether it contains YAML or JSON lines."""
         # validate the file permissions before reading from it
         check_permissions(file_path, fail_exc=ResultsFilePermissionsError)
 
         # read the file contents and validate basic structure
-        with file_path.open("r", encoding="utf-8") as fp:
-            results = yaml.safe_load(fp)
+        compression = self._detect_compression(file_path)
+        self._check_compression(compression)
+        try:
+            results = self._read_results(file_path, compression)
+        except DECOMPRESSION_ERRORS as e:
+            if compression == 'none':
+                raise
+            raise CollectionResultsInvalidData(
+                f'Specified results file {compression} compressed '
+                'contents are invalid'
+            ) from e
 
         # Perform some basic validity checking on the results content
-        results_valid = True
-        if not isinstance(results, list):
-            results_valid = False
-        elif not all(('backend' in e) and ('valid' in e)
-                     for e in results):
-            results_valid = False
-        elif not all('details' in e
-                     for e in results
-                     if e['valid']):
-            results_valid = False
-
-        # Fail if validity checks fail
-        if not results_valid:
+        if not isinstance(results, list) or \
+                not all(self._valid_entry(e) for e in results):
             raise CollectionResultsInvalidData(
                 'Specified results file contents are invalid'
             )
 
         # store loaded data as the results to be managed
         self._results = results
+        self._hv_details = None
+
+
+class _Derived:
+    """The plan and results derived from a CollectionScheduler's
+    collectors, created when they are first needed.
+
+    Arguments:
+        plan (Optional[CollectionPlan]): the plan for the backend
+            queries, if created.
+        results (Optional[CollectionResults]): the collected results, if
+            created; discarded whenever a query completes.
+    """
+
+    __slots__ = ('plan', 'results')
+
+    def __init__(self) -> None:
+        """Initialiser for _Derived"""
+        self.plan: Optional[CollectionPlan] = None
+        self.results: Optional[CollectionResults] = None
 
 
 class CollectionScheduler:
@@ -102,10 +392,61 @@ class CollectionScheduler:
     specified backends by type, instantiating a HypervisorCollector
     for each and schedule the collection of backend details.
 
+    Arguments:
+        config (CollectorConfig): the configuration to be used.
+
+        settings (SchedulerConfig, optional): the scheduler settings
+            controlling how the backends are queried, defaulting to the
+            scheduler settings of the provided configuration. See the
+            SchedulerConfig for details of the available settings, with
+            SchedulerConfig.override() providing a way to override some
+            of the configured settings.
+
+            When more than one worker is available the backend queries
+            will be run in a pool of threads, otherwise they will be run
+            one at a time. Queries that are still running at the run
+            timeout, or when the run budget is exhausted, are marked as
+            failed and abandoned, or killed, and queries that haven't
+            started by then will be marked as failed without being run.
+
+        history (CollectionHistory, optional): the history of previous
+            backend queries. If specified the backends that are expected
+            to take the longest, including those without any history,
+            will be queried first, and the history will be updated with
+            the outcome of each query as it completes. Backends that were
+            deferred by the previous run are queried before the others.
+            The history is also used to defer the backends that are not
+            expected to complete within the run budget, and to skip, and
+            later only probe, backends whose queries have failed in the
+            circuit_breaker number of consecutive runs.
+
+        spill_dir (Path, optional): the directory, accessible only by the
+            user, to which the hypervisor details are spilled, one file
+            per backend, when their raw results are released in lean
+            mode. If not specified the details are kept in memory, e.g.
+            to be handed off to a CollectionPipeline.
+
     Special Properties:
         config (CollectorConfig): the configuration provided to the
             scheduler.
 
+        settings (SchedulerConfig): the scheduler settings in use.
+
+        history (Optional[CollectionHistory]): the history of previous
+            backend queries, if any.
+
+        spill_dir (Optional[Path]): the directory to which the details
+            are spilled when the raw results are released, if any.
+
+        plan (CollectionPlan): the plan for the backend queries, i.e.
+            those that fit within the run budget and those deferred.
+
+        deferred (Sequence[HypervisorCollector]): the collectors whose
+            queries are deferred to a later run.
+
+        skipped (Sequence[HypervisorCollector]): the collectors whose
+            queries are skipped as their circuit breaker is open.
+
         hypervisor_types (Set[str]): the set of hypervisor backend
             types that are found in the configuration.
 
@@ -117,10 +458,18 @@ class CollectionScheduler:
             configuration.
 
     Special Methods:
-        run(): Run the backend queries on all of the configured collectors.
+        run(): Run the backend queries on all of the configured collectors,
+            using up to workers concurrent queries, while respecting
+            the per-module limits.
+
+        as_completed(): Run the backend queries as for run(), yielding
+            each collector as soon as its backend query completes.
     """
 
-    def __init__(self, config: CollectorConfig):
+    def __init__(self, config: CollectorConfig,
+                 settings: Optional[SchedulerConfig] = None,
+                 history: Optional[CollectionHistory] = None,
+                 spill_dir: Optional[Path] = None):
         """Schedule collection of details from config specified backends."""
         self._log = logging.getLogger(__name__)
 
@@ -137,56 +486,327 @@ class CollectionScheduler:
                 "No backends specified in config!"
             )
 
-        # save the parameters
+        # save the parameters, using the configured scheduler settings
+        # unless explicitly specified.
         self._config: CollectorConfig = config
-
-        # determine set of hypervisor types specified in configuration
-        self._hypervisor_types: Set[str] = {b.module for b in config.backends}
-
-        self._log.debug("hv_types: %s", repr(self._hypervisor_types))
-
-        # instantiate collectors for each backend
+        if settings is None:
+            settings = config.scheduler
+        self._settings: SchedulerConfig = settings
+        self._history: Optional[CollectionHistory] = history
+        self._spill_dir: Optional[Path] = spill_dir
+
+        self._log.debug("settings: %s, spill_dir: %s", repr(settings),
+                        spill_dir)
+
+        # instantiate collectors for each backend, sharing the rate
+        # limiter for each module between them.
+        rate_limiters: Dict[str, RateLimiter] = {}
         self._hypervisors: Sequence[HypervisorCollector] = [
-            HypervisorCollector(b) for b in config.backends
+            self._create_collector(b, rate_limiters) for b in config.backends
         ]
 
         self._log.debug("hvs: %s", repr(self._hypervisors))
 
-        # group collectors by hypervisor type
-        self._hypervisor_groups: Dict[str, Sequence[HypervisorCollector]] = {
-            t: [h for h in self._hypervisors if h.backend.module == t]
-            for t in self._hypervisor_types
-        }
-
-        # collected results
-        self._results: Optional[CollectionResults] = None
-
-        self._log.debug("hv_groups: %s", repr(self._hypervisor_groups))
+        # lazily created query plan and results
+        self._derived = _Derived()
+
+    def _create_collector(self, backend: BackendConfig,
+                          rate_limiters: Dict[str, RateLimiter]
+                          ) -> HypervisorCollector:
+        """Create a collector for the backend, using the scheduler settings
+        unless overridden by the backend's own settings.
+
+        The scheduler rate limit applies to all of the backends of a
+        module, so they share the module's limiter in rate_limiters,
+        while a backend with its own rate limit has a dedicated limiter.
+        """
+        timeout = self._settings.backend_timeout
+        if backend.timeout is not None:
+            timeout = backend.timeout
+        rate_limiter: Optional[RateLimiter] = None
+        if backend.rate_limit is not None:
+            rate_limiter = RateLimiter(backend.rate_limit)
+        elif self._settings.rate_limit is not None:
+            if backend.module not in rate_limiters:
+                rate_limiters[backend.module] = RateLimiter(
+                    self._settings.rate_limit
+                )
+            rate_limiter = rate_limiters[backend.module]
+
+        # backends whose recent queries have all failed are skipped, as
+        # planned, until the circuit breaker cooldown has passed, and are
+        # then probed with a single attempt, until they recover.
+        retry_policy = self._settings.retry_policy
+        if self._history is not None and self._history.circuit_state(
+            backend.id, self._settings.circuit_breaker,
+            self._settings.circuit_breaker_cooldown
+        ) == 'half-open':
+            self._log.warning("Backend %s, module %s, query failed in the "
+                              "last %d runs, probing it with a single "
+                              "attempt", repr(backend.id),
+                              repr(backend.module),
+                              self._history.consecutive_failures(backend.id))
+            retry_policy = RetryPolicy(retries=1)
+
+        options = QueryOptions(isolated=self._settings.executor == 'process',
+                               timeout=timeout,
+                               rate_limiter=rate_limiter,
+                               retry_policy=retry_policy)
+        return HypervisorCollector(backend, options=options)
+
+    def _scheduled_hypervisors(self) -> List[HypervisorCollector]:
+        """The planned collectors in the order that they should be run."""
+        return list(self.plan.scheduled)
+
+    def _ordered_hypervisors(self) -> List[HypervisorCollector]:
+        """All of the collectors in the order that they should be run."""
+        hv_collectors = [
+            hv_collector
+            for hv_type in self.hypervisor_types
+            for hv_collector in self.hypervisor_groups[hv_type]
+        ]
 
-    def _run_hv_type_queries(self, hv_type: str) -> None:
-        """Query backends for each configured hypervisor of given type."""
-        for hv_collector in self._hypervisor_groups[hv_type]:
-            hv_collector.run()
+        # start the queries that are expected to take the longest first,
+        # so that they don't extend the run by starting late, treating
+        # backends without history as potentially the slowest.
+        # Backends deferred by the previous run go first, to ensure that
+        # they aren't deferred indefinitely.
+        if self._history is not None:
+            hv_collectors.sort(key=self._start_priority, reverse=True)
+            self._log.debug("scheduled order: %s",
+                            repr([hv.backend.id for hv in hv_collectors]))
+
+        return hv_collectors
+
+    def _start_priority(self,
+                        hv_collector: HypervisorCollector) -> Tuple[bool,
+                                                                    float]:
+        """The priority with which the collector's query should be started,
+        based on whether it was deferred, and its expected duration."""
+        deferred = False
+        duration: Optional[float] = None
+        if self._history is not None:
+            deferred = self._history.was_deferred(hv_collector.backend.id)
+            duration = self._history.expected_duration(
+                hv_collector.backend.id, hv_collector.backend.module
+            )
+        return (deferred, math.inf if duration is None else duration)
+
+    def _completed(self, hv_collector: HypervisorCollector) -> None:
+        """Record the outcome of a completed collector's query."""
+        # the results, if already created, reported the query as unstarted
+        self._derived.results = None
+
+        if self._history is not None:
+            self._history.record(hv_collector)
+
+        if self._settings.lean:
+            spill_file: Optional[Path] = None
+            if self.spill_dir is not None:
+                # backend ids are unique, but may contain path separators
+                name = urllib.parse.quote(hv_collector.backend.id, safe='')
+                spill_file = self.spill_dir / f"{name}.jsonl"
+            hv_collector.release_results(spill_file)
+
+    def _next_dispatchable(
+        self,
+        pending: Dict[str, Deque[Tuple[int, HypervisorCollector]]],
+        active: Dict[str, int]
+    ) -> Optional[HypervisorCollector]:
+        """Remove and return the earliest scheduled pending collector whose
+        module has not reached its concurrency limit, if any."""
+        next_entry = CollectionPlan.next_dispatchable(
+            pending, active, self._settings.module_limits
+        )
+        if next_entry is None:
+            return None
+
+        _, hv_collector = next_entry
+        return hv_collector
+
+    def _report_not_run(self) -> None:
+        """Report, and remember, the queries that this run won't make."""
+        # the queries deferred to a later run
+        for hv_collector in self.deferred:
+            self._log.warning("Backend %s, module %s, query deferred to a "
+                              "later run as it isn't expected to complete "
+                              "within the run budget",
+                              repr(hv_collector.backend.id),
+                              repr(hv_collector.backend.module))
+            if self._history is not None:
+                self._history.record_deferred(hv_collector)
+
+        # the queries skipped as their circuit breaker is open, which only
+        # the history can determine.
+        if self._history is None:
+            return
+        for hv_collector in self.skipped:
+            self._log.warning("Backend %s, module %s, query skipped as it "
+                              "failed in the last %d runs",
+                              repr(hv_collector.backend.id),
+                              repr(hv_collector.backend.module),
+                              self._history.consecutive_failures(
+                                  hv_collector.backend.id
+                              ))
+            self._history.record_skipped(hv_collector)
+
+    def _run_deadlines(
+        self
+    ) -> Callable[[HypervisorCollector], Optional[float]]:
+        """Return a function providing the deadline, if any, by which each
+        collector's query must complete, as a time.monotonic() value."""
+        now = time.monotonic()
+        run_timeout = self._settings.run_timeout
+        run_budget = self._settings.run_budget
+
+        # all queries must complete before the run deadline, if any, which
+        # is also determined by the run budget, except for those that must
+        # run despite being expected to overrun the budget.
+        timeout_deadline: Optional[float] = None
+        if run_timeout is not None:
+            timeout_deadline = now + run_timeout
+        deadline = timeout_deadline
+        if run_budget is not None and \
+                (deadline is None or now + run_budget < deadline):
+            deadline = now + run_budget
+        overrunning = {hv.backend.id for hv in self.plan.overrunning}
+
+        def collector_deadline(
+            hv_collector: HypervisorCollector
+        ) -> Optional[float]:
+            if hv_collector.backend.id in overrunning:
+                return timeout_deadline
+            return deadline
+
+        return collector_deadline
+
+    def as_completed(self) -> Generator[HypervisorCollector, None, None]:
+        """Run the hypervisor queries, yielding each collector as soon
+        as its backend query has completed.
+
+        If multiple workers are available the queries will be run
+        concurrently using a pool of threads, with queries started in
+        scheduled order as workers become available, while ensuring
+        that no more than the limit for a module are run at once.
+        Otherwise they will be run one at a time on a per-type basis.
+        """
+        hv_collectors = self._scheduled_hypervisors()
+
+        self._report_not_run()
+
+        if not hv_collectors:
+            return
+
+        deadlines = self._run_deadlines()
+
+        workers = self._settings.workers
+        if workers == 1:
+            for hv_collector in hv_collectors:
+                hv_collector.run(deadline=deadlines(hv_collector))
+                self._completed(hv_collector)
+                yield hv_collector
+            return
+
+        # queue the collectors per module, remembering the scheduled order
+        pending: Dict[str, Deque[Tuple[int, HypervisorCollector]]] = {
+            hv_type: deque() for hv_type in self.hypervisor_types
+        }
+        for index, hv_collector in enumerate(hv_collectors):
+            pending[hv_collector.backend.module].append((index, hv_collector))
+        active: Dict[str, int] = {hv_type: 0
+                                  for hv_type in self.hypervisor_types}
+
+        # no point in starting more threads than there are backends
+        pool_size = min(workers, len(hv_collectors))
+
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            running: Dict[Future, HypervisorCollector] = {}
+            while True:
+                # start as many queries as the worker and module limits
+                # permit; queries are only submitted when a worker is
+                # available, so none are left queued if we stop early.
+                while len(running) < pool_size:
+                    next_collector = self._next_dispatchable(pending, active)
+                    if next_collector is None:
+                        break
+                    active[next_collector.backend.module] += 1
+                    future = executor.submit(
+                        next_collector.run,
+                        deadline=deadlines(next_collector)
+                    )
+                    running[future] = next_collector
+
+                if not running:
+                    break
+
+                # yield completed collectors, re-raising any exceptions
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    hv_collector = running.pop(future)
+                    active[hv_collector.backend.module] -= 1
+                    future.result()
+                    self._completed(hv_collector)
+                    yield hv_collector
 
     def run(self) -> None:
-        """Run the hypervisor queries on a per-type basis."""
-        for hv_type in self.hypervisor_types:
-            self._run_hv_type_queries(hv_type)
+        """Run the hypervisor queries, concurrently if multiple workers
+        are available, otherwise one at a time on a per-type basis."""
+        for _ in self.as_completed():
+            pass
 
     @property
     def config(self) -> CollectorConfig:
         """The configuration that we are scheduling collection for."""
         return self._config
 
+    @property
+    def settings(self) -> SchedulerConfig:
+        """The scheduler settings in use."""
+        return self._settings
+
+    @property
+    def history(self) -> Optional[CollectionHistory]:
+        """The history of previous backend queries, if any."""
+        return self._history
+
+    @property
+    def spill_dir(self) -> Optional[Path]:
+        """The directory to which the details are spilled, if any."""
+        return self._spill_dir
+
+    @property
+    def plan(self) -> CollectionPlan:
+        """The plan for the backend queries."""
+        if self._derived.plan is None:
+            self._derived.plan = CollectionPlan(self._ordered_hypervisors(),
+                                                settings=self._settings,
+                                                history=self._history)
+        return self._derived.plan
+
+    @property
+    def deferred(self) -> Sequence[HypervisorCollector]:
+        """The collectors whose queries are deferred to a later run."""
+        return self.plan.deferred
+
+    @property
+    def skipped(self) -> Sequence[HypervisorCollector]:
+        """The collectors whose queries are skipped by the run."""
+        return self.plan.skipped
+
     @property
     def hypervisor_types(self) -> Set[str]:
         """The hypervisor types found in the configured backends."""
-        return self._hypervisor_types
+        return {hv.backend.module for hv in self._hypervisors}
 
     @property
     def hypervisor_groups(self) -> Dict[str, Sequence[HypervisorCollector]]:
         """HypervisorCollectors associated with configured backends."""
-        return dict(self._hypervisor_groups)
+        return {
+            t: [h for h in self._hypervisors if h.backend.module == t]
+            for t in self.hypervisor_types
+        }
 
     @property
     def hypervisors(self) -> Sequence[HypervisorCollector]:
@@ -196,6 +816,6 @@ class CollectionScheduler:
     @property
     def results(self) -> CollectionResults:
         """Return the collected results instance."""
-        if self._results is None:
-            self._results = CollectionResults(scheduler=self)
-        return self._results
+        if self._derived.results is None:
+            self._derived.results = CollectionResults(scheduler=self)
+        return self._derived.results
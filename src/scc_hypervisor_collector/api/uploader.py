@@ -4,13 +4,18 @@ SCC Hypervisor Collector SCCUploader
 The SCCUploader is responsible for uploading the hypervisor details
 collected from the specified backends to the SCC using the provided
 credentials.
+
+The details can be uploaded either as a whole, or streamed host by host
+into the compressed upload payload, so that the details of all of the
+hosts never need to be held in memory together.
 """
+import io
 import json
 import logging
 import gzip
 import sys
 import time
-from typing import (Dict, Optional)
+from typing import (Callable, Dict, Iterable, Optional)
 from importlib_metadata import version as get_package_version
 import requests
 from requests.exceptions import RequestException
@@ -49,8 +54,28 @@ class SCCUploader:
                path: str =
                '/connect/organizations/virtualization_hosts') -> None:
         """ Upload the collected details to SCC"""
+        self._upload(lambda delay: self.scc_put(details=details, path=path,
+                                                delay=delay),
+                     backend=backend, retry=retry)
+
+    def upload_hosts(self, hosts: Iterable[Dict], backend: str,
+                     retry: bool = False,
+                     path: str =
+                     '/connect/organizations/virtualization_hosts') -> None:
+        """Upload the collected details of each of the hosts to SCC,
+        streaming them into the compressed payload."""
+        payload = self.compress_hosts(hosts)
+        self._upload(lambda delay: self.scc_put_payload(payload=payload,
+                                                        path=path,
+                                                        delay=delay),
+                     backend=backend, retry=retry)
+
+    def _upload(self, put: Callable[[int], requests.Response],
+                backend: str, retry: bool) -> None:
+        """Upload to SCC using put(delay), retrying if requested when the
+        rate limit is hit."""
         try:
-            response = self.scc_put(details=details, path=path)
+            response = put(0)
             self.check_response_status(response, backend)
             if response.status_code == 429:
                 self._log.error("Too many requests have been sent to SCC")
@@ -60,9 +85,7 @@ class SCCUploader:
                     self._log.info("Waiting to upload to SCC for %s seconds "
                                    "before sending the request "
                                    "again", retry_delay_secs)
-                    response = self.scc_put(details=details,
-                                            path=path,
-                                            delay=retry_delay_secs)
+                    response = put(retry_delay_secs)
                     self.check_response_status(response, backend)
                 else:
                     self._log.error("Program will exit as it hit the rate "
@@ -77,9 +100,19 @@ class SCCUploader:
         """
         Calls the virtualization_hosts SCC API to upload the hypervisor details
         """
+        zipped_payload = gzip.compress(json.dumps(details).encode('utf-8'))
+
+        return self.scc_put_payload(payload=zipped_payload, path=path,
+                                    delay=delay)
+
+    def scc_put_payload(self, payload: bytes, path: str,
+                        delay: int = 0) -> requests.Response:
+        """
+        Calls the virtualization_hosts SCC API to upload the gzip compressed
+        hypervisor details payload
+        """
         headers = self.headers
         headers.update({'Content-Encoding': 'gzip'})
-        zipped_payload = gzip.compress(json.dumps(details).encode('utf-8'))
 
         if delay != 0:
             time.sleep(delay)
@@ -87,11 +120,29 @@ class SCCUploader:
         response = requests.put(self.scc_base_url + path,
                                 auth=self.auth,
                                 headers=headers,
-                                data=zipped_payload,
+                                data=payload,
                                 allow_redirects=False)
 
         return response
 
+    @staticmethod
+    def compress_hosts(hosts: Iterable[Dict]) -> bytes:
+        """
+        Return the gzip compressed JSON hypervisor details for the hosts,
+        encoding, and compressing, the details of one host at a time; the
+        result is the same as for compressing the details as a whole
+        """
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb') as fp:
+            fp.write(b'{"virtualization_hosts": [')
+            for index, host in enumerate(hosts):
+                if index:
+                    fp.write(b', ')
+                fp.write(json.dumps(host).encode('utf-8'))
+            fp.write(b']}')
+
+        return buffer.getvalue()
+
     def check_creds(self,
                     path: str =
                     '/connect/organizations/repositories') -> bool:
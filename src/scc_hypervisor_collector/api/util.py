@@ -1,15 +1,29 @@
 """SCC Hypervisor Collector API utility code."""
 
+from collections.abc import Mapping
 import getpass
+import resource
 import stat
+import sys
 from pathlib import Path
-from typing import Type
+from typing import (Any, Type)
+import yaml
 
 from .exceptions import (
     CollectorException,
     FilePermissionsError,
 )
 
+# Use the libyaml based safe loader and dumper when PyYAML was built
+# with libyaml support, as they are much faster, falling back to the
+# pure Python implementations otherwise.
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+    from yaml import CSafeDumper as YamlSafeDumper
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as YamlSafeLoader  # type: ignore
+    from yaml import SafeDumper as YamlSafeDumper  # type: ignore
+
 
 def check_permissions(
     path: Path,
@@ -40,3 +54,69 @@ def check_permissions(
         msg = f"User {current_user} should have read/write access " \
               f"to {path} but group and others should have no access."
         raise fail_exc(msg)
+
+
+def create_private_file(path: Path) -> None:
+    """Create the file, and its containing directories, if they don't
+    already exist, ensuring that only the user has access to the file.
+    """
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not path.exists():
+        path.touch(mode=0o600)
+    else:
+        path.chmod(mode=0o600)
+
+
+def plain_data(data: Any) -> Any:
+    """Return a copy of data consisting only of plain Python types.
+
+    Mappings are converted to dicts, and other collections to lists,
+    while subclasses of the basic scalar types, such as those returned
+    by some hypervisor SDKs, are converted to their base types. Any
+    other values are converted to strings.
+    """
+    if data is None or isinstance(data, bool):
+        return data
+
+    if isinstance(data, Mapping):
+        return {plain_data(k): plain_data(v) for k, v in data.items()}
+
+    if isinstance(data, (list, tuple, set, frozenset)):
+        return [plain_data(v) for v in data]
+
+    for base_type in (int, float, str):
+        if isinstance(data, base_type):
+            return base_type(data)
+
+    return str(data)
+
+
+def peak_rss_kb(children: bool = False) -> int:
+    """Return the peak RSS, in KiB, of the current process, or of the
+    largest of its terminated child processes if children is True."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children
+                               else resource.RUSAGE_SELF)
+
+    # ru_maxrss is reported in bytes, rather than KiB, on macOS
+    if sys.platform == 'darwin':
+        return usage.ru_maxrss // 1024
+    return usage.ru_maxrss
+
+
+def load_yaml(stream: Any) -> Any:
+    """Return the data loaded from the YAML stream, or string.
+
+    Equivalent to yaml.safe_load(), using the libyaml based loader if
+    available.
+    """
+    return yaml.load(stream, Loader=YamlSafeLoader)
+
+
+def dump_yaml(data: Any, stream: Any = None, **kwargs: Any) -> Any:
+    """Dump the data as YAML to the stream, or return it as a string if
+    no stream is specified.
+
+    Equivalent to yaml.safe_dump(), using the libyaml based dumper if
+    available.
+    """
+    return yaml.dump(data, stream, Dumper=YamlSafeDumper, **kwargs)
@@ -0,0 +1,217 @@
+"""
+SCC Hypervisor Collector ConfigValidator
+
+The ConfigValidator validates the config data loaded by a ConfigManager
+in bulk, validating the backends in parallel worker processes when there
+are many of them, and reports any errors found grouped by the config
+file, backend and setting that they apply to, so that the configs of
+thousands of generated backends can be checked quickly, and fixed.
+"""
+
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import logging
+import os
+from pathlib import Path
+from typing import (Any, Dict, Iterable, List, Optional, Sequence, Tuple)
+
+from .config_manager import ConfigManager
+from .configuration import BackendConfig, CollectorConfig, apply_template
+from .exceptions import BackendConfigError
+from .gatherer import module_registry
+
+# the (field, reason) pairs describing the errors found in a backend
+FieldErrors = List[Tuple[Optional[str], str]]
+
+
+def _backend_errors(backend: Any, templates: Mapping) -> FieldErrors:
+    """Return the (field, reason) pairs for the errors in the backend."""
+    if not isinstance(backend, Mapping):
+        return [(None, "backend entry should be a mapping")]
+
+    try:
+        return list(BackendConfig(apply_template(dict(backend), templates),
+                                  _check=True).field_errors)
+    except BackendConfigError as e:
+        return [(e.field, e.reason or str(e))]
+    except (TypeError, ValueError) as e:
+        # e.g. a module name that isn't a string
+        return [(None, f"invalid backend settings: {e}")]
+
+
+def _validate_backends(backends: Sequence[Any],
+                       cache_file: Optional[Path] = None,
+                       templates: Optional[Mapping] = None
+                       ) -> List[FieldErrors]:
+    """Return the errors found in each of the backends, using the
+    gatherer module cache file, if any, e.g. in a worker process."""
+    registry = module_registry()
+    if cache_file is not None and registry.cache_file != cache_file:
+        registry.use_cache(cache_file)
+
+    return [_backend_errors(b, templates or {}) for b in backends]
+
+
+class ConfigValidator:
+    """Bulk validation of the config data loaded by a ConfigManager.
+
+    The general config settings, i.e. the credentials and scheduler
+    settings, and the backend templates and generators, are validated
+    as usual, with any errors in them, including generated backends
+    whose ids conflict with those of other backends, being reported
+    as general errors. The backends are validated in chunks, by multiple
+    worker processes when there are many of them, using the cached
+    gatherer module parameters, if any, so that only the gatherer
+    modules used by the backends are imported.
+
+    The report groups the errors found in the backends by the config
+    file from which each backend was loaded, the backend's id, or its
+    position in the merged backends list if it has no id, and the field
+    that is in error, with errors that don't apply to a specific field
+    being reported against the '*' field.
+
+    Arguments:
+        config_manager (ConfigManager): the config manager whose config
+            data is to be validated.
+
+        backends_required (bool, default True): whether the config data
+            must specify backends.
+
+        workers (int, optional): the number of worker processes used to
+            validate the backends; defaults to a number based on how
+            many backends there are, and the available CPUs.
+
+    Special Methods:
+        validate(): validate the config data, returning the report, as
+            plain data.
+
+    Special Properties:
+        workers (int): the number of worker processes used to validate
+            the backends.
+    """
+
+    # the min number of backends per validation worker process
+    BACKENDS_PER_WORKER = 2500
+
+    # the field against which errors for a whole backend are reported
+    BACKEND_FIELD = '*'
+
+    def __init__(self, config_manager: ConfigManager,
+                 backends_required: bool = True,
+                 workers: Optional[int] = None):
+        """Initialiser for ConfigValidator"""
+        self._log = logging.getLogger(__name__)
+        self._config_manager: ConfigManager = config_manager
+        self._backends_required: bool = backends_required
+        self._workers: Optional[int] = workers
+
+    def _backends(self) -> Sequence[Any]:
+        """The merged backends list, if any."""
+        backends = self._config_manager.merged_data.get('backends')
+        return backends if isinstance(backends, list) else []
+
+    @property
+    def workers(self) -> int:
+        """The number of worker processes used to validate the backends."""
+        if self._workers is not None:
+            return max(self._workers, 1)
+
+        return max(min(os.cpu_count() or 1,
+                       len(self._backends()) // self.BACKENDS_PER_WORKER), 1)
+
+    def _templates(self) -> Mapping:
+        """The merged backend templates, if any."""
+        templates = self._config_manager.merged_data.get('backend_templates')
+        return templates if isinstance(templates, Mapping) else {}
+
+    def _general_errors(self) -> Tuple[List[str], int]:
+        """Validate the config settings other than the backends,
+        returning the errors found, and the number of generated
+        backends."""
+        merged_data = self._config_manager.merged_data
+        general_data = dict(merged_data, backends=[])
+        general_config = CollectorConfig(general_data, _check=True,
+                                         _backends_required=False)
+        errors = general_config.config_errors
+
+        # the generated backends were checked against each other, but
+        # not against the other backends.
+        generated = general_config.backends
+        backend_ids = {b.get('id') for b in self._backends()
+                       if isinstance(b, Mapping)}
+        conflicting_ids = [b.id for b in generated if b.id in backend_ids]
+        if conflicting_ids:
+            errors.append(f"Conflicting generated backend ids: "
+                          f"{conflicting_ids!r}")
+
+        backends = merged_data.get('backends')
+        if backends is None:
+            if self._backends_required and \
+                    'backend_generators' not in merged_data:
+                errors.append("No backends specified in config!")
+        elif not isinstance(backends, list):
+            errors.append("The backends entry should be a list!")
+
+        return errors, len(generated)
+
+    def _validate(self, backends: Sequence[Any]) -> Iterable[FieldErrors]:
+        """Validate the backends, returning the errors found in each of
+        them, in the same order as the backends."""
+        workers = self.workers
+        if workers > 1:
+            chunksize = max(len(backends) // (workers * 4), 1)
+            try:
+                chunks = [backends[i:i + chunksize]
+                          for i in range(0, len(backends), chunksize)]
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    return [errors
+                            for chunk_errors in executor.map(
+                                _validate_backends, chunks,
+                                repeat(module_registry().cache_file),
+                                repeat(self._templates()))
+                            for errors in chunk_errors]
+            except (NotImplementedError, OSError) as e:
+                # e.g. the platform doesn't support process pools
+                self._log.debug("Unable to validate backends in parallel, "
+                                "validating them serially: %s", e)
+
+        return _validate_backends(backends, templates=self._templates())
+
+    def validate(self) -> Dict[str, Any]:
+        """Validate the config data, returning the report."""
+        errors, generated_backends = self._general_errors()
+        backends = self._backends()
+        sources = self._config_manager.backend_sources
+
+        files: Dict[str, Dict[str, Dict[str, List[str]]]] = {}
+        invalid_backends = 0
+        for index, backend_errors in enumerate(self._validate(backends)):
+            if not backend_errors:
+                continue
+            invalid_backends += 1
+
+            source = sources[index] if index < len(sources) else None
+            backend = backends[index]
+            if isinstance(backend, Mapping) and 'id' in backend:
+                backend_name = str(backend['id'])
+            else:
+                backend_name = f"backends[{index}]"
+
+            fields = files.setdefault(
+                str(source) if source else 'unknown', {}
+            ).setdefault(backend_name, {})
+            for field, reason in backend_errors:
+                fields.setdefault(
+                    self.BACKEND_FIELD if field is None else str(field), []
+                ).append(reason)
+
+        return dict(
+            valid=not errors and not invalid_backends,
+            config_files=[str(f) for f in self._config_manager.config_files],
+            backends=len(backends),
+            generated_backends=generated_backends,
+            invalid_backends=invalid_backends,
+            errors=errors,
+            files=files,
+        )
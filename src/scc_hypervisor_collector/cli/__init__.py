@@ -2,14 +2,17 @@
 SCC Hypervisor Collect CLI Implementation
 """
 import argparse
+import json
 import logging
+import math
 import os
 import sys
+import tempfile
+import textwrap
 import traceback
 from pathlib import Path
 from typing import (Any, Optional, Sequence, Tuple)
 from logging.handlers import RotatingFileHandler
-import yaml
 
 from scc_hypervisor_collector import (
     __version__ as cli_version,
@@ -19,7 +22,14 @@ from scc_hypervisor_collector import (
     SCCUploader,
 )
 from scc_hypervisor_collector.api import (
-    CollectorException
+    CollectionHistory,
+    CollectionPipeline,
+    CollectorException,
+    ConfigValidator,
+    dump_yaml,
+    LoadOptions,
+    module_registry,
+    peak_rss_kb
 )
 
 
@@ -96,17 +106,115 @@ def upload(cfg_mgr: ConfigManager, collected: CollectionResults,
         Upload the hypervisor details to SCC
     """
     uploader = SCCUploader(cfg_mgr.config_data.credentials.scc)
-    for entry in collected.results:
-        if entry.get('valid'):
+    for hv_details in collected.hypervisor_details:
+        if hv_details.valid:
             logger.info("Uploading details to SCC for %s",
-                        entry['backend'])
-            uploader.upload(details=entry['details'],
-                            backend=entry['backend'],
-                            retry=retry)
+                        hv_details.backend)
+            uploader.upload_hosts(hosts=hv_details.hosts(),
+                                  backend=hv_details.backend,
+                                  retry=retry)
         else:
             logger.error("Not Uploading details to SCC for %s "
                          "as collection for this backend failed",
-                         entry['backend'])
+                         hv_details.backend)
+
+
+def load_history(state_dir: str,
+                 logger: logging.Logger) -> CollectionHistory:
+    """
+        Load the collection history from the state directory, ignoring
+        any previous history that cannot be used.
+    """
+    history = CollectionHistory(
+        Path(state_dir).expanduser() / 'history.json'
+    )
+    try:
+        history.load()
+    except CollectorException as e:
+        logger.warning("Ignoring collection history: %s", e)
+    return history
+
+
+def use_module_cache(state_dir: str) -> None:
+    """
+        Cache the gatherer module params in the state directory, so
+        that the config can be validated without importing the
+        gatherer worker modules that it doesn't use.
+    """
+    module_registry().use_cache(
+        Path(state_dir).expanduser() / 'gatherer-modules.json'
+    )
+
+
+def save_history(history: CollectionHistory,
+                 logger: logging.Logger) -> None:
+    """
+        Save the collection history, without failing the collection
+        run if it cannot be saved.
+    """
+    try:
+        history.save()
+    except (CollectorException, OSError) as e:
+        logger.warning("Failed to save collection history: %s", e)
+
+
+def lean_mode(args: argparse.Namespace, cfg_mgr: ConfigManager
+              ) -> Tuple[bool, Optional[tempfile.TemporaryDirectory]]:
+    """
+        Determine whether the collection run is lean, and if so create
+        a temporary directory, accessible only by the user, in the state
+        directory, to which the collected details will be spilled, unless
+        they are being pipelined to SCC.
+    """
+    lean = cfg_mgr.config_data.scheduler.lean if args.lean is None \
+        else args.lean
+    if not lean or args.pipeline or args.plan:
+        return lean, None
+
+    state_path = Path(args.state_dir).expanduser()
+    state_path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return lean, tempfile.TemporaryDirectory(prefix='spill-',
+                                             dir=str(state_path))
+
+
+def report_peak_memory(logger: logging.Logger) -> None:
+    """
+        Report the peak memory usage of the collection run.
+    """
+    logger.info("Peak memory usage: collector %d KiB, largest query "
+                "process %d KiB", peak_rss_kb(),
+                peak_rss_kb(children=True))
+
+
+def positive_int(value: str) -> int:
+    """Argument type checker for positive integer option values."""
+    try:
+        result = int(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            f"invalid positive integer value: {value!r}"
+        ) from e
+    if result < 1:
+        raise argparse.ArgumentTypeError(
+            f"invalid positive integer value: {value!r}"
+        )
+    return result
+
+
+def positive_float(value: str) -> float:
+    """Argument type checker for positive number option values."""
+    try:
+        result = float(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            f"invalid positive number value: {value!r}"
+        ) from e
+    # NaN isn't a positive number, though it isn't <= 0 either
+    if math.isnan(result) or result <= 0:
+        raise argparse.ArgumentTypeError(
+            f"invalid positive number value: {value!r}"
+        )
+    return result
 
 
 def create_options_parser() -> argparse.ArgumentParser:
@@ -135,9 +243,22 @@ def create_options_parser() -> argparse.ArgumentParser:
                         default='~/.config/scc-hypervisor-collector',
                         help="The config directory to check for YAML "
                              "config files.")
+    parser.add_argument('--state-dir',
+                        default='~/.local/state/scc-hypervisor-collector',
+                        help="The directory in which state, such as the "
+                             "history of previous backend queries used "
+                             "to schedule collection, and the cached "
+                             "gatherer module parameters and config "
+                             "data, is kept.")
     parser.add_argument('-C', '--check', action='store_true',
                         help="Check the configuration data "
                              "only, reporting any errors.")
+    parser.add_argument('--report', choices=('text', 'json'),
+                        action='store',
+                        help="How --check reports any errors; 'json' "
+                             "validates the backends in bulk, reporting "
+                             "the errors grouped by config file, backend "
+                             "and field, as JSON. Default: text")
     parser.add_argument('-S', '--scc-credentials-check', action='store_true',
                         help="Validate the SCC credentials supplied")
     default_log_destination = f"{os.path.expanduser('~')}/" \
@@ -153,6 +274,58 @@ def create_options_parser() -> argparse.ArgumentParser:
                         default=False, help="Retry uploading the data "
                                             "collected to SCC when rate limit "
                                             "is hit")
+    parser.add_argument('-w', '--workers', type=positive_int,
+                        action='store',
+                        help="The maximum number of backends to query "
+                             "concurrently, overriding the scheduler "
+                             "workers config setting.")
+    parser.add_argument('--executor', choices=('thread', 'process'),
+                        action='store',
+                        help="How backend queries are run; 'process' "
+                             "runs each backend query in a dedicated "
+                             "worker process, overriding the scheduler "
+                             "executor config setting.")
+    parser.add_argument('--backend-timeout', type=positive_float,
+                        action='store', metavar='SECONDS',
+                        help="The max number of seconds that a backend "
+                             "query may take, overriding the scheduler "
+                             "backend_timeout config setting.")
+    parser.add_argument('--run-timeout', type=positive_float,
+                        action='store', metavar='SECONDS',
+                        help="The max number of seconds that querying "
+                             "all backends may take, overriding the "
+                             "scheduler run_timeout config setting.")
+    parser.add_argument('--run-budget', type=positive_float,
+                        action='store', metavar='SECONDS',
+                        help="The number of seconds available for the "
+                             "run; backends not expected to complete "
+                             "in time, based on previous runs, are "
+                             "deferred to a later run, overriding the "
+                             "scheduler run_budget config setting.")
+    parser.add_argument('--lean', action='store_true', default=None,
+                        help="Release the raw results of each backend "
+                             "query once the details have been derived "
+                             "from them, spilling the details to disk, "
+                             "or uploading them when pipelining, to "
+                             "limit memory usage, overriding the "
+                             "scheduler lean config setting.")
+    parser.add_argument('--output-format',
+                        choices=CollectionResults.FORMATS, action='store',
+                        help="The format in which collection data is "
+                             "saved with --output; 'jsonl' writes one "
+                             "line of JSON per backend. Defaults to "
+                             "'jsonl' for .jsonl or .ndjson files, and "
+                             "'yaml' otherwise. The format is detected "
+                             "when loading with --input.")
+    parser.add_argument('--output-compression',
+                        choices=CollectionResults.COMPRESSIONS,
+                        action='store',
+                        help="The compression applied to collection data "
+                             "saved with --output; 'zstd' requires the "
+                             "zstandard module. Defaults to 'gzip' for "
+                             ".gz files, 'zstd' for .zst files, and "
+                             "'none' otherwise. The compression is "
+                             "detected when loading with --input.")
     io_group = parser.add_mutually_exclusive_group()
     io_group.add_argument('-i', '--input', type=Path, action='store',
                           help="File from which previously saved collection "
@@ -160,6 +333,15 @@ def create_options_parser() -> argparse.ArgumentParser:
     io_group.add_argument('-o', '--output', type=Path, action='store',
                           help="File in which to save collection data for "
                                "later reuse.")
+    io_group.add_argument('-p', '--plan', action='store_true',
+                          help="Report the projected collection schedule, "
+                               "including any deferred backends, without "
+                               "querying any backends.")
+    io_group.add_argument('-P', '--pipeline', action='store_true',
+                          help="Upload the details collected from each "
+                               "backend to SCC as soon as its query "
+                               "completes, while the other backends are "
+                               "still being queried; requires --upload.")
 
     return parser
 
@@ -180,6 +362,20 @@ def setup_logging(args: argparse.Namespace) -> Tuple[logging.Logger, int]:
     return (logger, log_level)
 
 
+def check_report(cfg_mgr: ConfigManager, backends_required: bool,
+                 log_level: int, logger: logging.Logger) -> None:
+    """Validate the config data in bulk, printing the JSON report."""
+    try:
+        report = ConfigValidator(cfg_mgr,
+                                 backends_required=backends_required
+                                 ).validate()
+    except CollectorException as e:
+        printlog(log_level, e, logger)
+        sys.exit(1)
+
+    print(json.dumps(report, indent=2))
+
+
 def fail_if_run_as_root() -> None:
     """Fail if effectively being run as root."""
     # Check for privileges - cannot be run as root
@@ -187,21 +383,31 @@ def fail_if_run_as_root() -> None:
         sys.exit('This tool cannot be run as root!')
 
 
-def main(argv: Optional[Sequence[str]] = None) -> None:
-    """Implements CLI for the scc-hypervisor-gatherer."""
+def check_options(parser: argparse.ArgumentParser,
+                  args: argparse.Namespace) -> None:
+    """Check that the options required by other options are specified."""
+    if args.pipeline and not args.upload:
+        parser.error("argument -P/--pipeline: requires -u/--upload")
 
-    parser = create_options_parser()
+    if args.report and not args.check:
+        parser.error("argument --report: requires -C/--check")
 
-    args = parser.parse_args(argv)
+    if args.output_format and not args.output:
+        parser.error("argument --output-format: requires -o/--output")
 
-    logger, log_level = setup_logging(args)
+    if args.output_compression and not args.output:
+        parser.error("argument --output-compression: requires -o/--output")
 
-    fail_if_run_as_root()
 
-    cfg_mgr = ConfigManager(config_file=args.config,
-                            config_dir=args.config_dir,
-                            check=args.check,
-                            backends_required=not args.input)
+def check_config(args: argparse.Namespace, cfg_mgr: ConfigManager,
+                 log_level: int, logger: logging.Logger) -> None:
+    """
+        Validate the config data, exiting once any errors have been
+        reported if --check is set.
+    """
+    if args.check and args.report == 'json':
+        check_report(cfg_mgr, not args.input, log_level, logger)
+        sys.exit(0)
 
     try:
         logger.info("ConfigManager: config_data = %s",
@@ -215,28 +421,105 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
             print(error)
         sys.exit(0)
 
-    check_scc_credentials(args.scc_credentials_check, cfg_mgr)
 
-    if args.input:
-        try:
-            collected_results = CollectionResults()
-            collected_results.load(args.input)
-        except CollectorException as e:
-            printlog(log_level, e, logger)
-            sys.exit(1)
-    else:
-        try:
-            scheduler = CollectionScheduler(cfg_mgr.config_data)
-            logger.debug("Scheduler: scheduler = %s", repr(scheduler))
-            scheduler.run()
-            collected_results = scheduler.results
-        except CollectorException as e:
-            printlog(log_level, e, logger)
-            sys.exit(1)
+def load_results(input_file: Path, log_level: int,
+                 logger: logging.Logger) -> CollectionResults:
+    """Load previously saved collection results, exiting on failure."""
+    try:
+        collected_results = CollectionResults()
+        collected_results.load(input_file)
+    except CollectorException as e:
+        printlog(log_level, e, logger)
+        sys.exit(1)
+    return collected_results
 
+
+def create_scheduler(args: argparse.Namespace, cfg_mgr: ConfigManager,
+                     history: CollectionHistory, lean: bool,
+                     spill_dir: Optional[tempfile.TemporaryDirectory]
+                     ) -> CollectionScheduler:
+    """
+        Create the collection scheduler, with the scheduler config
+        settings overridden by any specified options.
+    """
+    settings = cfg_mgr.config_data.scheduler.override(
+        workers=args.workers,
+        executor=args.executor,
+        backend_timeout=args.backend_timeout,
+        run_timeout=args.run_timeout,
+        run_budget=args.run_budget,
+        lean=lean
+    )
+    return CollectionScheduler(cfg_mgr.config_data,
+                               settings=settings,
+                               history=history,
+                               spill_dir=(Path(spill_dir.name)
+                                          if spill_dir else None))
+
+
+def run_scheduler(args: argparse.Namespace, cfg_mgr: ConfigManager,
+                  scheduler: CollectionScheduler, log_level: int,
+                  logger: logging.Logger) -> Optional[CollectionResults]:
+    """
+        Run the backend queries, returning the collected results, or
+        None if the details have been pipelined to SCC, and saving the
+        collection history, exiting on failure.
+    """
+    try:
+        if args.pipeline:
+            CollectionPipeline(
+                scheduler,
+                SCCUploader(cfg_mgr.config_data.credentials.scc),
+                retry=args.retry_on_rate_limit
+            ).run()
+            return None
+        scheduler.run()
+        return scheduler.results
+    except CollectorException as e:
+        printlog(log_level, e, logger)
+        sys.exit(1)
+    finally:
+        if scheduler.history is not None:
+            save_history(scheduler.history, logger)
+
+
+def print_results(collected_results: CollectionResults) -> None:
+    """
+        Print the results for each backend in turn, one host at a time,
+        rather than building the details for all of the backends, e.g.
+        reading them all back from their spill files, at once.
+    """
+    for hv_details in collected_results.hypervisor_details:
+        # the keys are printed in the sorted order used by dump_yaml()
+        print(dump_yaml(dict(backend=hv_details.backend)), end='')
+        hosts = hv_details.hosts()
+        host = next(hosts, None)
+        if host is None:
+            print("details:\n  virtualization_hosts: []")
+        else:
+            print("details:\n  virtualization_hosts:")
+        while host is not None:
+            # the hosts are wrapped as if they were already indented
+            print(textwrap.indent(
+                dump_yaml([host], width=CollectionResults.YAML_WIDTH - 2),
+                '  '
+            ), end='')
+            host = next(hosts, None)
+        print(dump_yaml(dict(valid=hv_details.valid)))
+
+
+def output_results(args: argparse.Namespace, cfg_mgr: ConfigManager,
+                   collected_results: CollectionResults, log_level: int,
+                   logger: logging.Logger) -> None:
+    """
+        Save the collected results, upload them to SCC, or print them,
+        as requested, exiting on failure.
+    """
     if args.output:
         try:
-            collected_results.save(args.output)
+            collected_results.save(args.output,
+                                   results_format=args.output_format,
+                                   compression=args.output_compression)
         except CollectorException as e:
             printlog(log_level, e, logger)
             sys.exit(1)
@@ -244,8 +527,67 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
         upload(cfg_mgr=cfg_mgr, collected=collected_results, logger=logger,
                retry=args.retry_on_rate_limit)
     else:
-        for hv in collected_results.results:
-            print(yaml.safe_dump(hv))
+        print_results(collected_results)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Implements CLI for the scc-hypervisor-gatherer."""
+
+    parser = create_options_parser()
+
+    args = parser.parse_args(argv)
+
+    check_options(parser, args)
+
+    logger, log_level = setup_logging(args)
+
+    fail_if_run_as_root()
+
+    use_module_cache(args.state_dir)
+
+    cfg_mgr = ConfigManager(config_file=args.config,
+                            config_dir=args.config_dir,
+                            check=args.check,
+                            backends_required=not args.input,
+                            options=LoadOptions(
+                                cache_file=str(
+                                    Path(args.state_dir).expanduser() /
+                                    'config-cache.json'
+                                ),
+                                frozen=True
+                            ))
+
+    check_config(args, cfg_mgr, log_level, logger)
+
+    check_scc_credentials(args.scc_credentials_check, cfg_mgr)
+
+    if args.input:
+        collected_results = load_results(args.input, log_level, logger)
+        output_results(args, cfg_mgr, collected_results, log_level, logger)
+        return
+
+    history = load_history(args.state_dir, logger)
+    lean, spill_dir = lean_mode(args, cfg_mgr)
+    try:
+        scheduler = create_scheduler(args, cfg_mgr, history, lean,
+                                     spill_dir)
+    except CollectorException as e:
+        printlog(log_level, e, logger)
+        sys.exit(1)
+
+    logger.debug("Scheduler: scheduler = %s", repr(scheduler))
+    if args.plan:
+        print(dump_yaml(scheduler.plan.report(), sort_keys=False))
+        sys.exit(0)
+
+    # the details have already been uploaded when pipelining
+    results = run_scheduler(args, cfg_mgr, scheduler, log_level, logger)
+    if results is not None:
+        output_results(args, cfg_mgr, results, log_level, logger)
+
+    report_peak_memory(logger)
+    if spill_dir is not None:
+        spill_dir.cleanup()
 
 
 __all__ = ['main']
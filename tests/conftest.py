@@ -44,6 +44,12 @@ def hypervisor_collector(backendid, config_manager):
     hypervisor_coll = HypervisorCollector(backend=filtered_list[0])
     return hypervisor_coll
 
+@pytest.fixture
+def forked_isolated_queries(monkeypatch):
+    # fork the isolated query worker processes, so that they inherit
+    # any mocks setup by the test
+    monkeypatch.setattr(HypervisorCollector, 'PROCESS_START_METHOD', 'fork')
+
 @pytest.fixture
 def scc_hypervisor_collector_cli(monkeypatch, tmp_path):
     monkeypatch.setenv("HOME", str(tmp_path))
@@ -0,0 +1,90 @@
+import asyncio
+import mock
+import pytest
+
+from scc_hypervisor_collector.api import (
+    AsyncCollectionScheduler,
+    CollectionScheduler,
+    HypervisorDetails,
+    SchedulerConfig,
+)
+from tests import utils
+
+
+def run_async(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsyncScheduler:
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('workers', [1, 3])
+    def test_async_scheduler_run(self, config_manager, workers):
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(workers=workers))
+        async_scheduler = AsyncCollectionScheduler(scheduler)
+        assert async_scheduler.scheduler is scheduler
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.slow_vcenter_worker_run):
+            run_async(async_scheduler.run())
+        for each in scheduler.hypervisors:
+            assert each.succeeded
+            utils.validate_mock_data(each, each.backend.id)
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_async_scheduler_as_completed(self, config_manager):
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(workers=3))
+        async_scheduler = AsyncCollectionScheduler(scheduler)
+
+        async def collect():
+            ticks = 0
+            completed = []
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker_task = asyncio.ensure_future(ticker())
+            async for hv_details in async_scheduler.as_completed():
+                completed.append(hv_details)
+            ticker_task.cancel()
+            return completed, ticks
+
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.slow_vcenter_worker_run):
+            completed, ticks = run_async(collect())
+
+        assert all(isinstance(d, HypervisorDetails) for d in completed)
+        assert all(d.valid for d in completed)
+        assert sorted(d.backend for d in completed) == \
+            sorted(b.id for b in config_manager.config_data.backends)
+        # the slowest backend finishes last, and didn't block the loop
+        assert completed[-1].backend == 'vcenter1'
+        assert ticks > 10
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_async_scheduler_early_exit(self, config_manager):
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(workers=1))
+        async_scheduler = AsyncCollectionScheduler(scheduler)
+
+        async def first():
+            agen = async_scheduler.as_completed()
+            async for hv_details in agen:
+                await agen.aclose()
+                return hv_details
+
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.slow_vcenter_worker_run):
+            hv_details = run_async(first())
+
+        assert hv_details.valid
+        # remaining queries were not started
+        assert sum(hv.pending for hv in scheduler.hypervisors) == 2
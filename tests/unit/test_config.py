@@ -1,7 +1,9 @@
 import os
+import mock
 import pytest
 
-from scc_hypervisor_collector.api import exceptions, ConfigManager, CredentialsConfig, BackendConfig
+from scc_hypervisor_collector.api import exceptions, ConfigManager, CredentialsConfig, BackendConfig, SchedulerConfig, CollectorConfig, LoadOptions, ModuleRegistry
+from scc_hypervisor_collector.api.config_manager import _ConfigMerger
 
 class TestConfigManager:
 
@@ -47,6 +49,102 @@ class TestConfigManager:
         assert 'Conflicting Backend IDs' in str(excinfo.value)
         assert 'multiple_VCenter_1' in excinfo.value.backend_ids
 
+    @pytest.mark.config(None, 'tests/unit/data/config/multiple_conflicts')
+    def test_backend_multiple_conflicts_config_load(self, config_manager):
+        with pytest.raises(exceptions.ConflictingBackendsError) as excinfo:
+            config_manager._load_config()
+        # all conflicts are reported, across all of the config files
+        assert excinfo.value.backend_ids == ['multiple_Libvirt_1',
+                                             'multiple_VCenter_1']
+
+    def test_merge_many_backends(self):
+        merger = _ConfigMerger()
+        backends = [dict(id=f"libvirt_{i}", module='Libvirt',
+                         uri=f"qemu+ssh://host{i}/system")
+                    for i in range(20000)]
+        cfg_data = dict(backends=backends[:10000])
+
+        # duplicates, with and without ids, are dropped
+        new_backends = backends[5000:] + [
+            {k: v for k, v in b.items() if k != 'id'}
+            for b in backends[:100]
+        ]
+        merger.merge(cfg_data, dict(backends=new_backends))
+        assert cfg_data['backends'] == backends
+
+        conflicting = [dict(b, uri='qemu:///system') for b in backends]
+        with pytest.raises(exceptions.ConflictingBackendsError) as excinfo:
+            merger.merge(cfg_data, dict(backends=conflicting))
+        assert excinfo.value.backend_ids == [b['id'] for b in backends]
+
+    def test_merge_many_idless_backends(self):
+        merger = _ConfigMerger()
+        backends = [dict(id=f"libvirt_{i}", module='Libvirt',
+                         uri=f"qemu+ssh://host{i}/system")
+                    for i in range(10000)]
+        idless = [{k: v for k, v in b.items() if k != 'id'}
+                  for b in backends]
+        cfg_data = dict(backends=idless + idless[:10])
+
+        # the first matching id-less backends are dropped, including
+        # when the index is reused by the next merge.
+        merger.merge(cfg_data, dict(backends=backends[::2]))
+        merger.merge(cfg_data, dict(backends=backends[1::2]))
+        assert cfg_data['backends'] == \
+            idless[:10] + backends[::2] + backends[1::2]
+
+    def test_load_options(self, tmp_path):
+        options = LoadOptions()
+        assert (options.config_cache, options.parse_workers,
+                options.frozen) == (None, None, False)
+        assert ConfigManager(config_file='unused.yaml').cache_file is None
+
+        cache_file = tmp_path / 'config-cache.json'
+        options = LoadOptions(cache_file=str(cache_file), parse_workers=2,
+                              frozen=True)
+        assert options.config_cache.file_path == cache_file
+        assert repr(options) == f"LoadOptions(cache_file={str(cache_file)!r}, " \
+                                "parse_workers=2, frozen=True)"
+        config_manager = ConfigManager(config_file='unused.yaml',
+                                       options=options)
+        assert config_manager.cache_file == cache_file
+        assert config_manager.parse_workers == 2
+
+    @pytest.mark.parametrize('parse_workers', [1, 3])
+    def test_parallel_config_load(self, tmp_path, parse_workers):
+        config_dir = tmp_path / 'config'
+        config_dir.mkdir(mode=0o700)
+        for i in range(20):
+            fragment = config_dir / f"site{i:02d}.yaml"
+            fragment.write_text(
+                f"credentials:\n"
+                f"  scc:\n"
+                f"    username: scc_username_{i}\n"
+                f"backends:\n"
+                f"  - id: libvirt_{i}\n"
+                f"    module: Libvirt\n"
+                f"    uri: qemu+ssh://host{i}/system\n"
+            )
+            fragment.chmod(0o600)
+        (config_dir / 'site05.yaml').write_text('')
+
+        config_manager = ConfigManager(
+            config_dir=str(config_dir),
+            options=LoadOptions(parse_workers=parse_workers))
+        assert config_manager.parse_workers == parse_workers
+        config_data = config_manager._load_config()
+        # merged in lexical order, regardless of parse order
+        assert config_data['credentials']['scc']['username'] == \
+            'scc_username_19'
+        assert [b['id'] for b in config_data['backends']] == \
+            [f"libvirt_{i}" for i in range(20) if i != 5]
+
+    @pytest.mark.config(None, 'tests/unit/data/config/multiple')
+    def test_parse_workers_default(self, config_manager):
+        assert len(config_manager.config_files) < \
+            ConfigManager.PARSE_FILES_PER_WORKER
+        assert config_manager.parse_workers == 1
+
     @pytest.mark.config(None, 'tests/unit/data/config/invalid')
     def test_invalid_dir_config_load(self, config_manager):
         config_data = config_manager._load_config()
@@ -246,3 +344,302 @@ class TestConfigManager:
     def test_logger(self, config_manager):
         logger = config_manager.config_data.logger
         assert 'scc_hypervisor_collector.api.configuration' in logger.name
+
+    @pytest.mark.config('tests/unit/data/config/scheduler/scheduler.yaml', None)
+    def test_scheduler_config(self, config_manager):
+        scheduler_config = config_manager.config_data.scheduler
+        assert isinstance(scheduler_config, SchedulerConfig)
+        assert scheduler_config.workers == 4
+        assert scheduler_config.executor == 'process'
+        assert scheduler_config.backend_timeout == 300
+        assert scheduler_config.run_timeout == 3300
+        timeouts = {b.id: b.timeout
+                    for b in config_manager.config_data.backends}
+        assert timeouts == {'scheduler_vmware_1': 1800.5,
+                            'scheduler_libvirt_1': None}
+        assert scheduler_config.module_limits == {'VMware': 1, 'Libvirt': 8}
+        assert scheduler_config.rate_limit == 12.5
+        rate_limits = {b.id: b.rate_limit
+                       for b in config_manager.config_data.backends}
+        assert rate_limits == {'scheduler_vmware_1': 2,
+                               'scheduler_libvirt_1': None}
+
+    @pytest.mark.config('tests/unit/data/config/default/default.yaml', None)
+    def test_scheduler_config_defaults(self, config_manager):
+        config_data = config_manager.config_data
+        assert 'scheduler' not in config_data
+        assert config_data.scheduler.workers == 1
+        assert config_data.scheduler.executor == 'thread'
+        assert config_data.scheduler.backend_timeout is None
+        assert config_data.scheduler.run_timeout is None
+        assert config_data.scheduler.module_limits == {}
+        assert config_data.scheduler.rate_limit is None
+
+    @pytest.mark.config('tests/unit/data/config/negative/invalidworkers.yaml', None)
+    def test_scheduler_config_invalid_workers(self, config_manager):
+        with pytest.raises(exceptions.CollectorConfigContentError,
+                           match=r"Invalid scheduler setting 'workers'"):
+            config_manager.config_data
+
+    def test_scheduler_config_invalid_workers_checkmode(self):
+        config_manager = ConfigManager(
+            config_file='tests/unit/data/config/negative/invalidworkers.yaml',
+            check=True)
+        errors = config_manager.config_data.config_errors
+        assert any("Invalid scheduler setting 'workers'" in e for e in errors)
+
+    def test_scheduler_config_invalid_executor(self):
+        with pytest.raises(exceptions.CollectorConfigContentError,
+                           match=r"Invalid scheduler setting 'executor'"):
+            SchedulerConfig(executor='greenlet')
+
+    @pytest.mark.parametrize('setting', ['backend_timeout', 'run_timeout',
+                                         'rate_limit'])
+    @pytest.mark.parametrize('value', [0, -1, 'soon', True])
+    def test_scheduler_config_invalid_timeouts(self, setting, value):
+        with pytest.raises(exceptions.CollectorConfigContentError,
+                           match=f"Invalid scheduler setting '{setting}'"):
+            SchedulerConfig({setting: value})
+
+    def test_scheduler_config_retry_policy(self):
+        scheduler_config = SchedulerConfig(retries=5, retry_backoff=2,
+                                           retry_multiplier=1.5,
+                                           retry_max_delay=60,
+                                           retry_jitter=0.25,
+                                           retry_max_elapsed=300,
+                                           circuit_breaker=3,
+                                           circuit_breaker_cooldown=2)
+        policy = scheduler_config.retry_policy
+        backoff = policy.backoff
+        assert (policy.retries, backoff.initial, backoff.multiplier,
+                backoff.max_delay, backoff.jitter, policy.max_elapsed) == \
+            (5, 2, 1.5, 60, 0.25, 300)
+        assert scheduler_config.circuit_breaker == 3
+        assert scheduler_config.circuit_breaker_cooldown == 2
+
+    def test_scheduler_config_retry_policy_defaults(self):
+        policy = SchedulerConfig().retry_policy
+        assert policy.retries == 3
+        assert policy.delay(1) == 0
+        assert SchedulerConfig().circuit_breaker is None
+        assert SchedulerConfig().circuit_breaker_cooldown == 1
+
+    def test_scheduler_config_lean(self):
+        assert SchedulerConfig().lean is False
+        assert SchedulerConfig(lean=True).lean is True
+
+    @pytest.mark.parametrize('setting,value', [
+        ('retries', 0), ('retry_backoff', -1), ('retry_jitter', 1.5),
+        ('retry_jitter', 'some'), ('circuit_breaker', 2.5),
+        ('circuit_breaker_cooldown', 0),
+        ('lean', 'yes'), ('lean', 1),
+    ])
+    def test_scheduler_config_invalid_retry_settings(self, setting, value):
+        with pytest.raises(exceptions.CollectorConfigContentError,
+                           match=f"Invalid scheduler setting '{setting}'"):
+            SchedulerConfig({setting: value})
+
+    @pytest.mark.parametrize('module_limits', [
+        4, ['VMware'], {'VMware': 0}, {'Libvirt': 'many'}, {'VMware': True},
+    ])
+    def test_scheduler_config_invalid_module_limits(self, module_limits):
+        with pytest.raises(exceptions.CollectorConfigContentError,
+                           match=r"Invalid scheduler setting 'module_limits'"):
+            SchedulerConfig(module_limits=module_limits)
+
+    @pytest.mark.parametrize('setting', ['timeout', 'rate_limit'])
+    def test_backend_config_invalid_timeout(self, setting):
+        with pytest.raises(exceptions.BackendConfigError,
+                           match=f"{setting} must be a positive number"):
+            BackendConfig(id='libvirt1', module='Libvirt',
+                          uri='qemu:///system', **{setting: 0})
+
+    def test_frozen_config(self):
+        config_manager = ConfigManager(
+            config_file='tests/unit/data/config/default/default.yaml',
+            options=LoadOptions(frozen=True))
+        config_data = config_manager.config_data
+        assert config_data.frozen
+        assert all(c.frozen for c in config_data.children)
+
+        # derived configs are returned as is, rather than rebuilt
+        assert config_data.credentials is config_data.credentials
+        assert config_data.credentials.scc is config_data.credentials.scc
+        assert config_data.backends is config_data.backends
+        assert config_data.scheduler is config_data.scheduler
+        assert config_data.scheduler.frozen
+        assert [b.id for b in config_data.backends] == \
+            ['default_vmware_1', 'default_libvirt_1']
+
+        # validity is determined once, when frozen
+        with mock.patch.object(BackendConfig, 'required_fields',
+                               new_callable=mock.PropertyMock) as required:
+            assert config_data.valid
+        required.assert_not_called()
+
+        with pytest.raises(TypeError, match='CollectorConfig is frozen'):
+            config_data['scheduler'] = {}
+        with pytest.raises(TypeError, match='BackendConfig is frozen'):
+            del config_data.backends[0]['id']
+        with pytest.raises(TypeError):
+            config_data.backends[0] = None
+
+    def test_frozen_default_scheduler(self):
+        configs = [
+            ConfigManager(
+                config_file='tests/unit/data/config/default/default.yaml',
+                options=LoadOptions(frozen=True)).config_data
+            for _ in range(2)
+        ]
+        # frozen configs without scheduler settings share the defaults
+        assert configs[0].scheduler is configs[1].scheduler
+        assert configs[0].scheduler is SchedulerConfig.default()
+        assert SchedulerConfig.default().frozen
+        assert SchedulerConfig.default().workers == 1
+
+    @pytest.mark.config('tests/unit/data/config/default/default.yaml', None)
+    def test_not_frozen_config(self, config_manager):
+        config_data = config_manager.config_data
+        assert not config_data.frozen
+        assert config_data.credentials is not config_data.credentials
+        assert config_data.backends is not config_data.backends
+        config_data['scheduler'] = SchedulerConfig(workers=2)
+        assert config_data.scheduler.workers == 2
+
+    def test_frozen_config_check_mode(self):
+        config_manager = ConfigManager(
+            config_file='tests/unit/data/config/negative/invalidworkers.yaml',
+            check=True, options=LoadOptions(frozen=True))
+        config_data = config_manager.config_data
+        assert not config_data.valid
+        assert any("Invalid scheduler setting 'workers'" in e
+                   for e in config_data.config_errors)
+
+    def test_config_slots(self):
+        backend = BackendConfig(id='libvirt1', module='Libvirt',
+                                uri='qemu:///system')
+        assert not hasattr(backend, '__dict__')
+        assert not hasattr(SchedulerConfig(), '__dict__')
+
+    @pytest.mark.config(None, 'tests/unit/data/config/templates')
+    def test_backend_templates_and_generators(self, config_manager):
+        config_data = config_manager.config_data
+        assert config_data.valid
+        backends = {b.id: b for b in config_data.backends}
+        assert list(backends) == [
+            'templates_vmware_1',
+            'lab_lab1.example.com', 'lab_lab2.example.com',
+            'lab_lab3.example.com',
+            'node001', 'node002', 'node003', 'node004',
+        ]
+        # template settings are used as defaults
+        assert backends['templates_vmware_1']['port'] == 443
+        assert 'template' not in backends['templates_vmware_1']
+        assert backends['lab_lab2.example.com']['uri'] == \
+            'qemu+ssh://lab2.example.com/system'
+        assert backends['node004']['uri'] == \
+            'qemu+ssh://node004.example.com/system'
+        assert all(b.valid for b in backends.values())
+
+        # sensitive template and generated settings aren't rendered
+        assert 'VMware_Account_Password' not in repr(config_data)
+        assert 'Libvirt_Account_Password' not in repr(config_data)
+        assert 'Libvirt_Account_Password' not in \
+            repr(backends['node001'])
+
+    def test_generated_backends_lazy(self):
+        config_manager = ConfigManager(
+            config_dir='tests/unit/data/config/templates',
+            options=LoadOptions(frozen=True))
+        with mock.patch.object(ModuleRegistry, 'has_module',
+                               autospec=True,
+                               side_effect=ModuleRegistry.has_module
+                               ) as has_module:
+            config_data = config_manager.config_data
+            calls = has_module.call_count
+
+            # only the first backend of each generator has been validated
+            assert calls == 2 + 1 + 2
+            backends = config_data.backends
+            assert has_module.call_count == calls
+        assert len(backends) == 8
+        assert backends is config_data.backends
+        assert all(b.frozen for b in backends)
+
+    def test_backend_generator_conflicts(self):
+        config = dict(
+            credentials=dict(scc=dict(username='u', password='p')),
+            backends=[dict(id='lab2', module='Libvirt', uri='qemu:///system')],
+            backend_generators=[dict(id='lab{host}', module='Libvirt',
+                                     uri='qemu+ssh://lab{host}/system',
+                                     range=dict(start=1, stop=4))],
+        )
+        config_data = CollectorConfig(config)
+        with pytest.raises(exceptions.ConflictingBackendsError) as e:
+            config_data.backends
+        assert e.value.backend_ids == ['lab2']
+
+        config_data = CollectorConfig(config, _check=True)
+        assert not config_data.valid
+        assert config_data.config_errors == \
+            ["Conflicting generated backend ids: ['lab2']"]
+        assert [b.id for b in config_data.backends] == \
+            ['lab2', 'lab1', 'lab3']
+
+    @pytest.mark.parametrize('generator,error', [
+        (dict(module='Libvirt'), 'exactly one of hosts or range'),
+        (dict(module='Libvirt', hosts=['a'], range=dict(start=1, stop=2)),
+         'exactly one of hosts or range'),
+        (dict(module='Libvirt', hosts='a'), 'hosts should be a list'),
+        (dict(module='Libvirt', range=dict(start=1)), 'range should'),
+        (dict(template='unknown', hosts=['a']), "template 'unknown'"),
+        (dict(module='Libvirt', hosts=['a']), "missing required field"),
+        (dict(module='Libvirt', uri='{index:x}', hosts=['a'], id='{host:d}'),
+         'Unknown format code'),
+    ])
+    def test_backend_generator_invalid(self, generator, error):
+        config = dict(
+            credentials=dict(scc=dict(username='u', password='p')),
+            backend_generators=[generator],
+        )
+        with pytest.raises(exceptions.BackendConfigError, match=error):
+            CollectorConfig(config)
+
+        config_data = CollectorConfig(config, _check=True)
+        assert not config_data.valid
+        assert len(config_data.config_errors) == 1
+        assert error in config_data.config_errors[0]
+        assert config_data.backends == []
+
+    def test_backend_template_invalid(self):
+        config = dict(
+            credentials=dict(scc=dict(username='u', password='p')),
+            backend_templates=dict(bad=dict(module='Unknown'),
+                                   with_id=dict(id='x')),
+            backends=[dict(id='b1', template='missing')],
+        )
+        config_data = CollectorConfig(config, _check=True)
+        errors = config_data.config_errors
+        assert len(errors) == 3
+        assert "template 'bad' - module 'Unknown'" in errors[0]
+        assert "template 'with_id' - templates can't specify an id" in \
+            errors[1]
+        assert "template 'missing' is not one of the backend templates" \
+            in errors[2]
+
+    def test_backend_templates_merged(self, tmp_path):
+        config_dir = tmp_path / 'config'
+        config_dir.mkdir(mode=0o700)
+        for name, content in (
+            ('00.yaml', 'backend_templates: {a: {port: 1}, b: {port: 2}}\n'
+                        'backend_generators: [{hosts: [x]}]\n'),
+            ('10.yaml', 'backend_templates: {b: {port: 3}, c: {port: 4}}\n'
+                        'backend_generators: [{hosts: [y]}]\n'),
+        ):
+            (config_dir / name).write_text(content)
+            (config_dir / name).chmod(0o600)
+        merged_data = ConfigManager(config_dir=str(config_dir)).merged_data
+        assert merged_data['backend_templates'] == \
+            dict(a=dict(port=1), b=dict(port=3), c=dict(port=4))
+        assert merged_data['backend_generators'] == \
+            [dict(hosts=['x']), dict(hosts=['y'])]
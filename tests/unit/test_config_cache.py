@@ -0,0 +1,152 @@
+import os
+import shutil
+import mock
+import pytest
+
+from scc_hypervisor_collector.api import (
+    ConfigCache, ConfigManager, exceptions, LoadOptions
+)
+from scc_hypervisor_collector.api import config_manager
+from scc_hypervisor_collector.api.config_cache import load_config_text
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    config_dir = tmp_path / 'config'
+    shutil.copytree('tests/unit/data/config/default', str(config_dir))
+    return config_dir
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return tmp_path / 'state' / 'config-cache.json'
+
+
+def load_config(config_dir, cache_file):
+    return ConfigManager(config_dir=str(config_dir),
+                         options=LoadOptions(cache_file=str(cache_file))
+                         ).config_data
+
+
+class TestConfigCache:
+
+    def test_cache_saved(self, config_dir, cache_file):
+        config_data = load_config(config_dir, cache_file)
+        assert config_data.credentials.scc.username == 'default_scc_username'
+        assert (cache_file.parent.stat().st_mode & 0o777) == 0o700
+        assert (cache_file.stat().st_mode & 0o777) == 0o600
+
+    def test_cache_used(self, config_dir, cache_file):
+        config_data = load_config(config_dir, cache_file)
+
+        with mock.patch.object(config_manager, 'load_config_text') as parse:
+            cached_data = load_config(config_dir, cache_file)
+        parse.assert_not_called()
+        assert repr(cached_data) == repr(config_data)
+        assert [b.id for b in cached_data.backends] == \
+            [b.id for b in config_data.backends]
+
+    def test_cache_config_changed(self, config_dir, cache_file):
+        load_config(config_dir, cache_file)
+
+        config_file = config_dir / 'default.yaml'
+        content = config_file.read_text()
+        config_file.write_text(content.replace('default_scc_username',
+                                               'changed_scc_username'))
+        config_data = load_config(config_dir, cache_file)
+        assert config_data.credentials.scc.username == 'changed_scc_username'
+
+    def test_cache_no_secrets(self, config_dir, cache_file):
+        config_data = load_config(config_dir, cache_file)
+
+        content = cache_file.read_text()
+        for secret in ('default_scc_password', 'VMware_Account_Password',
+                       'Libvirt_Account_Password'):
+            assert secret not in content
+
+        with mock.patch.object(config_manager, 'load_config_text') as parse:
+            cached_data = load_config(config_dir, cache_file)
+        parse.assert_not_called()
+        assert cached_data.credentials.scc.password == \
+            config_data.credentials.scc.password == 'default_scc_password'
+        assert [dict(b) for b in cached_data.backends] == \
+            [dict(b) for b in config_data.backends]
+
+    def test_cache_templated_secrets(self, config_dir, cache_file):
+        extra_file = config_dir / 'extra.yaml'
+        extra_file.write_text(
+            'backend_templates:\n'
+            '  lab: &lab\n'
+            '    module: VMware\n'
+            '    username: "lab_user"\n'
+            '    password: |\n'
+            '      Lab_Päss\n'
+            '  other:\n'
+            '    <<: *lab\n'
+        )
+        extra_file.chmod(0o600)
+        config_data = load_config(config_dir, cache_file)
+        assert 'Lab_Päss' not in cache_file.read_text(encoding='utf-8')
+
+        cached_data = load_config(config_dir, cache_file)
+        assert cached_data['backend_templates'] == \
+            config_data['backend_templates']
+        assert cached_data['backend_templates']['other']['password'] == \
+            'Lab_Päss\n'
+
+    def test_cache_unlocated_secrets(self, config_dir, cache_file):
+        extra_file = config_dir / 'extra.yaml'
+        extra_file.write_text('credentials:\n'
+                              '  scc:\n'
+                              '    username: "extra_scc_username"\n'
+                              '    password: ["not", "a", "scalar"]\n')
+        extra_file.chmod(0o600)
+        load_config(config_dir, cache_file)
+        assert not cache_file.exists()
+
+    def test_cache_config_added(self, config_dir, cache_file):
+        load_config(config_dir, cache_file)
+
+        extra_file = config_dir / 'extra.yaml'
+        extra_file.write_text('scheduler:\n  workers: 3\n')
+        extra_file.chmod(0o600)
+        assert load_config(config_dir, cache_file).scheduler.workers == 3
+
+    def test_cache_bad_permissions(self, config_dir, cache_file):
+        load_config(config_dir, cache_file)
+        cache_file.chmod(0o644)
+
+        with mock.patch.object(config_manager, 'load_config_text',
+                               side_effect=load_config_text) as parse:
+            load_config(config_dir, cache_file)
+        parse.assert_called()
+        assert (cache_file.stat().st_mode & 0o777) == 0o600
+
+    def test_cache_invalid(self, config_dir, cache_file):
+        cache_file.parent.mkdir(mode=0o700)
+        cache_file.write_text('{"version": 1, "config": [')
+        cache_file.chmod(0o600)
+        config_data = load_config(config_dir, cache_file)
+        assert config_data.credentials.scc.username == 'default_scc_username'
+
+    def test_cache_config_permissions_checked(self, config_dir, cache_file):
+        load_config(config_dir, cache_file)
+
+        os.chmod(str(config_dir / 'default.yaml'), 0o644)
+        with pytest.raises(exceptions.ConfigFilePermissionsError):
+            load_config(config_dir, cache_file)
+
+    def test_cache_not_json(self, config_dir, cache_file):
+        extra_file = config_dir / 'extra.yaml'
+        extra_file.write_text('updated: 2022-01-01\n')
+        extra_file.chmod(0o600)
+        config_data = load_config(config_dir, cache_file)
+        assert 'updated' in config_data
+        assert not cache_file.exists()
+
+    def test_fingerprint(self, config_dir):
+        config_files = sorted(config_dir.glob('*.yaml'))
+        fingerprint = ConfigCache.fingerprint(config_files)
+        assert [f['path'] for f in fingerprint] == \
+            [str(f.resolve()) for f in config_files]
+        assert all(len(f['sha256']) == 64 for f in fingerprint)
@@ -6,4 +6,12 @@ class TestExceptions:
   
     def test_empty_exception_message(self):
         e = exceptions.CollectorException()
-        assert e.message is None
\ No newline at end of file
+        assert e.message is None
+
+    def test_backend_config_error_field(self):
+        e = exceptions.BackendConfigError("Invalid backend - missing "
+                                          "required field: id",
+                                          'id', "missing required field")
+        assert e.field == 'id'
+        assert e.reason == "missing required field"
+        assert str(e) == "Invalid backend - missing required field: id"
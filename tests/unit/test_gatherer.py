@@ -0,0 +1,251 @@
+import importlib
+import json
+import sys
+import threading
+import mock
+import pytest
+
+from gatherer.gatherer import Gatherer
+
+from scc_hypervisor_collector.api import (
+    BackendConfig, ModuleRegistry, module_registry, reset_module_registry,
+    VHGatherer
+)
+from scc_hypervisor_collector.api import gatherer as gatherer_module
+from scc_hypervisor_collector.api.gatherer import gatherer_version
+
+
+@pytest.fixture
+def list_modules():
+    # ensure that the modules will be loaded afresh by the test
+    reset_module_registry()
+    with mock.patch.object(Gatherer, 'list_modules', autospec=True,
+                           side_effect=Gatherer.list_modules) as list_modules:
+        yield list_modules
+    reset_module_registry()
+
+
+class TestModuleRegistry:
+
+    def test_registry_shared(self, list_modules):
+        backends = [
+            BackendConfig(id=f"libvirt{i}", module='Libvirt',
+                          uri=f"qemu+ssh://host{i}/system")
+            for i in range(50)
+        ]
+        # the Libvirt module is only loaded once, on its own
+        list_modules.assert_not_called()
+        assert module_registry().loaded_modules == {'Libvirt'}
+        assert all(b.gatherer.registry is module_registry()
+                   for b in backends)
+        assert len({id(b.worker_params) for b in backends}) == 1
+        assert len({id(b.worker) for b in backends}) == 1
+
+        # all modules are loaded, once, when they are all needed
+        assert 'Libvirt' in backends[0].gatherer.module_names
+        assert 'VMware' in backends[1].gatherer.module_names
+        list_modules.assert_called_once()
+
+    def test_registry_not_lazy(self, list_modules):
+        registry = ModuleRegistry(lazy=False)
+        assert not registry.lazy
+        gatherer = VHGatherer(registry=registry)
+        for _ in range(5):
+            assert gatherer.get_worker('Libvirt') is not None
+        list_modules.assert_called_once()
+        assert {'Libvirt', 'VMware'} <= registry.loaded_modules
+
+    def test_registry_lazy_imports(self, list_modules, monkeypatch):
+        # forget any previously imported worker modules
+        for name in list(sys.modules):
+            if name.startswith('gatherer.modules.'):
+                monkeypatch.delitem(sys.modules, name)
+
+        registry = ModuleRegistry()
+        assert registry.lazy
+        assert registry.get_worker('Libvirt') is not None
+        assert registry.get_module_params('Libvirt')
+        assert registry.get_worker('Unknown') is None
+        assert registry.get_module_params('Unknown') == {}
+        assert registry.loaded_modules == {'Libvirt'}
+        assert 'gatherer.modules.Libvirt' in sys.modules
+        assert 'gatherer.modules.VMware' not in sys.modules
+        list_modules.assert_not_called()
+
+    def test_registry_lazy_invalid_module(self, list_modules, monkeypatch):
+        registry = ModuleRegistry()
+        libvirt = importlib.import_module('gatherer.modules.Libvirt')
+        monkeypatch.setattr(libvirt, 'IS_VALID', False)
+        assert registry.get_worker('Libvirt') is None
+        list_modules.assert_not_called()
+
+    def test_registry_lazy_fallback(self, list_modules):
+        registry = ModuleRegistry()
+        # simulate an unexpected gatherer module layout
+        with mock.patch.object(ModuleRegistry, '_import_worker',
+                               side_effect=AttributeError):
+            assert registry.get_worker('Libvirt') is not None
+        assert not registry.lazy
+        list_modules.assert_called_once()
+
+    def test_registry_threads(self, list_modules):
+        registry = ModuleRegistry()
+        barrier = threading.Barrier(8)
+        params = []
+
+        def load():
+            barrier.wait()
+            params.append(registry.module_params)
+
+        threads = [threading.Thread(target=load) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        list_modules.assert_called_once()
+        assert all(p is params[0] for p in params)
+
+    def test_registry_reset(self, list_modules):
+        registry = ModuleRegistry(lazy=False)
+        gatherer = VHGatherer(registry=registry)
+        assert gatherer.get_worker('Libvirt') is not None
+        assert gatherer.get_worker('Unknown') is None
+        registry.reset()
+        assert gatherer.get_module_params('Libvirt')
+        assert list_modules.call_count == 2
+
+    def test_create_worker(self, list_modules):
+        gatherer = VHGatherer()
+        worker = gatherer.create_worker('Libvirt')
+        assert worker is not None
+        assert worker is not gatherer.get_worker('Libvirt')
+        assert type(worker) is type(gatherer.get_worker('Libvirt'))
+        assert gatherer.create_worker('Unknown') is None
+
+
+class TestModuleCache:
+
+    def test_cache_written(self, list_modules, tmp_path):
+        cache_file = tmp_path / 'state' / 'gatherer-modules.json'
+        registry = ModuleRegistry(cache_file=cache_file)
+        assert registry.cache_file == cache_file
+        assert registry.has_module('Libvirt')
+        assert not registry.has_module('Unknown')
+        assert (cache_file.parent.stat().st_mode & 0o777) == 0o700
+        assert (cache_file.stat().st_mode & 0o777) == 0o600
+
+        cache = json.loads(cache_file.read_text())
+        assert cache['gatherer_version'] == gatherer_version()
+        assert cache['modules']['Libvirt'] == \
+            registry.get_module_params('Libvirt')
+        # unavailable modules aren't cached
+        assert 'Unknown' not in cache['modules']
+        list_modules.assert_not_called()
+
+    def test_cache_used(self, list_modules, tmp_path):
+        cache_file = tmp_path / 'gatherer-modules.json'
+        registry = ModuleRegistry(cache_file=cache_file)
+        params = registry.get_module_params('Libvirt')
+        names = registry.module_names
+        list_modules.assert_called_once()
+
+        # only the gatherer modules used are loaded when using the cache
+        registry = ModuleRegistry(cache_file=cache_file)
+        with mock.patch.object(ModuleRegistry, '_import_worker',
+                               return_value=(mock.Mock(), {})) as imp:
+            assert registry.get_module_params('Libvirt') == params
+            assert registry.get_module_params('Libvirt') == params
+            assert registry.has_module('VMware')
+        assert [c.args for c in imp.call_args_list] == [('Libvirt',),
+                                                        ('VMware',)]
+        list_modules.assert_called_once()
+
+        # whereas unavailable modules are checked again
+        assert not registry.has_module('Unknown')
+        assert registry.module_names == names
+        assert list_modules.call_count == 2
+
+    def test_cache_module_becomes_available(self, list_modules, tmp_path):
+        cache_file = tmp_path / 'gatherer-modules.json'
+        registry = ModuleRegistry(cache_file=cache_file)
+        assert registry.has_module('VMware')
+
+        # the Libvirt module's dependencies aren't installed
+        with mock.patch.object(ModuleRegistry, '_import_worker',
+                               return_value=None):
+            assert not registry.has_module('Libvirt')
+        cache = json.loads(cache_file.read_text())
+        assert list(cache['modules']) == ['VMware']
+
+        # once they are, the next run finds the module
+        registry = ModuleRegistry(cache_file=cache_file)
+        assert registry.has_module('Libvirt')
+        assert registry.loaded_modules == {'Libvirt'}
+        cache = json.loads(cache_file.read_text())
+        assert sorted(cache['modules']) == ['Libvirt', 'VMware']
+
+    def test_cache_module_no_longer_available(self, list_modules, tmp_path,
+                                              caplog):
+        cache_file = tmp_path / 'gatherer-modules.json'
+        registry = ModuleRegistry(cache_file=cache_file)
+        assert registry.has_module('Libvirt')
+        assert registry.has_module('VMware')
+
+        # the Libvirt module's dependencies have since been uninstalled
+        registry = ModuleRegistry(cache_file=cache_file)
+        with mock.patch.object(ModuleRegistry, '_import_worker',
+                               return_value=None):
+            assert not registry.has_module('Libvirt')
+            assert registry.get_module_params('Libvirt') == {}
+        assert 'Gatherer module \'Libvirt\' is no longer available' in \
+            caplog.text
+        cache = json.loads(cache_file.read_text())
+        assert list(cache['modules']) == ['VMware']
+        list_modules.assert_not_called()
+
+    def test_cache_version_changed(self, list_modules, tmp_path,
+                                   monkeypatch):
+        cache_file = tmp_path / 'gatherer-modules.json'
+        ModuleRegistry(cache_file=cache_file).has_module('Libvirt')
+
+        monkeypatch.setattr(gatherer_module, 'gatherer_version',
+                            lambda: '999.0')
+        registry = ModuleRegistry(cache_file=cache_file)
+        assert registry.has_module('Libvirt')
+        assert registry.loaded_modules == {'Libvirt'}
+        cache = json.loads(cache_file.read_text())
+        assert cache['gatherer_version'] == '999.0'
+
+    def test_cache_invalid(self, list_modules, tmp_path):
+        cache_file = tmp_path / 'gatherer-modules.json'
+        cache_file.write_text('not: [json')
+        cache_file.chmod(0o600)
+        registry = ModuleRegistry(cache_file=cache_file)
+        assert registry.has_module('Libvirt')
+        assert registry.loaded_modules == {'Libvirt'}
+
+    def test_cache_bad_permissions(self, list_modules, tmp_path):
+        cache_file = tmp_path / 'gatherer-modules.json'
+        ModuleRegistry(cache_file=cache_file).has_module('Libvirt')
+        cache_file.chmod(0o644)
+
+        registry = ModuleRegistry(cache_file=cache_file)
+        assert registry.has_module('Libvirt')
+        assert registry.loaded_modules == {'Libvirt'}
+
+    def test_cache_backend_config(self, list_modules, tmp_path):
+        cache_file = tmp_path / 'gatherer-modules.json'
+        module_registry().use_cache(cache_file)
+        try:
+            BackendConfig(id='libvirt1', module='Libvirt',
+                          uri='qemu+ssh://host1/system')
+            reset_module_registry()
+
+            # validating the config doesn't need all of the modules
+            backend = BackendConfig(id='libvirt2', module='Libvirt',
+                                    uri='qemu+ssh://host2/system')
+            assert backend.worker_params
+            assert backend.worker is not None
+            list_modules.assert_not_called()
+        finally:
+            module_registry().use_cache(None)
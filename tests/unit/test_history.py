@@ -0,0 +1,215 @@
+import json
+import stat
+import time
+import mock
+import pytest
+
+from scc_hypervisor_collector.api import (
+    exceptions, CollectionHistory, CollectionScheduler, HypervisorCollector,
+    QueryOptions, SchedulerConfig
+)
+from tests import utils
+
+
+def get_backend(config_manager, backend_id):
+    return [b for b in config_manager.config_data.backends
+            if b.id == backend_id][0]
+
+
+class TestCollectionHistory:
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_history_record(self, config_manager):
+        history = CollectionHistory()
+        backend = get_backend(config_manager, 'libvirt1')
+        assert history.expected_duration('libvirt1') is None
+        assert history.consecutive_failures('libvirt1') == 0
+
+        for duration, status in [(10, 'success'), (20, 'failure'),
+                                 (30, 'failure')]:
+            hv_collector = HypervisorCollector(backend)
+            hv_collector._state.status = status
+            hv_collector._state.duration = duration
+            history.record(hv_collector)
+
+        # the estimate is smoothed towards the latest durations
+        assert history.expected_duration('libvirt1') == 22.5
+        assert history.expected_duration('libvirt1', 'Libvirt') == 22.5
+        assert history.expected_duration('libvirt1', 'VMware') is None
+        assert history.consecutive_failures('libvirt1') == 2
+        entry = history.entries['libvirt1']
+        assert entry['status'] == 'failure'
+        assert entry['last_duration'] == 30
+
+        hv_collector = HypervisorCollector(backend)
+        hv_collector._state.status = 'success'
+        history.record(hv_collector)
+        assert history.consecutive_failures('libvirt1') == 0
+        # queries that weren't run don't change the estimate
+        assert history.expected_duration('libvirt1') == 22.5
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_history_record_run_deadline(self, config_manager):
+        history = CollectionHistory()
+        backend = get_backend(config_manager, 'libvirt1')
+
+        # queries that weren't started, or were cut short by the run's
+        # deadline, aren't counted as failures of the backend
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        side_effect=lambda: time.sleep(1)):
+            not_started = HypervisorCollector(backend)
+            not_started.run(deadline=time.monotonic() - 1)
+            cut_short = HypervisorCollector(backend)
+            cut_short.run(deadline=time.monotonic() + 0.1)
+            for hv_collector in (not_started, cut_short):
+                assert hv_collector.failed
+                assert hv_collector.deadline_exceeded
+                history.record(hv_collector)
+                assert history.entries['libvirt1']['status'] == 'failure'
+                assert history.consecutive_failures('libvirt1') == 0
+
+            # whereas queries that exceed their own timeout are
+            timed_out = HypervisorCollector(
+                backend, options=QueryOptions(timeout=0.1))
+            timed_out.run(deadline=time.monotonic() + 30)
+        assert timed_out.timed_out
+        assert not timed_out.deadline_exceeded
+        history.record(timed_out)
+        assert history.consecutive_failures('libvirt1') == 1
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_history_save_load(self, config_manager, tmp_path):
+        history_file = tmp_path / 'state' / 'history.json'
+        history = CollectionHistory(history_file)
+        history.load()
+        assert history.entries == {}
+
+        hv_collector = HypervisorCollector(
+            get_backend(config_manager, 'vcenter1'))
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run):
+            hv_collector.run()
+        history.record(hv_collector)
+        history.save()
+
+        assert stat.S_IMODE(history_file.parent.stat().st_mode) == 0o700
+        assert stat.S_IMODE(history_file.stat().st_mode) == 0o600
+
+        loaded = CollectionHistory(history_file)
+        loaded.load()
+        assert loaded.entries == history.entries
+        assert loaded.expected_duration('vcenter1') == hv_collector.duration
+
+    @pytest.mark.parametrize('content', [
+        'not json', '[]', '{"version": 0, "backends": {}}',
+        '{"version": 1, "backends": {"libvirt1": 10}}',
+    ])
+    def test_history_load_invalid(self, tmp_path, content, caplog):
+        history_file = tmp_path / 'history.json'
+        history_file.write_text(content)
+        history_file.chmod(0o600)
+        history = CollectionHistory(history_file)
+        history.load()
+        assert history.entries == {}
+        assert 'Ignoring' in caplog.text
+
+    @pytest.mark.parametrize('entry', [
+        dict(module='Libvirt', duration='10'),
+        dict(module='Libvirt', duration=None, consecutive_failures='2'),
+        dict(module='Libvirt', duration=-1),
+        dict(module='Libvirt', duration=True),
+    ])
+    def test_history_load_invalid_entry(self, tmp_path, entry, caplog):
+        history_file = tmp_path / 'history.json'
+        valid = dict(module='VMware', duration=10, consecutive_failures=0)
+        history_file.write_text(json.dumps(dict(
+            version=1, backends=dict(libvirt1=entry, vcenter1=valid))))
+        history_file.chmod(0o600)
+        history = CollectionHistory(history_file)
+        history.load()
+        # the invalid entry is ignored, while the valid one is kept
+        assert history.entries == {'vcenter1': valid}
+        assert "Ignoring invalid collection history entry for backend " \
+               "'libvirt1'" in caplog.text
+        assert history.expected_duration('libvirt1') is None
+
+    def test_history_load_invalid_perms(self, tmp_path):
+        history_file = tmp_path / 'history.json'
+        history_file.write_text(json.dumps(dict(version=1, backends={})))
+        history_file.chmod(0o644)
+        with pytest.raises(exceptions.HistoryFilePermissionsError):
+            CollectionHistory(history_file).load()
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('workers', [1, 3])
+    def test_scheduler_history_order(self, config_manager, workers):
+        history = CollectionHistory()
+        history._entries = {
+            'libvirt1': dict(module='Libvirt', duration=5),
+            'vcenter1': dict(module='VMware', duration=1200),
+        }
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(workers=workers),
+                                        history=history)
+        assert scheduler.history is history
+
+        # backends without history first, then longest expected first
+        scheduled = [hv.backend.id
+                     for hv in scheduler._scheduled_hypervisors()]
+        assert scheduled == ['libvirt2', 'vcenter1', 'libvirt1']
+
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run):
+            scheduler.run()
+
+        # the history is updated with the outcome of each query
+        for hv in scheduler.hypervisors:
+            entry = history.entries[hv.backend.id]
+            assert entry['status'] == 'success'
+            assert entry['last_duration'] == hv.duration
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_scheduler_circuit_breaker(self, config_manager, caplog):
+        history = CollectionHistory()
+        history._entries = {
+            'libvirt1': dict(module='Libvirt', consecutive_failures=3),
+            'libvirt2': dict(module='Libvirt', consecutive_failures=2),
+        }
+        settings = SchedulerConfig(retries=5, retry_backoff=1,
+                                   circuit_breaker=3)
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=settings, history=history)
+        assert scheduler.settings.circuit_breaker == 3
+        assert scheduler.settings.circuit_breaker_cooldown == 1
+
+        # the open circuit skips the query, which has no results
+        assert [hv.backend.id for hv in scheduler.skipped] == ['libvirt1']
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run) as worker_run:
+            scheduler.run()
+            assert worker_run.call_count == 2
+        assert "Backend 'libvirt1', module 'Libvirt', query skipped as it " \
+               "failed in the last 3 runs" in caplog.text
+        assert [r['backend'] for r in scheduler.results.results] == \
+            ['vcenter1', 'libvirt2']
+        assert history.entries['libvirt1']['skipped_runs'] == 1
+        assert history.circuit_state('libvirt1', 3, 1) == 'half-open'
+
+        # once the cooldown has passed, a single attempt probes the backend
+        probe_run = CollectionScheduler(config_manager.config_data,
+                                        settings=settings, history=history)
+        assert not probe_run.skipped
+        retries = {hv.backend.id: hv.retries for hv in probe_run.hypervisors}
+        assert retries == {'vcenter1': 5, 'libvirt1': 1, 'libvirt2': 5}
+        assert "Backend 'libvirt1', module 'Libvirt', query failed in the " \
+               "last 3 runs, probing it with a single attempt" in caplog.text
+
+        # a successful probe closes the circuit for the next run
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run):
+            probe_run.run()
+        assert history.consecutive_failures('libvirt1') == 0
+        assert history.circuit_state('libvirt1', 3, 1) == 'closed'
+        next_run = CollectionScheduler(config_manager.config_data,
+                                       settings=settings, history=history)
+        assert all(hv.retries == 5 for hv in next_run.hypervisors)
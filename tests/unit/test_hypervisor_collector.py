@@ -1,9 +1,17 @@
 import logging
+import os
+import time
 import mock
 import pytest
 
 
-from scc_hypervisor_collector.api import exceptions, HypervisorCollector
+from scc_hypervisor_collector.api import (
+    exceptions, Backoff, HypervisorCollector, QueryOptions, RateLimiter,
+    RetryPolicy
+)
+from scc_hypervisor_collector.api import (
+    hypervisor_collector as hypervisor_collector_module
+)
 from tests import utils
 
 
@@ -75,6 +83,296 @@ class TestHypervisorCollector:
             assert 'query failed after 3 attempts' in caplog.text
             assert "3tjdla3gEP4WqkPd" not in hypervisor_collector_with_log[1]
 
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_hypervisor_collector_dedicated_workers(self, config_manager):
+        backends = [b for b in config_manager.config_data.backends
+                    if b.module == 'Libvirt']
+        assert len(backends) == 2
+        collectors = [HypervisorCollector(backend=b) for b in backends]
+        for each in collectors:
+            assert type(each.worker) is type(each.backend.worker)
+            assert each.worker is not each.backend.worker
+            # the worker is created once per collector
+            assert each.worker is each.worker
+        assert collectors[0].worker is not collectors[1].worker
+
+        # querying each backend configures only its own worker's node
+        for each in collectors:
+            with mock.patch.object(each.worker, 'set_node') as set_node, \
+                    mock.patch.object(each.worker, 'run', return_value={}):
+                each.run()
+                set_node.assert_called_once_with(each.backend)
+            assert each.succeeded
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['vcenter1', 'libvirt1'], indirect=True)
+    def test_hypervisor_collector_isolated(self, config_manager, backendid, forked_isolated_queries):
+        mfilename = 'tests/unit/data/config/mock/mock_' + backendid + '.json'
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == backendid][0]
+        hypervisor_collector = HypervisorCollector(
+            backend=backend, options=QueryOptions(isolated=True))
+        assert hypervisor_collector.options.isolated
+        assert hypervisor_collector.usage is None
+        # the worker process inherits the mocked _worker_run()
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        return_value=utils.read_mock_data(mfilename)):
+            hypervisor_collector.run()
+        assert hypervisor_collector.succeeded
+        utils.validate_mock_data(hypervisor_collector, backendid)
+        assert hypervisor_collector.usage['cpu_time'] >= 0
+        assert hypervisor_collector.usage['max_rss_kb'] > 0
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['vcenter1', 'libvirt1'], indirect=True)
+    def test_hypervisor_collector_isolated_spawned(self, config_manager, backendid, monkeypatch):
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == backendid][0]
+        hypervisor_collector = HypervisorCollector(
+            backend=backend, options=QueryOptions(isolated=True))
+        assert HypervisorCollector.PROCESS_START_METHOD == 'spawn'
+        # a spawned worker process imports the query function afresh
+        monkeypatch.setattr(hypervisor_collector_module, '_isolated_query',
+                            utils.isolated_mock_query)
+        hypervisor_collector.run()
+        assert hypervisor_collector.succeeded
+        utils.validate_mock_data(hypervisor_collector, backendid)
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['libvirt1'], indirect=True)
+    def test_hypervisor_collector_isolated_hung(self, config_manager, backendid, monkeypatch, caplog):
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == backendid][0]
+        hypervisor_collector = HypervisorCollector(
+            backend=backend, options=QueryOptions(isolated=True))
+        assert hypervisor_collector.options.timeout is None
+        # without a deadline the default isolated query timeout applies
+        monkeypatch.setattr(HypervisorCollector, 'ISOLATED_QUERY_TIMEOUT', 1)
+        monkeypatch.setattr(hypervisor_collector_module, '_isolated_query',
+                            utils.isolated_hung_query)
+        with mock.patch.object(HypervisorCollector, '_kill_process',
+                               autospec=True,
+                               side_effect=HypervisorCollector._kill_process) as kill:
+            start = time.monotonic()
+            assert hypervisor_collector.results == {}
+            assert time.monotonic() - start < 10
+        kill.assert_called_once()
+        process = kill.call_args.args[1]
+        assert not process.is_alive()
+        assert hypervisor_collector.failed
+        assert hypervisor_collector.timed_out
+        assert 'query timed out, killed query process' in caplog.text
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['libvirt1'], indirect=True)
+    def test_hypervisor_collector_isolated_crash(self, config_manager, backendid, forked_isolated_queries, caplog):
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == backendid][0]
+        hypervisor_collector = HypervisorCollector(
+            backend=backend, options=QueryOptions(isolated=True))
+        # simulate the worker process dying abruptly
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        side_effect=lambda: os._exit(11)):
+            assert hypervisor_collector.results == {}
+        assert hypervisor_collector.failed
+        assert hypervisor_collector.usage is None
+        assert 'exited unexpectedly with exit code 11' in caplog.text
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('isolated', [False, True])
+    def test_hypervisor_collector_timeout(self, config_manager, isolated, forked_isolated_queries, caplog):
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == 'libvirt1'][0]
+        hypervisor_collector = HypervisorCollector(
+            backend=backend, options=QueryOptions(isolated=isolated,
+                                                  timeout=0.5))
+        assert hypervisor_collector.options.timeout == 0.5
+        # simulate a hung backend query
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        side_effect=lambda: time.sleep(30)):
+            start = time.monotonic()
+            assert hypervisor_collector.results == {}
+            assert time.monotonic() - start < 5
+        assert hypervisor_collector.failed
+        assert hypervisor_collector.timed_out
+        assert 'query timed out' in caplog.text
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['libvirt1'], indirect=True)
+    def test_hypervisor_collector_within_timeout(self, config_manager, backendid):
+        mfilename = 'tests/unit/data/config/mock/mock_' + backendid + '.json'
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == backendid][0]
+        hypervisor_collector = HypervisorCollector(
+            backend=backend, options=QueryOptions(timeout=30))
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        side_effect=[None, utils.read_mock_data(mfilename)]):
+            utils.validate_mock_data(hypervisor_collector, backendid)
+        assert hypervisor_collector.succeeded
+        assert not hypervisor_collector.timed_out
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['libvirt1'], indirect=True)
+    def test_hypervisor_collector_rate_limit(self, config_manager, backendid):
+        mfilename = 'tests/unit/data/config/mock/mock_' + backendid + '.json'
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == backendid][0]
+        # permit at most one attempt every 0.25 seconds
+        hypervisor_collector = HypervisorCollector(
+            backend=backend,
+            options=QueryOptions(rate_limiter=RateLimiter(240)))
+        assert hypervisor_collector.options.rate_limit == 240
+        attempts = []
+
+        def mock_worker_run():
+            attempts.append(time.monotonic())
+            if len(attempts) < 3:
+                return None
+            return utils.read_mock_data(mfilename)
+
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        side_effect=mock_worker_run):
+            utils.validate_mock_data(hypervisor_collector, backendid)
+        assert hypervisor_collector.succeeded
+        assert len(attempts) == 3
+        assert all(later - earlier >= 0.2
+                   for earlier, later in zip(attempts, attempts[1:]))
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['libvirt1'], indirect=True)
+    def test_hypervisor_collector_rate_limit_deadline(self, config_manager, backendid, caplog):
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == backendid][0]
+        # the next attempt wouldn't be permitted until well after the timeout
+        hypervisor_collector = HypervisorCollector(
+            backend=backend,
+            options=QueryOptions(rate_limiter=RateLimiter(1), timeout=5))
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        return_value=None) as worker_run:
+            start = time.monotonic()
+            assert hypervisor_collector.results == {}
+            assert time.monotonic() - start < 1
+            assert worker_run.call_count == 1
+        assert hypervisor_collector.failed
+        assert hypervisor_collector.timed_out
+        assert 'rate limit prevents another attempt' in caplog.text
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['libvirt1'], indirect=True)
+    def test_hypervisor_collector_retry_backoff(self, config_manager, backendid):
+        mfilename = 'tests/unit/data/config/mock/mock_' + backendid + '.json'
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == backendid][0]
+        policy = RetryPolicy(retries=3,
+                             backoff=Backoff(initial=0.1, multiplier=2))
+        hypervisor_collector = HypervisorCollector(
+            backend=backend, options=QueryOptions(retry_policy=policy))
+        assert hypervisor_collector.options.retry_policy is policy
+        assert hypervisor_collector.retries == 3
+        attempts = []
+
+        def mock_worker_run():
+            attempts.append(time.monotonic())
+            if len(attempts) < 3:
+                return None
+            return utils.read_mock_data(mfilename)
+
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        side_effect=mock_worker_run):
+            utils.validate_mock_data(hypervisor_collector, backendid)
+        assert hypervisor_collector.succeeded
+        assert attempts[1] - attempts[0] >= 0.1
+        assert attempts[2] - attempts[1] >= 0.2
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['libvirt1'], indirect=True)
+    def test_hypervisor_collector_retry_max_elapsed(self, config_manager, backendid, caplog):
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == backendid][0]
+        policy = RetryPolicy(retries=3, backoff=Backoff(initial=10),
+                             max_elapsed=5)
+        hypervisor_collector = HypervisorCollector(
+            backend=backend, options=QueryOptions(retry_policy=policy))
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        return_value=None) as worker_run:
+            start = time.monotonic()
+            assert hypervisor_collector.results == {}
+            assert time.monotonic() - start < 1
+            assert worker_run.call_count == 1
+        assert hypervisor_collector.failed
+        assert not hypervisor_collector.timed_out
+        assert 'query failed after 1 attempts' in caplog.text
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['libvirt1'], indirect=True)
+    def test_hypervisor_collector_retry_deadline(self, config_manager, backendid, caplog):
+        backend = [b for b in config_manager.config_data.backends
+                   if b.id == backendid][0]
+        policy = RetryPolicy(retries=3, backoff=Backoff(initial=10))
+        hypervisor_collector = HypervisorCollector(
+            backend=backend, options=QueryOptions(timeout=5,
+                                                  retry_policy=policy))
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        return_value=None):
+            start = time.monotonic()
+            assert hypervisor_collector.results == {}
+            assert time.monotonic() - start < 1
+        assert hypervisor_collector.timed_out
+        assert 'next retry would start after the deadline' in caplog.text
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['vcenter1'], indirect=True)
+    def test_hypervisor_collector_deadline_passed(self, hypervisor_collector, caplog):
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run'
+                        ) as worker_run:
+            hypervisor_collector.run(deadline=time.monotonic() - 1)
+            worker_run.assert_not_called()
+        assert hypervisor_collector.results == {}
+        assert hypervisor_collector.failed
+        assert hypervisor_collector.timed_out
+        assert 'query not started as the deadline has passed' in caplog.text
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['vcenter1'], indirect=True)
+    def test_hypervisor_collector_module_unavailable(self, hypervisor_collector, caplog):
+        # the module became unavailable after the config was validated
+        with mock.patch('scc_hypervisor_collector.api.BackendConfig.create_worker',
+                        return_value=None):
+            hypervisor_collector.run()
+        assert hypervisor_collector.results == {}
+        assert hypervisor_collector.failed
+        assert 'query not started as the gatherer module is not available' in caplog.text
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('backendid', ['vcenter1', 'libvirt1'], indirect=True)
+    @pytest.mark.parametrize('spill', [False, True])
+    def test_hypervisor_collector_release_results(self, hypervisor_collector, backendid, spill, tmp_path):
+        mfilename = 'tests/unit/data/config/mock/mock_' + backendid + '.json'
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._query_backend',
+                        return_value=utils.read_mock_data(mfilename)):
+            details = HypervisorCollector(hypervisor_collector.backend).details
+            spill_file = tmp_path / 'backend.jsonl' if spill else None
+            hypervisor_collector.release_results(spill_file)
+        assert hypervisor_collector.released
+        assert hypervisor_collector.results == {}
+        hv_details = hypervisor_collector.hypervisor_details
+        assert hv_details.spill_file == spill_file
+        # unless spilled the details are kept in their compact form
+        assert (hv_details.hypervisor_hosts is None) == spill
+        assert hv_details.details == details
+        assert list(hv_details.hosts()) == details['virtualization_hosts']
+        if spill:
+            assert (spill_file.stat().st_mode & 0o777) == 0o600
+            assert len(spill_file.read_text().splitlines()) == \
+                len(details['virtualization_hosts'])
+
+        hv_details.release()
+        assert hv_details.released
+        with pytest.raises(exceptions.HypervisorDetailsReleased):
+            hv_details.hosts()
+        with pytest.raises(exceptions.HypervisorDetailsReleased):
+            hv_details.details
+
 @pytest.fixture
 def retries(request):
     return request.param
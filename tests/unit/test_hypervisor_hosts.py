@@ -0,0 +1,96 @@
+import json
+import tracemalloc
+
+import pytest
+
+from scc_hypervisor_collector.api import HypervisorHosts
+from tests import utils
+
+
+def reference_hosts(group_name, results):
+    # the SCC payload entries derived directly from the results
+    return [{
+        "identifier": i['hostIdentifier'],
+        "group_name": group_name,
+        "properties": {
+            "name": i['name'],
+            "arch": i['cpuArch'],
+            "cores": int(i['totalCpuCores']),
+            "sockets": int(i['totalCpuSockets']),
+            "threads": int(i['totalCpuThreads']),
+            "ram_mb": i.get('ramMb'),
+            "type": i['type']
+        },
+        "systems": [{
+            "uuid": u,
+            "properties": dict({"vm_name": v}, **i['optionalVmData'][v]),
+        } for v, u in i['vms'].items()],
+    } for i in results.values()]
+
+
+def fleet_results(hosts, vms):
+    # results as returned, via JSON, by an isolated VMware backend query
+    results = {}
+    for h in range(hosts):
+        host_vms = {f'vm-{h}-{v}': f'{h:08x}-{v:04x}-0000-0000-000000000000'
+                    for v in range(vms)}
+        results[f'esx{h}'] = dict(
+            name=f'esx{h}.example.com', hostIdentifier=f'host-{h}',
+            type='vmware', cpuArch='x86_64', totalCpuCores=32,
+            totalCpuSockets=2, totalCpuThreads=64, ramMb=262144,
+            vms=host_vms,
+            optionalVmData={v: dict(vmState='running', vmGuestOs='sles15')
+                            for v in host_vms},
+        )
+    return json.loads(json.dumps(results))
+
+
+def traced_size(func, *args):
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+class TestHypervisorHosts:
+
+    @pytest.mark.parametrize('backend_id', ['vcenter1', 'libvirt1', 'libvirt2'])
+    def test_payload(self, backend_id):
+        results = utils.read_mock_data(
+            'tests/unit/data/config/mock/mock_' + backend_id + '.json')
+        hv_hosts = HypervisorHosts.from_results(backend_id, results)
+
+        assert len(hv_hosts) == len(results)
+        assert hv_hosts.group_name == backend_id
+        # same content, with the same key order, as the SCC payload
+        assert json.dumps(list(hv_hosts)) == \
+            json.dumps(reference_hosts(backend_id, results))
+
+    def test_shared_strings(self):
+        hv_hosts = HypervisorHosts.from_results('vc1', fleet_results(2, 3))
+        host1, host2 = hv_hosts.hosts
+        assert host1.arch is host2.arch
+        assert host1.type is host2.type
+        keys = {id(s.keys) for h in hv_hosts.hosts for s in h.systems}
+        assert len(keys) == 1
+        values = {id(s.values[1]) for h in hv_hosts.hosts for s in h.systems}
+        assert len(values) == 1
+
+    def test_slots(self):
+        hv_hosts = HypervisorHosts.from_results('vc1', fleet_results(1, 1))
+        host = hv_hosts.hosts[0]
+        for record in (hv_hosts, host, host.systems[0]):
+            assert not hasattr(record, '__dict__')
+
+    def test_compact(self):
+        results = fleet_results(50, 200)
+        reference, reference_size = traced_size(reference_hosts, 'vc1',
+                                                results)
+        hv_hosts, size = traced_size(HypervisorHosts.from_results, 'vc1',
+                                     results)
+
+        assert list(hv_hosts) == reference
+        assert size < reference_size * 0.75
@@ -0,0 +1,116 @@
+import threading
+import time
+import mock
+import pytest
+
+from scc_hypervisor_collector.api import (
+    CollectionPipeline, CollectionScheduler, SCCUploader, SchedulerConfig
+)
+from tests import utils
+
+
+class TestCollectionPipeline:
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('workers', [1, 3])
+    def test_pipeline_run(self, config_manager, workers):
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(workers=workers))
+        uploader = mock.Mock(spec=SCCUploader)
+        pipeline = CollectionPipeline(scheduler, uploader, retry=True)
+        assert pipeline.queue_size == workers
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.slow_vcenter_worker_run):
+            pipeline.run()
+        assert sorted(pipeline.uploaded) == ['libvirt1', 'libvirt2', 'vcenter1']
+        assert pipeline.not_uploaded == []
+        assert uploader.upload_hosts.call_count == 3
+        for call in uploader.upload_hosts.call_args_list:
+            assert call.kwargs['retry'] is True
+            hv = [h for h in scheduler.hypervisors
+                  if h.backend.id == call.kwargs['backend']][0]
+            assert list(call.kwargs['hosts']) == \
+                hv.details['virtualization_hosts']
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_pipeline_lean(self, config_manager):
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(workers=3, lean=True))
+        uploaded_hosts = {}
+
+        def mock_upload(hosts, backend, retry):
+            uploaded_hosts[backend] = list(hosts)
+
+        uploader = mock.Mock(spec=SCCUploader)
+        uploader.upload_hosts.side_effect = mock_upload
+        pipeline = CollectionPipeline(scheduler, uploader)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.slow_vcenter_worker_run):
+            pipeline.run()
+        assert sorted(uploaded_hosts) == ['libvirt1', 'libvirt2', 'vcenter1']
+        assert all(uploaded_hosts.values())
+        # the details are released once they have been uploaded
+        for hv in scheduler.hypervisors:
+            assert hv.released
+            assert hv.hypervisor_details.released
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_pipeline_overlaps_upload(self, config_manager):
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(workers=3))
+        vcenter_done = threading.Event()
+        uploaded_early = []
+
+        def mock_worker_run_tracked(hv_collector):
+            results = utils.slow_vcenter_worker_run(hv_collector)
+            if hv_collector.backend.id == 'vcenter1':
+                vcenter_done.set()
+            return results
+
+        def mock_upload(hosts, backend, retry):
+            if not vcenter_done.is_set():
+                uploaded_early.append(backend)
+
+        uploader = mock.Mock(spec=SCCUploader)
+        uploader.upload_hosts.side_effect = mock_upload
+        pipeline = CollectionPipeline(scheduler, uploader)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=mock_worker_run_tracked):
+            pipeline.run()
+        # the libvirt details were uploaded while the vcenter was queried
+        assert sorted(uploaded_early) == ['libvirt1', 'libvirt2']
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_pipeline_failed_backend(self, config_manager, caplog):
+        scheduler = CollectionScheduler(config_manager.config_data)
+        uploader = mock.Mock(spec=SCCUploader)
+        pipeline = CollectionPipeline(scheduler, uploader)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        return_value=None):
+            pipeline.run()
+        uploader.upload_hosts.assert_not_called()
+        assert sorted(pipeline.not_uploaded) == ['libvirt1', 'libvirt2',
+                                                 'vcenter1']
+        assert 'as collection for this backend failed' in caplog.text
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_pipeline_upload_exit(self, config_manager):
+        scheduler = CollectionScheduler(config_manager.config_data)
+        uploader = mock.Mock(spec=SCCUploader)
+        # simulate hitting the SCC rate limit without retry
+        uploader.upload_hosts.side_effect = SystemExit(0)
+        pipeline = CollectionPipeline(scheduler, uploader, queue_size=1)
+
+        def mock_worker_run_slow(hv_collector):
+            # give the upload stage time to fail before the next query
+            time.sleep(0.2)
+            return utils.slow_vcenter_worker_run(hv_collector)
+
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=mock_worker_run_slow):
+            with pytest.raises(SystemExit):
+                pipeline.run()
+        uploader.upload_hosts.assert_called_once()
+        assert pipeline.uploaded == []
+        # no further queries are started once the upload stage stops
+        assert any(hv.pending for hv in scheduler.hypervisors)
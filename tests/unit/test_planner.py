@@ -0,0 +1,193 @@
+import mock
+import pytest
+
+from scc_hypervisor_collector.api import (
+    CollectionHistory, CollectionPlan, CollectionScheduler, SchedulerConfig
+)
+from tests import utils
+
+
+def make_history(durations):
+    history = CollectionHistory()
+    modules = {'vcenter1': 'VMware', 'libvirt1': 'Libvirt',
+               'libvirt2': 'Libvirt'}
+    history._entries = {
+        backend_id: dict(module=modules[backend_id], duration=duration)
+        for backend_id, duration in durations.items()
+    }
+    return history
+
+
+class TestCollectionPlan:
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_plan_no_budget(self, config_manager):
+        scheduler = CollectionScheduler(config_manager.config_data)
+        plan = scheduler.plan
+        assert plan.budget is None
+        assert len(plan.scheduled) == len(scheduler.hypervisors)
+        assert plan.deferred == ()
+        # without history all durations are unknown
+        assert plan.projected_duration == 0
+        report = plan.report()
+        assert report['deferred'] == []
+        assert all(e['expected_duration'] is None
+                   for e in report['scheduled'])
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('workers,scheduled,projected', [
+        # serially only the vcenter fits, in parallel all of them fit
+        (1, ['vcenter1'], 1000),
+        (3, ['vcenter1', 'libvirt1', 'libvirt2'], 1000),
+    ])
+    def test_plan_budget(self, config_manager, workers, scheduled, projected):
+        history = make_history(dict(vcenter1=1000, libvirt1=300,
+                                    libvirt2=200))
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(workers=workers,
+                                                                 run_budget=1100),
+                                        history=history)
+        plan = scheduler.plan
+        assert plan.budget == 1100
+        assert [hv.backend.id for hv in plan.scheduled] == scheduled
+        assert {hv.backend.id for hv in plan.deferred} == \
+            {'vcenter1', 'libvirt1', 'libvirt2'} - set(scheduled)
+        assert plan.projected_duration == projected
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_plan_module_limits(self, config_manager):
+        history = make_history(dict(vcenter1=100, libvirt1=300,
+                                    libvirt2=200))
+        plan = CollectionPlan(
+            CollectionScheduler(config_manager.config_data,
+                                history=history)._ordered_hypervisors(),
+            SchedulerConfig(workers=3, module_limits={'Libvirt': 1},
+                            run_budget=450),
+            history=history
+        )
+        # the libvirt backends must be queried one after the other
+        report = plan.report()
+        assert [(e['backend'], e['start'], e['finish'])
+                for e in report['scheduled']] == [('libvirt1', 0, 300),
+                                                  ('vcenter1', 0, 100)]
+        assert [e['backend'] for e in report['deferred']] == ['libvirt2']
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_plan_module_limits_workers_not_idle(self, config_manager):
+        history = make_history(dict(vcenter1=100, libvirt1=300,
+                                    libvirt2=200))
+        plan = CollectionPlan(
+            CollectionScheduler(config_manager.config_data,
+                                history=history)._ordered_hypervisors(),
+            SchedulerConfig(workers=2, module_limits={'Libvirt': 1}),
+            history=history
+        )
+        # the vcenter query starts while the second libvirt query waits
+        # for the first, as the scheduler would start them
+        report = plan.report()
+        assert [(e['backend'], e['start'], e['finish'])
+                for e in report['scheduled']] == [('libvirt1', 0, 300),
+                                                  ('vcenter1', 0, 100),
+                                                  ('libvirt2', 300, 500)]
+        assert report['projected_duration'] == 500
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_scheduler_overrunning_not_cut_off(self, config_manager):
+        # the vcenter1 query must run, but is expected to overrun the budget
+        history = make_history(dict(vcenter1=2000, libvirt1=1500,
+                                    libvirt2=1200))
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(
+                                            run_budget=0.1),
+                                        history=history)
+        assert [hv.backend.id for hv in scheduler.plan.overrunning] == \
+            ['vcenter1']
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.slow_vcenter_worker_run):
+            scheduler.run()
+
+        # so it isn't cut off when the budget is exhausted
+        vcenter1, = [hv for hv in scheduler.hypervisors
+                     if hv.backend.id == 'vcenter1']
+        assert vcenter1.succeeded
+        assert history.consecutive_failures('vcenter1') == 0
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_plan_timeout_estimate(self, config_manager):
+        history = make_history(dict(vcenter1=5000))
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(backend_timeout=60),
+                                        history=history)
+        for hv in scheduler.hypervisors:
+            # limited to the timeout, which is also used for unknowns
+            assert scheduler.plan.expected_duration(hv) == 60
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_scheduler_deferred(self, config_manager, caplog):
+        history = make_history(dict(vcenter1=1000, libvirt1=300,
+                                    libvirt2=200))
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(run_budget=1100),
+                                        history=history)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run) as worker_run:
+            scheduler.run()
+            assert worker_run.call_count == 1
+        assert 'deferred to a later run' in caplog.text
+
+        # deferred backends are excluded from the results
+        results = scheduler.results.results
+        assert [r['backend'] for r in results] == ['vcenter1']
+
+        # and are queried first by the next run
+        assert history.was_deferred('libvirt1')
+        assert history.was_deferred('libvirt2')
+        assert not history.was_deferred('vcenter1')
+        next_run = CollectionScheduler(config_manager.config_data,
+                                       settings=SchedulerConfig(run_budget=1100),
+                                       history=history)
+        assert [hv.backend.id for hv in next_run.plan.scheduled][:2] == \
+            ['libvirt1', 'libvirt2']
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_scheduler_deferred_not_starved(self, config_manager, caplog):
+        # the libvirt1 backend is expected to take longer than the budget
+        history = make_history(dict(vcenter1=2000, libvirt1=1500,
+                                    libvirt2=200))
+        settings = SchedulerConfig(workers=3, run_budget=1100)
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=settings, history=history)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run):
+            scheduler.run()
+        assert [hv.backend.id for hv in scheduler.deferred] == ['libvirt1']
+        assert history.was_deferred('libvirt1')
+
+        # the next run queries it first, despite its expected duration,
+        # refreshing its history, rather than deferring it again
+        next_run = CollectionScheduler(config_manager.config_data,
+                                       settings=settings, history=history)
+        assert next_run.plan.scheduled[0].backend.id == 'libvirt1'
+        assert 'libvirt1' not in [hv.backend.id
+                                  for hv in next_run.plan.deferred]
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run):
+            next_run.run()
+        assert 'libvirt1' in [hv.backend.id for hv in next_run.hypervisors
+                              if hv.succeeded]
+        assert not history.was_deferred('libvirt1')
+        assert history.expected_duration('libvirt1') < 1500
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_plan_first_query_not_deferred(self, config_manager):
+        history = make_history(dict(vcenter1=2000, libvirt1=1500,
+                                    libvirt2=1200))
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(
+                                            run_budget=1100),
+                                        history=history)
+        # none fit the budget, but the first query is still run
+        assert [hv.backend.id for hv in scheduler.plan.scheduled] == \
+            ['vcenter1']
+        assert [hv.backend.id for hv in scheduler.plan.deferred] == \
+            ['libvirt1', 'libvirt2']
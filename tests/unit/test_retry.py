@@ -0,0 +1,34 @@
+import pytest
+
+from scc_hypervisor_collector.api import Backoff, RetryPolicy
+
+
+class TestRetryPolicy:
+
+    def test_retry_policy_defaults(self):
+        policy = RetryPolicy()
+        assert policy.retries == 3
+        assert [policy.delay(a) for a in range(1, 4)] == [0.0, 0.0, 0.0]
+        assert policy.permits(3600)
+
+    def test_retry_policy_min_retries(self):
+        assert RetryPolicy(retries=0).retries == 1
+
+    def test_retry_policy_backoff(self):
+        policy = RetryPolicy(retries=5,
+                             backoff=Backoff(initial=2, multiplier=3,
+                                             max_delay=30))
+        assert [policy.delay(a) for a in range(1, 5)] == [2, 6, 18, 30]
+
+    @pytest.mark.parametrize('attempt', [1, 2, 3])
+    def test_retry_policy_jitter(self, attempt):
+        policy = RetryPolicy(backoff=Backoff(initial=10, jitter=0.5))
+        base = 10 * 2 ** (attempt - 1)
+        delays = {policy.delay(attempt) for _ in range(20)}
+        assert all(base * 0.5 <= d <= base * 1.5 for d in delays)
+        assert len(delays) > 1
+
+    def test_retry_policy_max_elapsed(self):
+        policy = RetryPolicy(backoff=Backoff(initial=1), max_elapsed=60)
+        assert policy.permits(60)
+        assert not policy.permits(60.1)
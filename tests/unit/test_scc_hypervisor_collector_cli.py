@@ -1,6 +1,14 @@
+import gzip
+import json
+import mock
 import os
 import pytest
 
+from scc_hypervisor_collector.api import (
+    CollectionScheduler, HypervisorDetails, SchedulerConfig, dump_yaml
+)
+from tests import utils
+
 no_network_access = (os.environ.get('NO_NETWORK_ACCESS', 'False').lower() in ['1', 'yes', 'true'])
 
 class TestSCCHypervisorCollectorCLI:
@@ -110,6 +118,27 @@ class TestSCCHypervisorCollectorCLI:
         assert "Invalid backends section" in caplog.text
         assert "No backends specified in config!" in caplog.text
 
+    def test_check_json_report(self, capsys, monkeypatch, scc_hypervisor_collector_cli, tmp_path):
+        config = "tests/unit/data/config/negative/nourilibvirtbackend.yaml"
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--check", "--report", "json", "--state-dir", str(tmp_path), "--config", config])
+        with pytest.raises(SystemExit) as e:
+            scc_hypervisor_collector_cli.main()
+        assert e.value.code == 0
+        out, err = capsys.readouterr()
+        report = json.loads(out)
+        assert not report['valid']
+        assert report['backends'] == 2
+        assert report['files'] == {
+            config: {'default_libvirt_1': {'uri': ['missing required field']}}
+        }
+
+    def test_report_requires_check(self, capsys, monkeypatch, scc_hypervisor_collector_cli):
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--report", "json", "--config", "tests/unit/data/config/default/default.yaml"])
+        with pytest.raises(SystemExit):
+            scc_hypervisor_collector_cli.main()
+        out, err = capsys.readouterr()
+        assert "argument --report: requires -C/--check" in err
+
     def test_invalid_backends(self, monkeypatch, scc_hypervisor_collector_cli, caplog):
         monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--config",
                                          "tests/unit/data/config/negative/nobackends.yaml"])
@@ -117,6 +146,156 @@ class TestSCCHypervisorCollectorCLI:
             scc_hypervisor_collector_cli.main()
         assert "No backends specified in config!" in caplog.text
 
+    def test_workers_option(self, monkeypatch, scc_hypervisor_collector_cli, caplog):
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--workers", "2", "--config", "tests/unit/data/config/default/default.yaml"])
+        scc_hypervisor_collector_cli.main()
+        assert 'query failed after 3 attempts' in caplog.text
+
+    def test_invalid_workers_option(self, capsys, monkeypatch, scc_hypervisor_collector_cli):
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--workers", "0"])
+        with pytest.raises(SystemExit):
+            scc_hypervisor_collector_cli.main()
+        out, err = capsys.readouterr()
+        assert "argument -w/--workers: invalid positive integer value: '0'" in err
+
+    @pytest.mark.parametrize('value', ['0', '-1', 'nan'])
+    def test_invalid_run_timeout_option(self, capsys, monkeypatch, scc_hypervisor_collector_cli, value):
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--run-timeout", value])
+        with pytest.raises(SystemExit):
+            scc_hypervisor_collector_cli.main()
+        out, err = capsys.readouterr()
+        assert f"argument --run-timeout: invalid positive number value: '{value}'" in err
+
+    def test_state_dir_option(self, monkeypatch, scc_hypervisor_collector_cli, tmp_path):
+        state_dir = tmp_path / 'state'
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--state-dir", str(state_dir), "--config", "tests/unit/data/config/default/default.yaml"])
+        scc_hypervisor_collector_cli.main()
+        history = json.loads((state_dir / 'history.json').read_text())
+        assert history['backends']
+        for entry in history['backends'].values():
+            assert entry['status'] == 'failure'
+            assert entry['consecutive_failures'] == 1
+
+    def test_lean_option(self, monkeypatch, scc_hypervisor_collector_cli, tmp_path, caplog):
+        state_dir = tmp_path / 'state'
+        output = tmp_path / 'collected.results'
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--lean", "--state-dir", str(state_dir), "--output", str(output), "--config", "tests/unit/data/config/default/default.yaml"])
+        scc_hypervisor_collector_cli.main()
+        assert output.exists()
+        # the spill directory is removed once the results are saved
+        assert not list(state_dir.glob('spill-*'))
+        assert 'Peak memory usage: collector' in caplog.text
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_print_results_streamed(self, capsys, config_manager, scc_hypervisor_collector_cli, tmp_path):
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(lean=True),
+                                        spill_dir=tmp_path)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run):
+            scheduler.run()
+        collected = scheduler.results
+        expected = ''.join(dump_yaml(e) + '\n' for e in collected.results)
+
+        # each spill file is only read once the previous backend's
+        # results have been printed
+        out = []
+        printed = []
+        read_hosts = HypervisorDetails._read_hosts
+
+        def mock_read_hosts(file_path):
+            out.append(capsys.readouterr().out)
+            printed.append(''.join(out).count('valid: '))
+            return read_hosts(file_path)
+
+        with mock.patch.object(HypervisorDetails, '_read_hosts',
+                               side_effect=mock_read_hosts):
+            scc_hypervisor_collector_cli.print_results(collected)
+        out.append(capsys.readouterr().out)
+        assert len(list(tmp_path.iterdir())) == 3
+        assert printed == [0, 1, 2]
+        assert ''.join(out) == expected
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_print_results_wrapped(self, capsys, config_manager, scc_hypervisor_collector_cli):
+        def mock_worker_run(hv):
+            # long scalars are wrapped when dumped as YAML
+            results = utils.mock_worker_run(hv)
+            for host in results.values():
+                for vm_data in host['optionalVmData'].values():
+                    vm_data['vmNotes'] = ' '.join(
+                        f'{hv.backend.id} VM note {i}' for i in range(12))
+            return results
+
+        scheduler = CollectionScheduler(config_manager.config_data)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=mock_worker_run):
+            scheduler.run()
+        collected = scheduler.results
+        scc_hypervisor_collector_cli.print_results(collected)
+
+        # each backend is wrapped as when dumping it whole
+        expected = ''.join(dump_yaml(e) + '\n' for e in collected.results)
+        assert capsys.readouterr().out == expected
+
+    def test_output_format_option(self, capsys, monkeypatch, scc_hypervisor_collector_cli, tmp_path):
+        output = tmp_path / 'collected.results'
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--output", str(output), "--output-format", "jsonl", "--config", "tests/unit/data/config/default/default.yaml"])
+        scc_hypervisor_collector_cli.main()
+        entries = [json.loads(line) for line in output.read_text().splitlines()]
+        assert entries and all(e['valid'] is False for e in entries)
+
+        # the format is detected when loading the saved results
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--input", str(output), "--config", "tests/unit/data/config/default/default.yaml"])
+        scc_hypervisor_collector_cli.main()
+        out, err = capsys.readouterr()
+        assert f"backend: {entries[0]['backend']}" in out
+
+    def test_output_compression_option(self, capsys, monkeypatch, scc_hypervisor_collector_cli, tmp_path):
+        output = tmp_path / 'collected.jsonl'
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--output", str(output), "--output-compression", "gzip", "--config", "tests/unit/data/config/default/default.yaml"])
+        scc_hypervisor_collector_cli.main()
+        with gzip.open(output, 'rt') as fp:
+            entries = [json.loads(line) for line in fp]
+        assert entries and all(e['valid'] is False for e in entries)
+
+        # the compression is detected when loading the saved results
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--input", str(output), "--config", "tests/unit/data/config/default/default.yaml"])
+        scc_hypervisor_collector_cli.main()
+        out, err = capsys.readouterr()
+        assert f"backend: {entries[0]['backend']}" in out
+
+    def test_output_compression_requires_output(self, capsys, monkeypatch, scc_hypervisor_collector_cli):
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--output-compression", "gzip"])
+        with pytest.raises(SystemExit):
+            scc_hypervisor_collector_cli.main()
+        out, err = capsys.readouterr()
+        assert "argument --output-compression: requires -o/--output" in err
+
+    def test_output_format_requires_output(self, capsys, monkeypatch, scc_hypervisor_collector_cli):
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--output-format", "jsonl"])
+        with pytest.raises(SystemExit):
+            scc_hypervisor_collector_cli.main()
+        out, err = capsys.readouterr()
+        assert "argument --output-format: requires -o/--output" in err
+
+    def test_plan_option(self, capsys, monkeypatch, scc_hypervisor_collector_cli, caplog):
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--plan", "--run-budget", "600", "--config", "tests/unit/data/config/default/default.yaml"])
+        with pytest.raises(SystemExit) as e:
+            scc_hypervisor_collector_cli.main()
+        assert e.value.code == 0
+        out, err = capsys.readouterr()
+        assert "run_budget: 600.0" in out
+        assert "deferred: []" in out
+        assert 'query failed' not in caplog.text
+
+    def test_pipeline_option_requires_upload(self, capsys, monkeypatch, scc_hypervisor_collector_cli):
+        monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--pipeline", "--config", "tests/unit/data/config/default/default.yaml"])
+        with pytest.raises(SystemExit):
+            scc_hypervisor_collector_cli.main()
+        out, err = capsys.readouterr()
+        assert "argument -P/--pipeline: requires -u/--upload" in err
+
     @pytest.mark.skipif(no_network_access, reason="No network available")
     def test_scc_credentials_check_option(self, capsys, monkeypatch, scc_hypervisor_collector_cli):
         monkeypatch.setattr("sys.argv", ["scc-hypervisor-collector", "--scc-credentials-check",  "--config", "tests/unit/data/config/mock/config.yaml"])
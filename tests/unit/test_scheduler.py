@@ -1,11 +1,16 @@
+import gzip
+import json
 import mock
 import getpass
+from pathlib import Path
+import threading
+import time
 import pytest
 
 from scc_hypervisor_collector.api import (
     exceptions, CredentialsConfig, CollectorConfig,
     CollectionResults, CollectionScheduler,
-    SccCredsConfig, HypervisorCollector
+    SccCredsConfig, SchedulerConfig, HypervisorCollector, dump_yaml
 )
 from tests import utils
 
@@ -28,20 +33,20 @@ class TestCollectionResults:
         # create a new empty file under the dynamically generated tmp_path
         # which will be used as the input when loading collection results,
         # though we will be subsituting the results from collected_results
-        # as the return value for the yaml.safe_load() operation.
+        # as the return value for the load_yaml() operation.
         results_file = tmp_path / 'collected.results'
         results_file.touch(mode=0o600)  # ensure temp file exists with valid mode
-        with mock.patch('yaml.safe_load',
-                        return_value=collected_results.results) as yaml_safe_load:
+        with mock.patch('scc_hypervisor_collector.api.scheduler.load_yaml',
+                        return_value=collected_results.results) as load_yaml:
             collected_results.load(results_file)
-            yaml_safe_load.assert_called_once()
+            load_yaml.assert_called_once()
 
     @pytest.mark.config('tests/unit/data/collected/libvirt/collector.results')
     def test_collection_results_save(self, collected_results, tmp_path):
         results_file = tmp_path / 'collected.results'
-        with mock.patch('yaml.safe_dump') as yaml_safe_dump:
+        with mock.patch('scc_hypervisor_collector.api.scheduler.dump_yaml') as dump_yaml:
             collected_results.save(results_file)
-            yaml_safe_dump.assert_called_once()
+            dump_yaml.assert_called_once()
 
     @pytest.mark.config('tests/unit/data/collected/libvirt/collector.results')
     def test_collection_results_load_invalid_perms(self, collected_results, tmp_path):
@@ -69,6 +74,247 @@ class TestCollectionResults:
                 collected_results.load(results_file)
 
 
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_collection_results_save_streamed(self, config_manager, tmp_path):
+        scheduler = CollectionScheduler(config_manager.config_data)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=lambda hv: utils.read_mock_data(
+                            'tests/unit/data/config/mock/mock_' + hv.backend.id + '.json')):
+            scheduler.run()
+        collected = scheduler.results
+        results_file = tmp_path / 'collected.results'
+        collected.save(results_file)
+
+        # the streamed file matches dumping the results as a whole
+        assert results_file.read_text() == dump_yaml(collected.results)
+        loaded = CollectionResults()
+        loaded.load(results_file)
+        assert loaded.results == collected.results
+        assert [d.backend for d in loaded.hypervisor_details] == \
+            [d.backend for d in collected.hypervisor_details]
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_collection_results_stopped_early(self, config_manager):
+        scheduler = CollectionScheduler(config_manager.config_data)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run) as worker_run:
+            completed = scheduler.as_completed()
+            first = next(completed)
+            completed.close()
+
+            # the queries that weren't started aren't run for the results
+            collected = scheduler.results
+            results = collected.results
+            assert worker_run.call_count == 1
+        # the results are only created once
+        assert scheduler.results is collected
+        assert [r['backend'] for r in results] == \
+            [hv.backend.id for hv in scheduler.hypervisors]
+        for entry in results:
+            if entry['backend'] == first.backend.id:
+                assert entry['valid']
+            else:
+                assert not entry['valid']
+                assert entry['details'] == dict(virtualization_hosts=[])
+        assert all(hv.pending for hv in scheduler.hypervisors
+                   if hv is not first)
+
+        # until further queries complete
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run):
+            scheduler.run()
+        assert scheduler.results is not collected
+        assert all(e['valid'] for e in scheduler.results.results)
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_collection_results_save_wrapped(self, config_manager, tmp_path):
+        def mock_worker_run(hv):
+            # long scalars are wrapped when dumped as YAML
+            results = utils.mock_worker_run(hv)
+            for host in results.values():
+                for vm_data in host['optionalVmData'].values():
+                    vm_data['vmNotes'] = ' '.join(
+                        f'{hv.backend.id} VM note {i}' for i in range(12))
+            return results
+
+        scheduler = CollectionScheduler(config_manager.config_data)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=mock_worker_run):
+            scheduler.run()
+        collected = scheduler.results
+        results_file = tmp_path / 'collected.results'
+        collected.save(results_file)
+
+        # the streamed file is wrapped as when dumping the results whole
+        expected = dump_yaml(collected.results)
+        assert len(expected.splitlines()) > \
+            len(dump_yaml(collected.results, width=10000).splitlines())
+        assert results_file.read_text() == expected
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_collection_results_lean(self, config_manager, tmp_path):
+        results = {}
+        for lean in (False, True):
+            spill_dir = tmp_path / f'spill-{lean}'
+            spill_dir.mkdir(mode=0o700)
+            scheduler = CollectionScheduler(config_manager.config_data,
+                                            settings=SchedulerConfig(
+                                                lean=lean),
+                                            spill_dir=spill_dir)
+            assert scheduler.settings.lean == lean
+            with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                            autospec=True, side_effect=utils.mock_worker_run):
+                scheduler.run()
+            assert all(hv.released == lean for hv in scheduler.hypervisors)
+            assert len(list(spill_dir.iterdir())) == (3 if lean else 0)
+            results_file = tmp_path / f'collected-{lean}.results'
+            scheduler.results.save(results_file)
+            results[lean] = results_file.read_text()
+
+        assert results[True] == results[False]
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_collection_results_save_jsonl(self, config_manager, tmp_path):
+        scheduler = CollectionScheduler(config_manager.config_data)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=lambda hv: utils.read_mock_data(
+                            'tests/unit/data/config/mock/mock_' + hv.backend.id + '.json')):
+            scheduler.run()
+        collected = scheduler.results
+        results_file = tmp_path / 'collected.jsonl'
+        collected.save(results_file)
+
+        # the streamed lines match dumping each backend's entry
+        lines = results_file.read_text().splitlines()
+        assert lines == [json.dumps(e) for e in collected.results]
+        assert (results_file.stat().st_mode & 0o777) == 0o600
+
+        loaded = CollectionResults()
+        loaded.load(results_file)
+        assert loaded.results == collected.results
+
+        # loaded results can be saved in either format
+        yaml_file = tmp_path / 'collected.results'
+        loaded.save(yaml_file)
+        jsonl_file = tmp_path / 'resaved.results'
+        loaded.save(jsonl_file, results_format='jsonl')
+        assert jsonl_file.read_text() == results_file.read_text()
+        for path in (yaml_file, jsonl_file):
+            reloaded = CollectionResults()
+            reloaded.load(path)
+            assert reloaded.results == collected.results
+
+    @pytest.mark.parametrize('name,results_format', [
+        ('collected.results', 'yaml'), ('collected.yaml', 'yaml'),
+        ('collected.jsonl', 'jsonl'), ('collected.NDJSON', 'jsonl'),
+        ('collected.results.gz', 'yaml'), ('collected.jsonl.gz', 'jsonl'),
+        ('collected.ndjson.zst', 'jsonl'), ('collected.gz', 'yaml'),
+    ])
+    def test_collection_results_format(self, name, results_format):
+        assert CollectionResults.results_format(Path(name)) == results_format
+
+    @pytest.mark.parametrize('name,compression', [
+        ('collected.results', 'none'), ('collected.jsonl', 'none'),
+        ('collected.results.gz', 'gzip'), ('collected.jsonl.GZ', 'gzip'),
+        ('collected.jsonl.zst', 'zstd'),
+    ])
+    def test_collection_results_compression(self, name, compression):
+        assert CollectionResults.results_compression(Path(name)) == \
+            compression
+
+    @pytest.mark.config('tests/unit/data/collected/libvirt/collector.results')
+    @pytest.mark.parametrize('results_format', ['yaml', 'jsonl'])
+    def test_collection_results_save_gzip(self, collected_results,
+                                          results_format, tmp_path):
+        plain_file = tmp_path / 'collected.plain'
+        collected_results.save(plain_file, results_format=results_format)
+
+        # an existing results file is restricted to user access
+        results_file = tmp_path / f'collected.{results_format}.gz'
+        results_file.write_text('')
+        results_file.chmod(0o644)
+        collected_results.save(results_file)
+        assert (results_file.stat().st_mode & 0o777) == 0o600
+        with gzip.open(results_file, 'rt') as fp:
+            assert fp.read() == plain_file.read_text()
+
+        # the compression is detected regardless of the file's name
+        detected_file = tmp_path / 'collected.results'
+        detected_file.write_bytes(results_file.read_bytes())
+        detected_file.chmod(0o600)
+        for path in (results_file, detected_file):
+            loaded = CollectionResults()
+            loaded.load(path)
+            assert loaded.results == collected_results.results
+
+    @pytest.mark.config('tests/unit/data/collected/libvirt/collector.results')
+    def test_collection_results_save_zstd(self, collected_results, tmp_path):
+        zstandard = pytest.importorskip('zstandard')
+        results_file = tmp_path / 'collected.results'
+        collected_results.save(results_file, results_format='jsonl',
+                               compression='zstd')
+        assert (results_file.stat().st_mode & 0o777) == 0o600
+        assert results_file.read_bytes()[:4] == b'\x28\xb5\x2f\xfd'
+        with zstandard.open(results_file, 'rt') as fp:
+            assert [json.loads(line) for line in fp] == \
+                collected_results.results
+
+        loaded = CollectionResults()
+        loaded.load(results_file)
+        assert loaded.results == collected_results.results
+
+    def test_collection_results_zstd_unavailable(self, monkeypatch, tmp_path):
+        monkeypatch.setattr('scc_hypervisor_collector.api.scheduler.zstandard',
+                            None)
+        results_file = tmp_path / 'collected.results.zst'
+        with pytest.raises(exceptions.CollectionResultsFormatError):
+            CollectionResults().save(results_file)
+        assert not results_file.exists()
+
+        results_file.write_bytes(b'\x28\xb5\x2f\xfd\x00')
+        results_file.chmod(0o600)
+        with pytest.raises(exceptions.CollectionResultsFormatError):
+            CollectionResults().load(results_file)
+
+    def test_collection_results_save_invalid_compression(self, tmp_path):
+        with pytest.raises(exceptions.CollectionResultsFormatError):
+            CollectionResults().save(tmp_path / 'collected.results',
+                                     compression='bzip2')
+
+    @pytest.mark.config('tests/unit/data/collected/libvirt/collector.results')
+    def test_collection_results_load_truncated(self, collected_results,
+                                               tmp_path):
+        results_file = tmp_path / 'collected.jsonl.gz'
+        collected_results.save(results_file)
+        results_file.write_bytes(results_file.read_bytes()[:-16])
+        with pytest.raises(exceptions.CollectionResultsInvalidData):
+            CollectionResults().load(results_file)
+
+    def test_collection_results_save_invalid_format(self, tmp_path):
+        with pytest.raises(exceptions.CollectionResultsFormatError):
+            CollectionResults().save(tmp_path / 'collected.results',
+                                     results_format='xml')
+
+    @pytest.mark.parametrize('content', [
+        '{"backend": "vc1", "valid": true, "details": {}}\n{"backend"\n',
+        '{"backend": "vc1", "valid": true}\n',
+        '{"backend": "vc1"}\n',
+    ])
+    def test_collection_results_load_invalid_jsonl(self, content, tmp_path):
+        results_file = tmp_path / 'collected.results'
+        results_file.write_text(content)
+        results_file.chmod(0o600)
+        with pytest.raises(exceptions.CollectionResultsInvalidData):
+            CollectionResults().load(results_file)
+
+    def test_collection_results_save_empty(self, tmp_path):
+        results_file = tmp_path / 'collected.results'
+        collected = CollectionResults()
+        collected._hv_details = []
+        collected.save(results_file)
+        assert results_file.read_text() == dump_yaml([])
+
+
 class TestScheduler:
 
 
@@ -112,3 +358,152 @@ class TestScheduler:
                     assert 'esx2.test.net' in str(each.details)
                     assert 'esx1.test.net' in each.hosts
                     assert 'esx1.test.net' in each.results
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_scheduler_default_workers(self, config_manager):
+        scheduler = CollectionScheduler(config_manager.config_data)
+        assert scheduler.settings.workers == 1
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('workers', [2, 3, 8])
+    def test_scheduler_concurrent_run(self, config_manager, workers):
+        def mock_query_backend(hv_collector):
+            mfilename = ('tests/unit/data/config/mock/mock_' +
+                         hv_collector.backend.id + '.json')
+            hv_collector._state.status = 'success'
+            return utils.read_mock_data(mfilename)
+
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(
+                                            workers=workers))
+        assert scheduler.settings.workers == workers
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._query_backend',
+                        autospec=True, side_effect=mock_query_backend) as query_backend:
+            scheduler.run()
+            assert query_backend.call_count == len(scheduler.hypervisors)
+        for each in scheduler.hypervisors:
+            assert each.succeeded
+            utils.validate_mock_data(each, each.backend.id)
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('workers', [1, 3])
+    def test_scheduler_process_executor(self, config_manager, workers, forked_isolated_queries):
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(
+                                            workers=workers,
+                                            executor='process'))
+        assert scheduler.settings.executor == 'process'
+        assert all(hv.options.isolated for hv in scheduler.hypervisors)
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=utils.mock_worker_run):
+            scheduler.run()
+        for each in scheduler.hypervisors:
+            assert each.succeeded
+            assert each.usage is not None
+            utils.validate_mock_data(each, each.backend.id)
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_scheduler_invalid_executor(self, config_manager):
+        with pytest.raises(exceptions.CollectorConfigContentError):
+            config_manager.config_data.scheduler.override(executor='bogus')
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    @pytest.mark.parametrize('workers', [1, 3])
+    def test_scheduler_run_timeout(self, config_manager, workers):
+        def mock_worker_run(hv_collector):
+            mfilename = ('tests/unit/data/config/mock/mock_' +
+                         hv_collector.backend.id + '.json')
+            # simulate a hung vcenter
+            if hv_collector.backend.id == 'vcenter1':
+                time.sleep(30)
+            return utils.read_mock_data(mfilename)
+
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(
+                                            workers=workers, run_timeout=1))
+        assert scheduler.settings.run_timeout == 1
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=mock_worker_run):
+            start = time.monotonic()
+            scheduler.run()
+            assert time.monotonic() - start < 5
+        for each in scheduler.hypervisors:
+            if each.backend.id == 'vcenter1':
+                assert each.failed
+                assert each.timed_out
+            elif workers > 1:
+                # other backends were queried concurrently and completed
+                assert each.succeeded
+        # the results for the completed backends are still available
+        results = {r['backend']: r for r in scheduler.results.results}
+        assert results['vcenter1']['valid'] is False
+        assert len(results) == 3
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_scheduler_module_limits(self, config_manager):
+        lock = threading.Lock()
+        active = {'VMware': 0, 'Libvirt': 0}
+        peak = dict(active)
+
+        def mock_worker_run(hv_collector):
+            mfilename = ('tests/unit/data/config/mock/mock_' +
+                         hv_collector.backend.id + '.json')
+            module = hv_collector.backend.module
+            with lock:
+                active[module] += 1
+                peak[module] = max(peak[module], active[module])
+            time.sleep(0.2)
+            with lock:
+                active[module] -= 1
+            return utils.read_mock_data(mfilename)
+
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(
+                                            workers=3,
+                                            module_limits={'Libvirt': 1}))
+        assert scheduler.settings.module_limits == {'Libvirt': 1}
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=mock_worker_run):
+            completed = [hv.backend.id for hv in scheduler.as_completed()]
+        assert sorted(completed) == ['libvirt1', 'libvirt2', 'vcenter1']
+        # the libvirt backends were never queried at the same time
+        assert peak == {'VMware': 1, 'Libvirt': 1}
+        for each in scheduler.hypervisors:
+            assert each.succeeded
+
+    @pytest.mark.config('tests/unit/data/config/scheduler/scheduler.yaml', None)
+    def test_scheduler_configured_limits(self, config_manager):
+        scheduler = CollectionScheduler(config_manager.config_data)
+        assert scheduler.settings.module_limits == {'VMware': 1, 'Libvirt': 8}
+        assert scheduler.settings.rate_limit == 12.5
+        rate_limits = {hv.backend.id: hv.options.rate_limit
+                       for hv in scheduler.hypervisors}
+        assert rate_limits == {'scheduler_vmware_1': 2,
+                               'scheduler_libvirt_1': 12.5}
+
+    @pytest.mark.config('tests/unit/data/config/mock/config.yaml', None)
+    def test_scheduler_shared_rate_limit(self, config_manager):
+        lock = threading.Lock()
+        attempts = {}
+
+        def mock_worker_run(hv_collector):
+            mfilename = ('tests/unit/data/config/mock/mock_' +
+                         hv_collector.backend.id + '.json')
+            with lock:
+                attempts[hv_collector.backend.id] = time.monotonic()
+            return utils.read_mock_data(mfilename)
+
+        # permit at most one attempt every 0.25 seconds per module
+        scheduler = CollectionScheduler(config_manager.config_data,
+                                        settings=SchedulerConfig(
+                                            workers=3, rate_limit=240))
+        limiters = {hv.backend.id: hv.options.rate_limiter
+                    for hv in scheduler.hypervisors}
+        assert limiters['libvirt1'] is limiters['libvirt2']
+        assert limiters['libvirt1'] is not limiters['vcenter1']
+        with mock.patch('scc_hypervisor_collector.api.HypervisorCollector._worker_run',
+                        autospec=True, side_effect=mock_worker_run):
+            scheduler.run()
+        assert all(hv.succeeded for hv in scheduler.hypervisors)
+        # the concurrent queries of the libvirt backends were spaced out
+        assert abs(attempts['libvirt1'] - attempts['libvirt2']) >= 0.2
@@ -1,4 +1,6 @@
 from collections import namedtuple
+import gzip
+import json
 import mock
 import pytest
 from requests.exceptions import RequestException
@@ -201,3 +203,37 @@ class TestUploader:
                     uploader.upload(details=results['details'],
                                     backend=results['backend'],
                                     path=scc_test_path)
+
+
+    @pytest.mark.config('tests/unit/data/collected/libvirt/collector.results')
+    def test_compress_hosts(self, collected_results):
+        for hv_details in collected_results.hypervisor_details:
+            payload = SCCUploader.compress_hosts(hv_details.hosts())
+            assert json.loads(gzip.decompress(payload)) == hv_details.details
+            assert gzip.decompress(payload) == \
+                json.dumps(hv_details.details).encode('utf-8')
+
+    @pytest.mark.config('tests/unit/data/collected/libvirt/collector.results')
+    def test_upload_hosts_to_scc_retry(self, collected_results):
+        scc_url = 'https://scc.example.com'
+        scc_test_path = '/test'
+
+        scc_creds = SccCredsConfig(dict(password='someuser',
+                                        username='somepass',
+                                        url=scc_url))
+
+        uploader = SCCUploader(scc_creds)
+        responses = [FakeResponse(429, {'Retry-After': 0}), FakeResponse(200)]
+        with mock.patch('requests.put', side_effect=responses
+                       ) as requests_put:
+            hv_details = collected_results.hypervisor_details[0]
+            uploader.upload_hosts(hosts=hv_details.hosts(),
+                                  backend=hv_details.backend,
+                                  retry=True,
+                                  path=scc_test_path)
+            assert requests_put.call_count == 2
+            # the payload is compressed once, and reused for the retry
+            payloads = [c.kwargs['data'] for c in requests_put.call_args_list]
+            assert payloads[0] == payloads[1]
+            assert json.loads(gzip.decompress(payloads[0])) == \
+                hv_details.details
@@ -0,0 +1,44 @@
+import io
+import pytest
+import yaml
+
+from scc_hypervisor_collector.api import dump_yaml, load_yaml, peak_rss_kb
+from scc_hypervisor_collector.api import util
+
+
+@pytest.fixture(params=['libyaml', 'python'])
+def yaml_backend(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(util, 'YamlSafeLoader', yaml.SafeLoader)
+        monkeypatch.setattr(util, 'YamlSafeDumper', yaml.SafeDumper)
+    elif not yaml.__with_libyaml__:
+        pytest.skip("PyYAML was built without libyaml support")
+    return request.param
+
+
+class TestYamlBackend:
+
+    @pytest.mark.config('tests/unit/data/collected/libvirt/collector.results')
+    def test_yaml_round_trip(self, yaml_backend, collected_results):
+        results = collected_results.results
+        content = dump_yaml(results)
+        assert content == yaml.safe_dump(results)
+        assert load_yaml(content) == results
+
+        stream = io.StringIO()
+        assert dump_yaml(results, stream, sort_keys=False) is None
+        assert load_yaml(io.StringIO(stream.getvalue())) == results
+
+    def test_yaml_safe(self, yaml_backend):
+        with pytest.raises(yaml.YAMLError):
+            load_yaml('!!python/object/apply:os.getcwd []')
+        with pytest.raises(yaml.YAMLError):
+            dump_yaml(object())
+
+
+class TestPeakRss:
+
+    def test_peak_rss_kb(self):
+        # the test process will have used at least a MiB of memory
+        assert peak_rss_kb() > 1024
+        assert peak_rss_kb(children=True) >= 0
@@ -0,0 +1,174 @@
+import time
+
+import pytest
+
+from scc_hypervisor_collector.api import (
+    ConfigManager, ConfigValidator, dump_yaml, LoadOptions
+)
+
+CREDENTIALS = dict(scc=dict(username='scc_username', password='scc_password'))
+
+
+def vmware_backend(backend_id, **settings):
+    backend = dict(id=backend_id, module='VMware',
+                   hostname=f'{backend_id}.example.com', port=443,
+                   username='vmware_username', password='vmware_password')
+    backend.update(settings)
+    return backend
+
+
+def write_config(config_dir, name, **config):
+    config_dir.mkdir(mode=0o700, exist_ok=True)
+    config_file = config_dir / name
+    config_file.write_text(dump_yaml(config))
+    config_file.chmod(0o600)
+    return config_file
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    return tmp_path / 'config'
+
+
+def validate(config_dir, **kwargs):
+    return ConfigValidator(ConfigManager(config_dir=str(config_dir)),
+                           **kwargs).validate()
+
+
+class TestConfigValidator:
+
+    def test_valid_config(self, config_dir):
+        write_config(config_dir, '00_creds.yaml', credentials=CREDENTIALS)
+        write_config(config_dir, '10_site.yaml',
+                     backends=[vmware_backend('vc1'), vmware_backend('vc2')])
+
+        report = validate(config_dir)
+        assert report['valid']
+        assert report['backends'] == 2
+        assert report['invalid_backends'] == 0
+        assert report['errors'] == []
+        assert report['files'] == {}
+        assert len(report['config_files']) == 2
+
+    def test_errors_grouped(self, config_dir):
+        write_config(config_dir, '00_creds.yaml', credentials=CREDENTIALS)
+        site1 = write_config(config_dir, '10_site1.yaml', backends=[
+            vmware_backend('vc1'),
+            vmware_backend('vc2', timeout=0, password=None),
+        ])
+        site2 = write_config(config_dir, '20_site2.yaml', backends=[
+            {k: v for k, v in vmware_backend('vc3').items()
+             if k != 'password'},
+            vmware_backend('vc4', module='Unknown'),
+            dict(module='VMware'),
+            'not a backend',
+        ])
+
+        report = validate(config_dir)
+        assert not report['valid']
+        assert report['backends'] == 6
+        assert report['invalid_backends'] == 5
+        assert report['errors'] == []
+        assert report['files'][str(site1)] == {
+            'vc2': {'timeout': ['must be a positive number, not 0']},
+        }
+        site2_errors = report['files'][str(site2)]
+        assert site2_errors['vc3'] == {
+            'password': ['missing required field']
+        }
+        assert list(site2_errors['vc4']) == ['module']
+        assert "'Unknown' is not one of" in site2_errors['vc4']['module'][0]
+        assert site2_errors['backends[4]'] == {
+            'id': ['missing required field']
+        }
+        assert site2_errors['backends[5]'] == {
+            '*': ['backend entry should be a mapping']
+        }
+
+    def test_general_errors(self, config_dir):
+        write_config(config_dir, '10_site.yaml',
+                     backends=[vmware_backend('vc1')],
+                     scheduler=dict(workers=0))
+
+        report = validate(config_dir)
+        assert not report['valid']
+        assert report['invalid_backends'] == 0
+        assert "Missing 'credentials' section" in report['errors']
+        assert any('workers' in e for e in report['errors'])
+
+    def test_backends_required(self, config_dir):
+        write_config(config_dir, '00_creds.yaml', credentials=CREDENTIALS)
+
+        report = validate(config_dir)
+        assert report['errors'] == ["No backends specified in config!"]
+        assert validate(config_dir, backends_required=False)['valid']
+
+    def test_cached_sources(self, config_dir, tmp_path):
+        write_config(config_dir, '00_creds.yaml', credentials=CREDENTIALS)
+        site = write_config(config_dir, '10_site.yaml',
+                            backends=[vmware_backend('vc1', timeout=-1)])
+        cache_file = tmp_path / 'state' / 'config-cache.json'
+
+        for _ in range(2):
+            config_manager = ConfigManager(
+                config_dir=str(config_dir),
+                options=LoadOptions(cache_file=str(cache_file)))
+            report = ConfigValidator(config_manager).validate()
+            assert list(report['files']) == [str(site)]
+        assert cache_file.exists()
+
+    def test_workers_default(self, config_dir):
+        write_config(config_dir, '00_creds.yaml', credentials=CREDENTIALS)
+        write_config(config_dir, '10_site.yaml',
+                     backends=[vmware_backend('vc1')])
+        config_manager = ConfigManager(config_dir=str(config_dir))
+
+        assert ConfigValidator(config_manager).workers == 1
+        assert ConfigValidator(config_manager, workers=0).workers == 1
+        assert ConfigValidator(config_manager, workers=4).workers == 4
+
+    @pytest.mark.parametrize('workers', [1, 3])
+    def test_bulk_validation(self, config_dir, workers):
+        write_config(config_dir, '00_creds.yaml', credentials=CREDENTIALS)
+        backends = [vmware_backend(f'vc{i}') for i in range(5000)]
+        for backend in backends[::1000]:
+            del backend['password']
+        write_config(config_dir, '10_site.yaml', backends=backends)
+        config_manager = ConfigManager(config_dir=str(config_dir))
+        config_manager.merged_data
+
+        start = time.perf_counter()
+        report = ConfigValidator(config_manager, workers=workers).validate()
+        elapsed = time.perf_counter() - start
+
+        assert report['backends'] == 5000
+        assert report['invalid_backends'] == 5
+        site_errors = report['files'][str(config_dir / '10_site.yaml')]
+        assert list(site_errors) == [f'vc{i}' for i in range(0, 5000, 1000)]
+        # generous, to allow for slow CI systems
+        assert elapsed < 10
+
+    def test_templates_and_generators(self, config_dir):
+        write_config(config_dir, '00_creds.yaml', credentials=CREDENTIALS,
+                     backend_templates=dict(vcenter=dict(
+                         module='VMware', port=443,
+                         username='vmware_username',
+                         password='vmware_password')))
+        site = write_config(config_dir, '10_site.yaml', backends=[
+            dict(id='vc1', template='vcenter', hostname='vc1.example.com'),
+            dict(id='vc2', template='vcenter'),
+            dict(id='vc3', template='unknown', hostname='vc3.example.com'),
+        ], backend_generators=[
+            dict(template='vcenter', id='vc{index}', hostname='{host}',
+                 hosts=['a.example.com', 'b.example.com']),
+        ])
+
+        report = validate(config_dir)
+        assert not report['valid']
+        assert report['backends'] == 3
+        assert report['generated_backends'] == 2
+        assert report['errors'] == \
+            ["Conflicting generated backend ids: ['vc1']"]
+        assert report['files'][str(site)]['vc2'] == \
+            {'hostname': ['missing required field']}
+        assert list(report['files'][str(site)]['vc3']) == ['template']
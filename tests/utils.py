@@ -1,10 +1,37 @@
 import json
+import time
 
 def read_mock_data(filename):
     f = open(filename)
     data = json.load(f)
     return data
 
+def mock_worker_run(hypervisorcollector):
+    #return the mock results for the backend, in tests/unit/data/config/mock
+    return read_mock_data('tests/unit/data/config/mock/mock_' +
+                          hypervisorcollector.backend.id + '.json')
+
+def slow_vcenter_worker_run(hypervisorcollector):
+    #as for mock_worker_run(), making the vcenter the slowest backend
+    if hypervisorcollector.backend.id == 'vcenter1':
+        time.sleep(0.5)
+    return mock_worker_run(hypervisorcollector)
+
+def isolated_mock_query(conn, backend_settings, retry_policy,
+                        rate_limit=None):
+    #as for the isolated query of a spawned worker process, sending the
+    #mock results for the backend
+    conn.send(dict(status='success',
+                   results=read_mock_data('tests/unit/data/config/mock/mock_' +
+                                          backend_settings['id'] + '.json'),
+                   usage=dict(cpu_time=0.0, max_rss_kb=1)))
+    conn.close()
+
+def isolated_hung_query(conn, backend_settings, retry_policy,
+                        rate_limit=None):
+    #as for the isolated query of a spawned worker process, which hangs
+    time.sleep(30)
+
 def validate_mock_data(hypervisorcollector, backend_id):
     #based on the contents in test/unit/data/config/mock
     assert backend_id == hypervisorcollector.backend.id